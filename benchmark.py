@@ -0,0 +1,282 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark del pipeline del dashboard con datos sintéticos
+Mide aplicar_filtros, las funciones de preparacion_datos, generar_recomendaciones
+y las gráficas crear_* con distintos tamaños de datos, y guarda los tiempos
+en un JSON que sirve de línea base para comparar versiones.
+
+Uso:
+    python benchmark.py                                  # escenarios por defecto
+    python benchmark.py --filas 1000 100000 --municipios 106 2469
+    python benchmark.py --filas 10000000 --repeticiones 1
+    python benchmark.py --comparar benchmarks/base.json  # compara contra una línea base
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import time
+from datetime import date, datetime
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+import plotly
+
+from src.components.analisis import TIPOS_CONSULTA, generar_recomendaciones, generar_todas_recomendaciones
+from src.components.graficas import (
+    crear_mapa_casos,
+    crear_grafica_barras_municipios,
+    crear_grafica_casos_semanales,
+    crear_cronologia_propagacion,
+    crear_animacion_propagacion,
+    crear_mapa_coropletas,
+    crear_mapa_rutas,
+    tamano_payload
+)
+from src.config.settings import PUNTOS_MAX_SERIE, TOTAL_MUNICIPIOS_YUCATAN
+from src.data.google_sheets import aplicar_filtros
+from src.data.indice import IndiceFiltros
+from src.data.geometrias import LimitesMunicipales
+from src.data.sinteticos import TOTAL_MUNICIPIOS_MEXICO, coordenadas_sinteticas, generar_casos, limites_sinteticos
+from src.utils.agregaciones import ResumenAgregado
+from src.utils.asignacion import asignar_recursos
+from src.utils.cubo import CuboMunicipioSemana
+from src.utils.espacial import IndiceEspacial, puntaje_riesgo
+from src.utils.rutas import planear_rutas
+from src.utils.preparacion_datos import (
+    agregar_coordenadas,
+    preparar_datos_mapa,
+    calcular_metricas_generales,
+    obtener_top_municipios,
+    preparar_datos_temporales,
+    preparar_cronologia_primer_caso
+)
+
+DIRECTORIO_RESULTADOS = "benchmarks"
+
+
+def medir(funcion, repeticiones):
+    """
+    Ejecuta `funcion` varias veces.
+
+    Returns:
+        dict: mediana_s, minimo_s y repeticiones (las gráficas agregan 'bytes')
+    """
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append(time.perf_counter() - inicio)
+    return {
+        'mediana_s': float(np.median(tiempos)),
+        'minimo_s': float(np.min(tiempos)),
+        'repeticiones': repeticiones
+    }
+
+
+@lru_cache(maxsize=None)
+def limites_precalculados(municipios):
+    """
+    Límites sintéticos con los niveles de simplificación ya calculados (como
+    main.py al arrancar); se arman una vez por número de municipios.
+    """
+    return LimitesMunicipales(limites_sinteticos(municipios, vertices=60)).precalcular()
+
+
+def casos_de_prueba(df, municipios):
+    """
+    Arma las funciones a medir sobre un DataFrame, con entradas
+    preparadas como lo hace main.py.
+
+    Args:
+        df (pd.DataFrame): Datos sintéticos tipados
+        municipios (int): Municipios con que se generaron (para sus coordenadas sintéticas)
+
+    Returns:
+        dict: nombre -> función sin argumentos
+    """
+    fecha_inicio = df['Fecha_Reporte'].min().date()
+    fecha_fin = df['Fecha_Reporte'].max().date()
+    # Filtro típico: tres municipios y el último medio rango de fechas
+    fecha_media = (df['Fecha_Reporte'].min() + (df['Fecha_Reporte'].max() - df['Fecha_Reporte'].min()) / 2).date()
+    algunos = df['Municipio_Yucatan'].value_counts().index[:3].astype(str).tolist()
+
+    indice = IndiceFiltros(df)
+    cubo = CuboMunicipioSemana(df)
+    df_coords = agregar_coordenadas(df)
+    df_mapa = preparar_datos_mapa(df_coords)
+    top = obtener_top_municipios(df)
+    df_tiempo = preparar_datos_temporales(df)
+    primer_caso = preparar_cronologia_primer_caso(df)
+    resumen = ResumenAgregado.desde_cubo(cubo, ['Todos'], fecha_inicio, fecha_fin)
+    propagacion = resumen.datos_propagacion()
+
+    # Los casos espaciales usan coordenadas sintéticas repartidas en el país, no el
+    # caso degenerado de todos los municipios sin coordenadas en un mismo punto
+    coordenadas = coordenadas_sinteticas(municipios)
+    lat_lon = np.array(list(coordenadas.values()))
+    indice_espacial = IndiceEspacial(lat_lon[:, 0], lat_lon[:, 1], list(coordenadas))
+    limites = limites_precalculados(municipios)
+    df_mapa_resumen = resumen.datos_mapa()
+
+    casos = {
+        'aplicar_filtros[todos]': lambda: aplicar_filtros(df, ['Todos'], fecha_inicio, fecha_fin),
+        'aplicar_filtros[3_municipios]': lambda: aplicar_filtros(df, algunos, fecha_media, fecha_fin),
+        'aplicar_filtros[indice,3_municipios]': lambda: aplicar_filtros(df, algunos, fecha_media, fecha_fin, indice=indice),
+        'IndiceFiltros': lambda: IndiceFiltros(df),
+        'agregar_coordenadas': lambda: agregar_coordenadas(df.drop(columns=['lat', 'lon'], errors='ignore')),
+        'preparar_datos_mapa': lambda: preparar_datos_mapa(df_coords),
+        'calcular_metricas_generales': lambda: calcular_metricas_generales(df),
+        'obtener_top_municipios': lambda: obtener_top_municipios(df),
+        'preparar_datos_temporales': lambda: preparar_datos_temporales(df),
+        'preparar_cronologia_primer_caso': lambda: preparar_cronologia_primer_caso(df),
+        'ResumenAgregado': lambda: ResumenAgregado(df),
+        'CuboMunicipioSemana': lambda: CuboMunicipioSemana(df),
+        'ResumenAgregado.desde_cubo': lambda: ResumenAgregado.desde_cubo(cubo, ['Todos'], fecha_inicio, fecha_fin),
+        'crear_mapa_casos': lambda: crear_mapa_casos(df_mapa),
+        'crear_grafica_barras_municipios': lambda: crear_grafica_barras_municipios(top),
+        'crear_grafica_casos_semanales': lambda: crear_grafica_casos_semanales(df_tiempo),
+        'crear_grafica_casos_semanales[lttb]': lambda: crear_grafica_casos_semanales(df_tiempo, max_puntos=PUNTOS_MAX_SERIE),
+        'crear_cronologia_propagacion': lambda: crear_cronologia_propagacion(primer_caso),
+        'crear_animacion_propagacion': lambda: crear_animacion_propagacion(*propagacion),
+        'crear_mapa_coropletas': lambda: crear_mapa_coropletas(df_mapa_resumen, limites),
+    }
+    for tipo in TIPOS_CONSULTA:
+        casos[f'generar_recomendaciones[{tipo}]'] = lambda tipo=tipo: generar_recomendaciones(df, tipo)
+    casos['generar_todas_recomendaciones'] = lambda: generar_todas_recomendaciones(resumen)
+    casos['asignar_recursos'] = lambda: asignar_recursos(resumen, indice=indice_espacial)
+    casos['puntaje_riesgo'] = lambda: puntaje_riesgo(resumen, indice_espacial)
+    casos['IndiceEspacial.en_radio'] = lambda: IndiceEspacial(lat_lon[:, 0], lat_lon[:, 1]).en_radio(30)
+    prioritarios = resumen.ranking_municipios().head(100).index
+    casos['planear_rutas[100]'] = lambda: planear_rutas(prioritarios, coordenadas_extra=coordenadas)
+    rutas = planear_rutas(prioritarios, coordenadas_extra=coordenadas)[0]
+    casos['crear_mapa_rutas[100]'] = lambda: crear_mapa_rutas(df_mapa_resumen, rutas)
+    return casos
+
+
+def ejecutar(filas, municipios, anios, repeticiones, semilla=0):
+    """
+    Corre todos los escenarios (filas × municipios).
+
+    Returns:
+        list: Un dict por escenario con sus parámetros y los tiempos de cada función
+    """
+    escenarios = []
+    for n_municipios in municipios:
+        for n_filas in filas:
+            inicio = time.perf_counter()
+            df = generar_casos(n_filas, n_municipios, anios, semilla=semilla, tipado=True)
+            generacion = time.perf_counter() - inicio
+
+            print(f"▶ {n_filas:,} filas, {n_municipios:,} municipios, {anios} años")
+            tiempos = {}
+            for nombre, funcion in casos_de_prueba(df, n_municipios).items():
+                try:
+                    tiempos[nombre] = medir(funcion, repeticiones)
+                except Exception as e:
+                    # Una función que falla (p. ej. por la versión de plotly) no detiene el resto
+                    tiempos[nombre] = {'error': f"{type(e).__name__}: {e}"}
+                    print(f"   {nombre:<40} ❌ {tiempos[nombre]['error']}")
+                    continue
+                if nombre.startswith('crear_'):
+                    tiempos[nombre]['bytes'] = tamano_payload(funcion())['total']
+                print(f"   {nombre:<40} {tiempos[nombre]['mediana_s'] * 1000:>10.2f} ms")
+
+            escenarios.append({
+                'filas': n_filas,
+                'municipios': n_municipios,
+                'anios': anios,
+                'generacion_s': generacion,
+                'tiempos': tiempos
+            })
+    return escenarios
+
+
+def _commit_actual():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def comparar(actual, base, umbral=1.2):
+    """
+    Imprime la razón actual/base de cada función en los escenarios comunes.
+
+    Args:
+        actual (dict): Resultado de esta corrida
+        base (dict): Línea base cargada de JSON
+        umbral (float): Razón a partir de la cual se marca como regresión
+
+    Returns:
+        int: Número de regresiones
+    """
+    llave = lambda e: (e['filas'], e['municipios'], e['anios'])
+    base_por_escenario = {llave(e): e for e in base['escenarios']}
+    regresiones = 0
+
+    print(f"\n📊 Comparación contra {base.get('commit') or 'línea base'} ({base.get('fecha')})")
+    for escenario in actual['escenarios']:
+        anterior = base_por_escenario.get(llave(escenario))
+        if anterior is None:
+            continue
+        print(f"▶ {escenario['filas']:,} filas, {escenario['municipios']:,} municipios")
+        for nombre, tiempo in escenario['tiempos'].items():
+            if 'mediana_s' not in tiempo or 'mediana_s' not in anterior['tiempos'].get(nombre, {}):
+                continue
+            mediana_base = anterior['tiempos'][nombre]['mediana_s']
+            razon = tiempo['mediana_s'] / max(mediana_base, 1e-9)
+            # Diferencias de menos de 1 ms son ruido de medición
+            es_regresion = razon > umbral and tiempo['mediana_s'] - mediana_base > 1e-3
+            marca = "⚠️" if es_regresion else "  "
+            regresiones += es_regresion
+            print(f" {marca} {nombre:<40} ×{razon:.2f}")
+    return regresiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline del dashboard")
+    parser.add_argument('--filas', type=int, nargs='+', default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument('--municipios', type=int, nargs='+', default=[TOTAL_MUNICIPIOS_YUCATAN, TOTAL_MUNICIPIOS_MEXICO])
+    parser.add_argument('--anios', type=int, default=3)
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida', help="Archivo JSON de resultados (por defecto benchmarks/<fecha>_<commit>.json)")
+    parser.add_argument('--comparar', help="Línea base JSON contra la cual comparar")
+    args = parser.parse_args()
+
+    commit = _commit_actual()
+    resultado = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'entorno': {
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'numpy': np.__version__,
+            'plotly': plotly.__version__,
+            'plataforma': platform.platform()
+        },
+        'escenarios': ejecutar(args.filas, args.municipios, args.anios, args.repeticiones, args.semilla)
+    }
+
+    salida = args.salida or os.path.join(
+        DIRECTORIO_RESULTADOS, f"{date.today().isoformat()}_{commit or 'sin_commit'}.json"
+    )
+    os.makedirs(os.path.dirname(salida) or '.', exist_ok=True)
+    with open(salida, 'w', encoding='utf-8') as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+    print(f"\n✅ Resultados guardados en {salida}")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            regresiones = comparar(resultado, json.load(f))
+        print(f"\n{'⚠️' if regresiones else '✅'} {regresiones} regresiones")
+
+
+if __name__ == "__main__":
+    main()
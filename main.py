@@ -5,35 +5,36 @@ Sistema de visualización de datos para SENASICA
 Estado de Yucatán, México
 """
 import streamlit as st
-from datetime import datetime
 
 # Importar configuración
-from src.config.settings import PAGE_CONFIG, TOTAL_MUNICIPIOS_YUCATAN
+from src.config.settings import PAGE_CONFIG, TOTAL_MUNICIPIOS_YUCATAN, PUNTOS_MAX_SERIE, BRIGADAS_INSPECCION
 from src.config.styles_minimal import DASHBOARD_CSS
 
 # Importar funciones de datos
-from src.data.google_sheets import cargar_datos_desde_sheets, aplicar_filtros
+from src.data.cargador import obtener_datos, refrescar_datos, estado_refresco, obtener_limites_municipales
+from src.data.google_sheets import aplicar_filtros
+from src.data.indice import IndiceFiltros
 
 # Importar utilidades
-from src.utils.preparacion_datos import (
-    agregar_coordenadas,
-    preparar_datos_mapa,
-    calcular_metricas_generales,
-    obtener_top_municipios,
-    preparar_datos_temporales,
-    preparar_cronologia_primer_caso
-)
+from src.utils.agregaciones import ResumenAgregado
+from src.utils.cubo import CuboMunicipioSemana
+from src.utils.rutas import planear_rutas
 
 # Importar componentes visuales
 from src.components.graficas import (
     crear_mapa_casos,
+    crear_mapa_coropletas,
+    crear_animacion_propagacion,
+    crear_mapa_rutas,
     crear_grafica_barras_municipios,
     crear_grafica_casos_semanales,
-    crear_cronologia_propagacion
+    crear_cronologia_propagacion,
+    rango_seleccionado
 )
+from src.components.cache_figuras import figura_en_cache
 
 # Importar análisis
-from src.components.analisis import generar_recomendaciones
+from src.components.analisis import recomendaciones_en_cache
 
 # Importar chatbot
 from src.components.chatbot_ui import renderizar_chatbot_tab
@@ -62,12 +63,14 @@ st.markdown("""
 # ============================================
 # CARGAR DATOS
 # ============================================
-df = cargar_datos_desde_sheets()
+datos = obtener_datos()
 
-if df.empty:
-    st.error("❌ No se pudieron cargar los datos. Verifica la configuración de Google Sheets.")
+if datos is None or datos.df.empty:
+    st.error("❌ No se pudieron cargar los datos. Verifica la configuración de la fuente de datos (FUENTE_DATOS en settings).")
     st.stop()
 
+df = datos.df
+
 
 # ============================================
 # SISTEMA DE NAVEGACIÓN
@@ -108,7 +111,8 @@ df_filtrado = aplicar_filtros(
     df,
     st.session_state.municipio_seleccionado,
     st.session_state.fecha_inicio,
-    st.session_state.fecha_fin
+    st.session_state.fecha_fin,
+    indice=datos.derivado('indice_filtros', IndiceFiltros)
 )
 
 # Mostrar la página correspondiente
@@ -147,15 +151,35 @@ if st.session_state.pagina_activa == "Dashboard":
         with col3:
             st.markdown("<br>", unsafe_allow_html=True)
             if st.button("🔄 ACTUALIZAR DATOS", width="stretch"):
+                with st.spinner("Actualizando datos..."):
+                    refrescar_datos()
                 st.cache_data.clear()
                 st.rerun()
 
+        memoria = estado_refresco()['memoria']
+        if memoria:
+            st.caption(f"💾 Datos en memoria: {memoria['bytes_con_esquema'] / 1e6:.1f} MB ({memoria['porcentaje_ahorro']:.0f}% menos que sin esquema de tipos)")
+        filas_sin_fecha = estado_refresco()['filas_sin_fecha']
+        if filas_sin_fecha:
+            st.caption(f"⚠️ {filas_sin_fecha:,} registros con fecha vacía o ilegible no se incluyen en las gráficas por fecha")
+
     # ============================================
     # MÉTRICAS GENERALES
     # ============================================
     st.markdown('<p class="seccion-titulo">📊 Información General</p>', unsafe_allow_html=True)
 
-    metricas = calcular_metricas_generales(df_filtrado)
+    # Las gráficas se guardan en caché por versión de datos y estos filtros;
+    # payload_figuras anota los bytes de las que se muestran en este rerun
+    st.session_state.payload_figuras = {}
+    filtros = (
+        st.session_state.municipio_seleccionado,
+        st.session_state.fecha_inicio,
+        st.session_state.fecha_fin
+    )
+
+    # Un solo cálculo de agregados para todos los paneles, desde el cubo municipio × semana
+    resumen = ResumenAgregado.desde_cubo(datos.derivado('cubo', CuboMunicipioSemana), *filtros)
+    metricas = resumen.metricas_generales()
 
     col1, col2, col3, col4 = st.columns(4)
 
@@ -186,14 +210,6 @@ if st.session_state.pagina_activa == "Dashboard":
     st.markdown("<br>", unsafe_allow_html=True)
 
 
-    # ============================================
-    # PREPARAR DATOS PARA VISUALIZACIONES
-    # ============================================
-    # Agregar coordenadas geográficas
-    df_con_coords = agregar_coordenadas(df_filtrado)
-    df_mapa = preparar_datos_mapa(df_con_coords)
-
-
     # ============================================
     # MAPA Y GRÁFICA DE BARRAS
     # ============================================
@@ -203,15 +219,63 @@ if st.session_state.pagina_activa == "Dashboard":
         st.markdown('<p class="seccion-titulo">🗺️ Mapa de Casos Confirmados</p>', unsafe_allow_html=True)
         st.markdown('<p style="color: #6c757d; font-size: 13px; margin-top: -10px;">(Seleccione una unidad o vista)</p>', unsafe_allow_html=True)
 
-        fig_mapa = crear_mapa_casos(df_mapa)
+        # Con límites municipales disponibles se puede colorear cada municipio
+        limites = obtener_limites_municipales()
+        vistas = ["Círculos", "Propagación semanal", "Rutas de brigadas"]
+        if limites is not None:
+            vistas.insert(0, "Municipios")
+        vista_mapa = st.radio("Vista del mapa", vistas, horizontal=True, label_visibility="collapsed")
+
+        if vista_mapa == "Municipios":
+            fig_mapa = figura_en_cache(
+                'mapa_municipios', datos, filtros, lambda: crear_mapa_coropletas(resumen.datos_mapa(), limites)
+            )
+            sin_ubicacion = limites.sin_poligono(resumen.por_municipio.index.astype(str))
+        elif vista_mapa == "Propagación semanal":
+            # Todos los cuadros se arman una vez por versión de datos y filtros
+            fig_mapa = figura_en_cache(
+                'propagacion', datos, filtros, lambda: crear_animacion_propagacion(*resumen.datos_propagacion())
+            )
+            sin_ubicacion = estado_refresco()['sin_coordenadas']
+        elif vista_mapa == "Rutas de brigadas":
+            col_brigadas, col_paradas = st.columns(2)
+            brigadas = col_brigadas.number_input("Brigadas", min_value=1, max_value=10, value=BRIGADAS_INSPECCION)
+            paradas = col_paradas.number_input("Municipios prioritarios a visitar", min_value=1, max_value=500, value=20)
+
+            # Las rutas cubren los municipios prioritarios (mayor número de casos)
+            def construir_mapa_rutas():
+                rutas, info_rutas = planear_rutas(resumen.ranking_municipios().head(paradas).index, brigadas=brigadas)
+                fig = crear_mapa_rutas(resumen.datos_mapa(), rutas)
+                # El resumen viaja con la figura para que las sesiones que la toman de la caché lo muestren
+                fig.update_layout(meta={k: info_rutas[k] for k in ('distancia_km', 'tiempo_s', 'completo', 'sin_coordenadas')})
+                return fig
+
+            fig_mapa = figura_en_cache('mapa_rutas', datos, filtros, construir_mapa_rutas, parametros=(brigadas, paradas))
+            info_rutas = fig_mapa.layout.meta
+            st.caption(
+                f"🚚 {info_rutas['distancia_km']:,.0f} km en total · rutas calculadas en {info_rutas['tiempo_s'] * 1000:.0f} ms"
+                + ("" if info_rutas['completo'] else " (se agotó el tiempo de optimización; las rutas pueden mejorar)")
+            )
+            sin_ubicacion = info_rutas['sin_coordenadas']
+        else:
+            fig_mapa = figura_en_cache('mapa', datos, filtros, lambda: crear_mapa_casos(resumen.datos_mapa()))
+            sin_ubicacion = estado_refresco()['sin_coordenadas']
         st.plotly_chart(fig_mapa, use_container_width=True, config={'displayModeBar': False})
 
+        if sin_ubicacion and vista_mapa == "Municipios":
+            st.caption(f"⚠️ Sin polígono en el archivo de límites (no aparecen en el mapa): {', '.join(sin_ubicacion)}")
+        elif sin_ubicacion and vista_mapa == "Rutas de brigadas":
+            st.caption(f"⚠️ Sin coordenadas registradas (no se incluyen en las rutas): {', '.join(sin_ubicacion)}")
+        elif sin_ubicacion:
+            st.caption(f"⚠️ Sin coordenadas registradas (se muestran en el centro del estado): {', '.join(sin_ubicacion)}")
+
     with col_der:
         st.markdown('<p class="seccion-titulo">📊 Municipios Más Afectados</p>', unsafe_allow_html=True)
         st.markdown('<p style="color: #6c757d; font-size: 13px; margin-top: -10px;">Top 10 de municipios con mayor número de casos</p>', unsafe_allow_html=True)
 
-        top_municipios = obtener_top_municipios(df_filtrado, n=10)
-        fig_barras = crear_grafica_barras_municipios(top_municipios)
+        fig_barras = figura_en_cache(
+            'barras', datos, filtros, lambda: crear_grafica_barras_municipios(resumen.top_municipios(n=10))
+        )
         st.plotly_chart(fig_barras, use_container_width=True, config={'displayModeBar': False})
 
     st.markdown("<br><br>", unsafe_allow_html=True)
@@ -226,18 +290,51 @@ if st.session_state.pagina_activa == "Dashboard":
 
     with col1:
         st.markdown("**Evolución de Casos Semanales**")
-        st.markdown('<p style="color: #6c757d; font-size: 12px; margin-top: -5px;">Casos reportados por semana con línea de tendencia</p>', unsafe_allow_html=True)
-
-        df_tiempo = preparar_datos_temporales(df_filtrado)
-        fig_linea = crear_grafica_casos_semanales(df_tiempo)
-        st.plotly_chart(fig_linea, use_container_width=True, config={'displayModeBar': False})
+        agrupacion = "por semana (de lunes a domingo)" if resumen.serie_por_semana else "por fecha de reporte"
+        st.markdown(f'<p style="color: #6c757d; font-size: 12px; margin-top: -5px;">Casos reportados {agrupacion} con línea de tendencia</p>', unsafe_allow_html=True)
+
+        # Acercamiento local: seleccionar un tramo con el mouse lo muestra con resolución
+        # completa solo en esta gráfica; los demás paneles siguen con los filtros globales.
+        # El acercamiento vale para los filtros con que se hizo.
+        zoom = st.session_state.get('zoom_serie')
+        if zoom is not None and zoom['filtros'] != filtros:
+            zoom = st.session_state.zoom_serie = None
+        rango_serie = zoom['rango'] if zoom else None
+
+        def construir_serie():
+            serie = resumen.datos_temporales()
+            if rango_serie is not None:
+                dias = serie['Fecha_Reporte'].dt.date
+                serie = serie[(dias >= rango_serie[0]) & (dias <= rango_serie[1])]
+            return crear_grafica_casos_semanales(serie, max_puntos=PUNTOS_MAX_SERIE)
+
+        fig_linea = figura_en_cache('semanal', datos, filtros, construir_serie, parametros=(rango_serie,))
+        # Un widget nuevo después de aplicar una selección: así la selección no se queda
+        # guardada y no vuelve a aplicarse en los reruns siguientes
+        version_serie = st.session_state.get('version_serie', 0)
+        evento = st.plotly_chart(
+            fig_linea, use_container_width=True, config={'displayModeBar': False},
+            key=f'serie_semanal_{version_serie}', on_select='rerun', selection_mode='box'
+        )
+        rango = rango_seleccionado(evento, st.session_state.fecha_inicio, st.session_state.fecha_fin)
+        if rango is not None:
+            st.session_state.zoom_serie = {'filtros': filtros, 'rango': rango}
+            st.session_state.version_serie = version_serie + 1
+            st.rerun()
+
+        if rango_serie is not None:
+            st.caption(f"Detalle del {rango_serie[0].strftime('%d/%m/%Y')} al {rango_serie[1].strftime('%d/%m/%Y')} (solo en esta gráfica).")
+            if st.button("↩️ Ver serie completa", key='serie_completa'):
+                st.session_state.zoom_serie = None
+                st.rerun()
+        elif len(resumen.por_fecha) > PUNTOS_MAX_SERIE:
+            st.caption(f"Mostrando {PUNTOS_MAX_SERIE} de {len(resumen.por_fecha):,} semanas. Seleccione un tramo en la gráfica para verlo con todo el detalle.")
 
     with col2:
         st.markdown("**Datos Detallados por Municipio**")
         st.markdown('<p style="color: #6c757d; font-size: 12px; margin-top: -5px;">Municipios ordenados por casos totales</p>', unsafe_allow_html=True)
 
-        df_tabla = df_filtrado[['Municipio_Yucatan', 'Casos_Acumulados']].groupby('Municipio_Yucatan').max().sort_values('Casos_Acumulados', ascending=False).reset_index()
-        df_tabla.columns = ['Municipio', 'Casos Totales']
+        df_tabla = resumen.tabla_municipios()
 
         st.dataframe(
             df_tabla.head(15),
@@ -255,8 +352,10 @@ if st.session_state.pagina_activa == "Dashboard":
     st.markdown("**Cronología de Propagación del Brote por Municipio**")
     st.markdown('<p style="color: #6c757d; font-size: 12px; margin-top: -5px;">Línea de tiempo mostrando cuándo se detectó el primer caso en cada municipio</p>', unsafe_allow_html=True)
 
-    primer_caso_municipio = preparar_cronologia_primer_caso(df_filtrado)
-    fig_cronologia = crear_cronologia_propagacion(primer_caso_municipio)
+    primer_caso_municipio = resumen.cronologia_primer_caso()
+    fig_cronologia = figura_en_cache(
+        'cronologia', datos, filtros, lambda: crear_cronologia_propagacion(primer_caso_municipio)
+    )
     st.plotly_chart(fig_cronologia, use_container_width=True, config={'displayModeBar': False})
 
     # Resumen de la cronología
@@ -280,6 +379,12 @@ if st.session_state.pagina_activa == "Dashboard":
 
     st.info(f"📍 **Brote iniciado:** {primer_mun} el {primer_fecha} | **Último municipio afectado:** {ultimo_mun} el {ultima_fecha}")
 
+    payload = st.session_state.get('payload_figuras', {})
+    if payload:
+        st.caption("📦 Datos enviados por gráfica: " + " · ".join(
+            f"{nombre} {reporte['total'] / 1024:.1f} KB" for nombre, reporte in payload.items()
+        ))
+
 
     # ============================================
     # CHATBOT DE ANÁLISIS
@@ -346,7 +451,7 @@ if st.session_state.pagina_activa == "Dashboard":
                 }
 
                 tipo_consulta = tipo_map[tipo_analisis]
-                resultado = generar_recomendaciones(df_filtrado, tipo_consulta)
+                resultado = recomendaciones_en_cache(datos, filtros, tipo_consulta, resumen)
 
                 st.markdown('<div style="background: white; padding: 25px; border-radius: 10px; box-shadow: 0 2px 8px rgba(0,0,0,0.08); border-left: 4px solid #7D1F3A; margin-top: 10px;">', unsafe_allow_html=True)
                 st.markdown(resultado)
@@ -371,11 +476,19 @@ else:  # Asistente AI
 
 # FOOTER
 # ============================================
+refresco = estado_refresco()
+if datos.cargado_en is not None:
+    texto_actualizado = datos.cargado_en.strftime('%d de %B de %Y a las %H:%M hrs')
+else:
+    texto_actualizado = "sincronizando..."
+if refresco['ultima_duracion_segundos'] is not None:
+    texto_actualizado += f" | Versión de datos {datos.version} (último refresco: {refresco['ultima_duracion_segundos']:.1f} s)"
+
 st.markdown("<br>", unsafe_allow_html=True)
 st.markdown(f"""
 <div class="footer-gobierno">
     <p><strong>📊 Fuente:</strong> SENASICA - Sistema Nacional de Vigilancia Epidemiológica | Gobierno de México</p>
-    <p><strong>🕐 Actualizado:</strong> {datetime.now().strftime('%d de %B de %Y a las %H:%M hrs')}</p>
+    <p><strong>🕐 Actualizado:</strong> {texto_actualizado}</p>
     <p><strong>📍 Ubicación:</strong> Estado de Yucatán, México | <strong>Total de Registros:</strong> {len(df_filtrado):,}</p>
     <p style="margin-top: 12px; font-size: 11px; color: #999;">Las vistas y series temporales consideran el lugar de residencia de los casos reportados</p>
 </div>
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+"""
+Job de sincronización: copia la hoja de Google Sheets a una réplica local
+para que el dashboard lea de un archivo rápido (FUENTE_DATOS = "sqlite",
+"parquet" o "csv" en src/config/settings.py).
+
+Uso:
+    python sincronizar_replica.py [ruta_destino]
+
+Programar con cron (por ejemplo, cada 5 minutos).
+"""
+import sys
+
+from src.config.settings import RUTA_FUENTE_DATOS
+from src.data.fuentes import FuenteGoogleSheets, escribir_replica
+
+
+def main():
+    ruta = sys.argv[1] if len(sys.argv) > 1 else RUTA_FUENTE_DATOS
+
+    df = FuenteGoogleSheets().cargar()
+    escribir_replica(df, ruta)
+
+    print(f"✅ {len(df):,} registros copiados a {ruta}")
+
+
+if __name__ == "__main__":
+    main()
@@ -8,56 +8,66 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from pydantic import BaseModel, Field
-from typing import List, Dict, Any
+from langchain_core.messages import BaseMessage
+from typing import List, Dict, Any, Optional
+import logging
+import threading
 import uuid
 
+from ..config.settings import MEMORIA_TOKENS_MAX, MODELO_RESUMEN, TOKENS_RESUMEN
+from .cache_respuestas import CacheRespuestas, clave_respuesta
+from .sesiones import AlmacenSesiones, compactar_historial
 
-class PersistentChatMessageHistory(BaseChatMessageHistory, BaseModel):
-    """Historial de chat que persiste mensajes por sesión"""
-    messages: List[BaseMessage] = Field(default_factory=list)
-
-    def add_message(self, message: BaseMessage) -> None:
-        self.messages.append(message)
-
-    def add_user_message(self, message: str) -> None:
-        self.add_message(HumanMessage(content=message))
-
-    def add_ai_message(self, message: str) -> None:
-        self.add_message(AIMessage(content=message))
-
-    def clear(self) -> None:
-        self.messages = []
+logger = logging.getLogger(__name__)
 
 
 class AnalisisCompletoAgent:
     """Agente para análisis epidemiológicos completos con búsqueda web"""
 
-    def __init__(self, api_key: str, datos_contexto: str = ""):
+    def __init__(self, api_key: str, datos_contexto: str = "", cache: Optional[CacheRespuestas] = None):
         """
         Inicializar agente de análisis completo.
 
         Args:
             api_key: API key de Anthropic
             datos_contexto: Resumen completo de datos de Yucatán
+            cache: Caché de respuestas compartida (opcional); solo se usa en la
+                primera pregunta de cada sesión, que no depende de un historial
         """
-        self.llm = ChatAnthropic(
-            model="claude-sonnet-4-5-20250929",
+        self.parametros_modelo = {
+            "model": "claude-sonnet-4-5-20250929",
+            "max_tokens": 3000,  # Respuestas largas para análisis completo
+            "temperature": 0.3  # Más preciso para análisis
+        }
+        self.llm = ChatAnthropic(api_key=api_key, **self.parametros_modelo)
+        self.cache = cache
+
+        # Modelo pequeño para resumir los turnos viejos de las conversaciones largas
+        self.llm_resumen = ChatAnthropic(
             api_key=api_key,
-            max_tokens=3000,  # Respuestas largas para análisis completo
-            temperature=0.3  # Más preciso para análisis
+            model=MODELO_RESUMEN,
+            max_tokens=TOKENS_RESUMEN,
+            temperature=0
         )
-
-        self.chat_histories = {}
+        self.cadena_resumen = ChatPromptTemplate.from_messages([
+            ("system", "Resumes conversaciones entre un usuario y un asistente epidemiológico sobre el gusano "
+                       "barrenador en Yucatán. Conserva preguntas hechas, cifras, municipios, conclusiones y "
+                       "recomendaciones ya dadas. Responde solo con el resumen, en español, en viñetas breves."),
+            ("human", "Resumen anterior:\n{resumen_anterior}\n\nConversación nueva:\n{conversacion}\n\n"
+                      "Escribe un solo resumen actualizado que integre ambos.")
+        ]) | self.llm_resumen | StrOutputParser()
+
+        self.chat_histories = AlmacenSesiones()
         self.datos_contexto = datos_contexto
 
         # System prompt para análisis profundo
-        self.system_prompt = f"""Eres el ASISTENTE EPIDEMIOLÓGICO ESPECIALIZADO en gusano barrenador (Cochliomyia hominivorax) de SENASICA para Yucatán, México.
+        # El contexto de datos es una variable del prompt: cada sesión manda el suyo
+        # en cada llamada, así una sola instancia atiende a todas las sesiones
+        self.system_prompt = """Eres el ASISTENTE EPIDEMIOLÓGICO ESPECIALIZADO en gusano barrenador (Cochliomyia hominivorax) de SENASICA para Yucatán, México.
 
 DATOS ACTUALES DE YUCATÁN:
 =============================
-{datos_contexto if datos_contexto else "Cargando datos..."}
+{datos_contexto}
 
 TU FUNCIÓN:
 -----------
@@ -151,24 +161,60 @@ IMPORTANTE:
 
     def get_session_history(self, session_id: str) -> BaseChatMessageHistory:
         """Obtener o crear historial de sesión"""
-        if session_id not in self.chat_histories:
-            self.chat_histories[session_id] = PersistentChatMessageHistory()
-        return self.chat_histories[session_id]
+        return self.chat_histories.obtener(session_id)
+
+    def _resumir(self, resumen_anterior: str, conversacion: str) -> str:
+        """Resumen actualizado con los turnos que salen del historial"""
+        return self.cadena_resumen.invoke({
+            "resumen_anterior": resumen_anterior or "(sin resumen previo)",
+            "conversacion": conversacion
+        })
+
+    def _compactar_memoria(self, session_id: str):
+        """
+        Si el historial de la sesión pasó del presupuesto de tokens, resume sus
+        turnos viejos en segundo plano (la respuesta ya se entregó).
+        """
+        historial = self.chat_histories.existente(session_id)
+        # Sin hilo si no hace falta o si la sesión ya se está resumiendo
+        if historial is None or not historial.necesita_compactacion(MEMORIA_TOKENS_MAX):
+            return
+
+        def compactar():
+            try:
+                compactar_historial(historial, self._resumir, tokens_max=MEMORIA_TOKENS_MAX)
+            except Exception:
+                # Sin resumen la conversación sigue; el máximo de mensajes la acota
+                logger.exception("No se pudo resumir el historial de la sesión %s", session_id)
+
+        threading.Thread(target=compactar, daemon=True).start()
+
+    def _contexto(self, datos_contexto: Optional[str]) -> str:
+        """Contexto de datos de la llamada, o el del agente si no se manda"""
+        return datos_contexto or self.datos_contexto or "Cargando datos..."
+
+    def _clave_cache(self, pregunta: str, session_id: str, contexto: str) -> Optional[str]:
+        """Clave de caché de la pregunta, o None si no aplica (sin caché o la sesión ya tiene historial)"""
+        if self.cache is None or self.obtener_historial(session_id):
+            return None
+        return clave_respuesta(pregunta, self.parametros_modelo, self.system_prompt, contexto)
+
+    def _registrar_respuesta_en_cache(self, pregunta: str, respuesta: str, session_id: str):
+        """Agrega al historial de la sesión una respuesta tomada de la caché (para las preguntas siguientes)"""
+        historial = self.get_session_history(session_id)
+        historial.add_user_message(pregunta)
+        historial.add_ai_message(respuesta)
 
     def actualizar_contexto(self, nuevo_contexto: str):
-        """Actualizar contexto con datos frescos de Yucatán"""
+        """Actualizar el contexto por defecto (el de las llamadas que no mandan uno)"""
         self.datos_contexto = nuevo_contexto
-        # Reconstruir system prompt con nuevo contexto
-        self.system_prompt = self.system_prompt.split("DATOS ACTUALES")[0] + \
-            f"DATOS ACTUALES DE YUCATÁN:\n=============================\n{nuevo_contexto}\n\n" + \
-            self.system_prompt.split("TU FUNCIÓN:")[1].split("TU FUNCIÓN:")[0] + "TU FUNCIÓN:" + \
-            self.system_prompt.split("TU FUNCIÓN:")[1]
 
     def analizar(
         self,
         pregunta: str,
         session_id: str = None,
-        usar_busqueda_web: bool = False
+        usar_busqueda_web: bool = False,
+        datos_contexto: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Realizar análisis completo.
@@ -177,6 +223,7 @@ IMPORTANTE:
             pregunta: Pregunta del usuario
             session_id: ID de sesión
             usar_busqueda_web: Si debe usar búsqueda web
+            datos_contexto: Resumen de datos de esta sesión (por defecto, el del agente)
 
         Returns:
             Dict con respuesta y metadatos
@@ -192,17 +239,30 @@ IMPORTANTE:
             else:
                 pregunta_modificada = pregunta
 
-            # Invocar chain
-            respuesta = self.runnable_chain.invoke(
-                {"question": pregunta_modificada},
-                config={"configurable": {"session_id": session_id}}
-            )
+            # Primera pregunta de la sesión ya respondida con los mismos datos: sin llamar al modelo
+            contexto = self._contexto(datos_contexto)
+            clave = self._clave_cache(pregunta_modificada, session_id, contexto)
+            respuesta = self.cache.obtener(clave) if clave else None
+            desde_cache = respuesta is not None
+
+            if desde_cache:
+                self._registrar_respuesta_en_cache(pregunta_modificada, respuesta, session_id)
+            else:
+                # Invocar chain
+                respuesta = self.runnable_chain.invoke(
+                    {"question": pregunta_modificada, "datos_contexto": contexto},
+                    config={"configurable": {"session_id": session_id}}
+                )
+                if clave:
+                    self.cache.guardar(clave, respuesta)
+                self._compactar_memoria(session_id)
 
             return {
                 "respuesta": respuesta,
                 "session_id": session_id,
                 "pregunta": pregunta,
                 "uso_busqueda_web": usar_busqueda_web,
+                "desde_cache": desde_cache,
                 "exito": True
             }
 
@@ -219,7 +279,9 @@ IMPORTANTE:
         self,
         pregunta: str,
         session_id: str = None,
-        usar_busqueda_web: bool = False
+        usar_busqueda_web: bool = False,
+        datos_contexto: Optional[str] = None,
+        metadatos: Optional[Dict[str, Any]] = None
     ):
         """
         Realizar análisis completo con streaming.
@@ -228,6 +290,8 @@ IMPORTANTE:
             pregunta: Pregunta del usuario
             session_id: ID de sesión
             usar_busqueda_web: Si debe usar búsqueda web
+            datos_contexto: Resumen de datos de esta sesión (por defecto, el del agente)
+            metadatos: Diccionario que se llena con 'desde_cache' (opcional)
 
         Yields:
             Chunks de texto de la respuesta
@@ -243,26 +307,40 @@ IMPORTANTE:
             else:
                 pregunta_modificada = pregunta
 
+            contexto = self._contexto(datos_contexto)
+            clave = self._clave_cache(pregunta_modificada, session_id, contexto)
+            respuesta = self.cache.obtener(clave) if clave else None
+            if metadatos is not None:
+                metadatos['desde_cache'] = respuesta is not None
+            if respuesta is not None:
+                self._registrar_respuesta_en_cache(pregunta_modificada, respuesta, session_id)
+                yield respuesta
+                return
+
             # Invocar chain con stream
+            partes = []
             for chunk in self.runnable_chain.stream(
-                {"question": pregunta_modificada},
+                {"question": pregunta_modificada, "datos_contexto": contexto},
                 config={"configurable": {"session_id": session_id}}
             ):
+                partes.append(chunk)
                 yield chunk
 
+            if clave:
+                self.cache.guardar(clave, "".join(partes))
+            self._compactar_memoria(session_id)
+
         except Exception as e:
             yield f"❌ **Error al procesar análisis:**\n{str(e)}\n\n💡 Intenta reformular tu pregunta o verifica la configuración de la API."
 
     def limpiar_historial(self, session_id: str):
-        """Limpiar historial de una sesión"""
-        if session_id in self.chat_histories:
-            self.chat_histories[session_id].clear()
+        """Limpiar historial de una sesión (el agente es compartido: se libera su memoria)"""
+        self.chat_histories.eliminar(session_id)
 
     def obtener_historial(self, session_id: str) -> List[BaseMessage]:
         """Obtener historial de mensajes de una sesión"""
-        if session_id in self.chat_histories:
-            return self.chat_histories[session_id].messages
-        return []
+        historial = self.chat_histories.existente(session_id)
+        return historial.messages if historial is not None else []
 
 
 # Preguntas sugeridas para análisis completo
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+Caché de respuestas de los agentes
+Guarda la respuesta a la primera pregunta de una conversación, con clave en
+la pregunta normalizada, el modelo y sus parámetros, un hash de la plantilla
+del system prompt y un hash del contexto de datos. Vive en memoria (LRU) y en SQLite, así sobrevive a reinicios del
+proceso; cada entrada vence después de un TTL. El lock solo protege el
+diccionario en memoria: cada acceso a SQLite abre su propia conexión (modo
+WAL) fuera del lock, así una sesión no espera el disco de otra.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from contextlib import closing
+from typing import Optional
+
+from ..config.settings import (
+    CACHE_RESPUESTAS_MAX,
+    CACHE_RESPUESTAS_MAX_DISCO,
+    CACHE_RESPUESTAS_TTL,
+    RUTA_CACHE_RESPUESTAS
+)
+
+
+def normalizar_pregunta(pregunta: str) -> str:
+    """Pregunta en minúsculas, sin acentos, signos de interrogación/exclamación ni espacios extra"""
+    sin_acentos = unicodedata.normalize('NFKD', pregunta).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sin_acentos.lower().strip(' ?!.').split())
+
+
+def clave_respuesta(pregunta: str, parametros: dict, plantilla: str, contexto: str) -> str:
+    """
+    Clave de caché de una respuesta. Cambiar de modelo o editar el system
+    prompt cambia la clave, así no se sirven respuestas de la versión anterior.
+
+    Args:
+        pregunta: Pregunta tal como la envía el usuario
+        parametros: Parámetros del modelo; debe incluir 'model' (el nombre del modelo)
+        plantilla: Plantilla del system prompt (antes de insertar el contexto)
+        contexto: Contexto de datos del system prompt
+
+    Returns:
+        Hash SHA-256 (hex)
+    """
+    if 'model' not in parametros:
+        raise ValueError("Los parámetros de la clave de caché deben incluir 'model'")
+    contenido = json.dumps({
+        'pregunta': normalizar_pregunta(pregunta),
+        'modelo': parametros['model'],
+        'parametros': parametros,
+        'plantilla': hashlib.sha256(plantilla.encode('utf-8')).hexdigest(),
+        'contexto': hashlib.sha256(contexto.encode('utf-8')).hexdigest()
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+
+class CacheRespuestas:
+    """Caché LRU en memoria con respaldo en SQLite y vencimiento por TTL"""
+
+    def __init__(
+        self,
+        ruta: Optional[str] = RUTA_CACHE_RESPUESTAS,
+        ttl: float = CACHE_RESPUESTAS_TTL,
+        max_entradas: int = CACHE_RESPUESTAS_MAX,
+        max_disco: int = CACHE_RESPUESTAS_MAX_DISCO
+    ):
+        """
+        Args:
+            ruta: Archivo SQLite (None = solo memoria)
+            ttl: Segundos que una respuesta es válida
+            max_entradas: Respuestas en memoria
+            max_disco: Respuestas en SQLite
+        """
+        self.ruta = ruta
+        self.ttl = ttl
+        self.max_entradas = max_entradas
+        self.max_disco = max_disco
+        self._memoria = OrderedDict()  # clave -> (respuesta, creada)
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+        if self.ruta:
+            os.makedirs(os.path.dirname(self.ruta) or '.', exist_ok=True)
+            with closing(self._conectar()) as conexion, conexion:
+                conexion.execute("PRAGMA journal_mode=WAL")  # lectores y escritor sin bloquearse
+                conexion.execute(
+                    "CREATE TABLE IF NOT EXISTS respuestas ("
+                    "clave TEXT PRIMARY KEY, respuesta TEXT NOT NULL, creada REAL NOT NULL, usada REAL NOT NULL)"
+                )
+                conexion.execute("CREATE INDEX IF NOT EXISTS respuestas_usada ON respuestas (usada)")
+
+    def _conectar(self):
+        return sqlite3.connect(self.ruta, timeout=5)
+
+    def obtener(self, clave: str) -> Optional[str]:
+        """
+        Returns:
+            La respuesta guardada y vigente, o None
+        """
+        ahora = time.time()
+        with self._lock:
+            entrada = self._memoria.get(clave)
+            if entrada is not None and ahora - entrada[1] <= self.ttl:
+                self._memoria.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[0]
+            self._memoria.pop(clave, None)
+
+        fila = None
+        if self.ruta:
+            try:
+                with closing(self._conectar()) as conexion, conexion:
+                    fila = conexion.execute(
+                        "SELECT respuesta, creada FROM respuestas WHERE clave = ? AND creada >= ?",
+                        (clave, ahora - self.ttl)
+                    ).fetchone()
+                    if fila is not None:
+                        conexion.execute("UPDATE respuestas SET usada = ? WHERE clave = ?", (ahora, clave))
+            except sqlite3.Error:
+                fila = None  # Sin disco la caché sigue funcionando en memoria
+
+        with self._lock:
+            if fila is None:
+                self.fallos += 1
+                return None
+            self.aciertos += 1
+            self._guardar_en_memoria(clave, fila[0], fila[1])
+        return fila[0]
+
+    def guardar(self, clave: str, respuesta: str) -> None:
+        """Guarda una respuesta en memoria y en SQLite"""
+        ahora = time.time()
+        with self._lock:
+            self._guardar_en_memoria(clave, respuesta, ahora)
+        if not self.ruta:
+            return
+        try:
+            with closing(self._conectar()) as conexion, conexion:
+                conexion.execute(
+                    "INSERT OR REPLACE INTO respuestas (clave, respuesta, creada, usada) VALUES (?, ?, ?, ?)",
+                    (clave, respuesta, ahora, ahora)
+                )
+                # Vencidas y, si sobran, las menos usadas
+                conexion.execute("DELETE FROM respuestas WHERE creada < ?", (ahora - self.ttl,))
+                conexion.execute(
+                    "DELETE FROM respuestas WHERE clave NOT IN "
+                    "(SELECT clave FROM respuestas ORDER BY usada DESC LIMIT ?)",
+                    (self.max_disco,)
+                )
+        except sqlite3.Error:
+            pass
+
+    def _guardar_en_memoria(self, clave, respuesta, creada):
+        self._memoria[clave] = (respuesta, creada)
+        self._memoria.move_to_end(clave)
+        while len(self._memoria) > self.max_entradas:
+            self._memoria.popitem(last=False)
+
+    def estadisticas(self) -> dict:
+        """
+        Returns:
+            Respuestas en memoria, aciertos y fallos
+        """
+        with self._lock:
+            return {'en_memoria': len(self._memoria), 'aciertos': self.aciertos, 'fallos': self.fallos}
@@ -8,31 +8,9 @@ from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.runnables.history import RunnableWithMessageHistory
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.chat_history import BaseChatMessageHistory
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
-from pydantic import BaseModel, Field
-from typing import List
 import uuid
 
-
-class PersistentChatMessageHistory(BaseChatMessageHistory, BaseModel):
-    """Historial de chat que persiste mensajes por sesión"""
-    messages: List[BaseMessage] = Field(default_factory=list)
-
-    def add_message(self, message: BaseMessage) -> None:
-        """Agregar mensaje al historial"""
-        self.messages.append(message)
-
-    def add_user_message(self, message: str) -> None:
-        """Agregar mensaje de usuario"""
-        self.add_message(HumanMessage(content=message))
-
-    def add_ai_message(self, message: str) -> None:
-        """Agregar mensaje de IA"""
-        self.add_message(AIMessage(content=message))
-
-    def clear(self) -> None:
-        """Limpiar historial"""
-        self.messages = []
+from .sesiones import AlmacenSesiones
 
 
 class ConsejoRapidoAgent:
@@ -53,7 +31,7 @@ class ConsejoRapidoAgent:
             temperature=0.7
         )
 
-        self.chat_histories = {}
+        self.chat_histories = AlmacenSesiones()
         self.datos_contexto = datos_contexto
 
         # System prompt para consejos rápidos
@@ -113,9 +91,7 @@ SÉ ULTRA CONCISO. Este es un chat rápido."""
 
     def get_session_history(self, session_id: str) -> BaseChatMessageHistory:
         """Obtener o crear historial de sesión"""
-        if session_id not in self.chat_histories:
-            self.chat_histories[session_id] = PersistentChatMessageHistory()
-        return self.chat_histories[session_id]
+        return self.chat_histories.obtener(session_id)
 
     def actualizar_contexto(self, nuevo_contexto: str):
         """Actualizar contexto con datos frescos"""
@@ -149,9 +125,8 @@ SÉ ULTRA CONCISO. Este es un chat rápido."""
             return f"❌ Error: {str(e)}\n\n💡 Intenta reformular tu pregunta."
 
     def limpiar_historial(self, session_id: str):
-        """Limpiar historial de una sesión"""
-        if session_id in self.chat_histories:
-            self.chat_histories[session_id].clear()
+        """Limpiar historial de una sesión (y liberar su memoria)"""
+        self.chat_histories.eliminar(session_id)
 
 
 # Preguntas sugeridas para el drawer
@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+"""
+Almacén de historiales de chat por sesión
+Los agentes son compartidos por todo el proceso, así que sus historiales
+deben tener límite: una sesión inactiva más de SESIONES_TTL segundos se
+descarta, si hay más de SESIONES_MAX se descartan las menos usadas (LRU) y
+cada historial guarda como máximo MENSAJES_MAX_POR_SESION mensajes.
+
+Para que el prompt no crezca con cada pregunta, cuando un historial pasa de
+MEMORIA_TOKENS_MAX tokens (aprox.) los turnos viejos se condensan en un
+resumen y solo los últimos MEMORIA_TURNOS_LITERALES se mandan completos.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional
+
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+from ..config.settings import (
+    CARACTERES_POR_TOKEN,
+    MEMORIA_TOKENS_MAX,
+    MEMORIA_TURNOS_LITERALES,
+    MENSAJES_MAX_POR_SESION,
+    SESIONES_MAX,
+    SESIONES_TTL
+)
+
+
+def _bytes_mensaje(mensaje: BaseMessage) -> int:
+    """Bytes aproximados del contenido de un mensaje"""
+    return len(str(mensaje.content).encode('utf-8'))
+
+
+def tokens_aprox(mensajes: List[BaseMessage]) -> int:
+    """Tokens aproximados de una lista de mensajes (por número de caracteres)"""
+    return sum(len(str(m.content)) for m in mensajes) // CARACTERES_POR_TOKEN
+
+
+def texto_conversacion(mensajes: List[BaseMessage]) -> str:
+    """Conversación como texto plano (para pedir su resumen)"""
+    return "\n\n".join(
+        f"{'Usuario' if isinstance(m, HumanMessage) else 'Asistente'}: {m.content}" for m in mensajes
+    )
+
+
+class PersistentChatMessageHistory(BaseChatMessageHistory):
+    """
+    Historial de chat de una sesión: un resumen de los turnos viejos más los
+    turnos recientes completos, con un máximo de mensajes.
+    Un lock protege los turnos y el resumen: el resumen se aplica desde un
+    hilo en segundo plano mientras la sesión puede seguir agregando mensajes.
+    """
+
+    def __init__(self, max_mensajes: int = MENSAJES_MAX_POR_SESION):
+        self.turnos: List[BaseMessage] = []
+        self.resumen = ""
+        self.max_mensajes = max_mensajes
+        self.compactando = False  # Hay un resumen en curso (ver iniciar_compactacion)
+        self._lock = threading.Lock()
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        """Mensajes que se mandan al modelo: el resumen (si hay) y los turnos recientes"""
+        with self._lock:
+            turnos, resumen = list(self.turnos), self.resumen
+        if not resumen:
+            return turnos
+        return [
+            HumanMessage(content=f"Resumen de nuestra conversación hasta ahora:\n{resumen}"),
+            AIMessage(content="Entendido, tomo en cuenta ese resumen para lo que sigue."),
+            *turnos
+        ]
+
+    def add_message(self, message: BaseMessage) -> None:
+        """Agregar mensaje al historial (descarta los más viejos si pasa del máximo)"""
+        with self._lock:
+            self.turnos.append(message)
+            if len(self.turnos) > self.max_mensajes:
+                del self.turnos[:len(self.turnos) - self.max_mensajes]
+                # El historial siempre empieza con una pregunta del usuario
+                while self.turnos and not isinstance(self.turnos[0], HumanMessage):
+                    del self.turnos[0]
+
+    def add_user_message(self, message: str) -> None:
+        """Agregar mensaje de usuario"""
+        self.add_message(HumanMessage(content=message))
+
+    def add_ai_message(self, message: str) -> None:
+        """Agregar mensaje de IA"""
+        self.add_message(AIMessage(content=message))
+
+    def clear(self) -> None:
+        """Limpiar historial"""
+        with self._lock:
+            self.turnos = []
+            self.resumen = ""
+
+    def tokens(self) -> int:
+        """Tokens aproximados que ocupa el historial en el prompt"""
+        return tokens_aprox(self.messages)
+
+    def turnos_viejos(self, turnos_literales: int) -> List[BaseMessage]:
+        """
+        Returns:
+            Mensajes anteriores a los últimos `turnos_literales` turnos (un turno
+            empieza con cada pregunta del usuario)
+        """
+        with self._lock:
+            preguntas = [i for i, m in enumerate(self.turnos) if isinstance(m, HumanMessage)]
+            if len(preguntas) <= turnos_literales:
+                return []
+            return self.turnos[:preguntas[-turnos_literales] if turnos_literales > 0 else len(self.turnos)]
+
+    def necesita_compactacion(self, tokens_max: int = MEMORIA_TOKENS_MAX) -> bool:
+        """True si el historial pasa de `tokens_max` y no hay un resumen en curso"""
+        return not self.compactando and self.tokens() > tokens_max
+
+    def iniciar_compactacion(self) -> bool:
+        """
+        Reserva el historial para resumirlo (una compactación a la vez por sesión).
+
+        Returns:
+            False si ya hay otra en curso
+        """
+        with self._lock:
+            if self.compactando:
+                return False
+            self.compactando = True
+            return True
+
+    def terminar_compactacion(self) -> None:
+        """Libera la reserva de iniciar_compactacion()"""
+        with self._lock:
+            self.compactando = False
+
+    def aplicar_resumen(self, resumen: str, resumidos: List[BaseMessage]) -> bool:
+        """
+        Reemplaza los mensajes `resumidos` (los primeros del historial) por el nuevo resumen.
+
+        Returns:
+            False si el historial cambió mientras se resumía (el resumen se descarta)
+        """
+        with self._lock:
+            if len(self.turnos) < len(resumidos) or any(a is not b for a, b in zip(self.turnos, resumidos)):
+                return False
+            del self.turnos[:len(resumidos)]
+            self.resumen = resumen
+            return True
+
+
+def compactar_historial(
+    historial: PersistentChatMessageHistory,
+    resumir: Callable[[str, str], str],
+    tokens_max: int = MEMORIA_TOKENS_MAX,
+    turnos_literales: int = MEMORIA_TURNOS_LITERALES
+) -> bool:
+    """
+    Si el historial pasa de `tokens_max`, condensa en el resumen todo menos los
+    últimos `turnos_literales` turnos. Si la sesión ya se está resumiendo en
+    otro hilo no hace nada.
+
+    Args:
+        historial: Historial de la sesión
+        resumir: Función (resumen anterior, conversación en texto) -> resumen nuevo
+        tokens_max: Tokens (aprox.) del historial a partir de los que se resume
+        turnos_literales: Turnos recientes que se conservan completos
+
+    Returns:
+        True si se actualizó el resumen
+    """
+    if historial.tokens() <= tokens_max or not historial.iniciar_compactacion():
+        return False
+    try:
+        viejos = historial.turnos_viejos(turnos_literales)
+        if not viejos:
+            return False
+        # El modelo se llama sin el lock: la sesión puede seguir agregando
+        # mensajes y aplicar_resumen descarta el resumen si el prefijo cambió
+        resumen = resumir(historial.resumen, texto_conversacion(viejos))
+        return historial.aplicar_resumen(resumen.strip(), viejos)
+    finally:
+        historial.terminar_compactacion()
+
+
+class AlmacenSesiones:
+    """Historiales por session_id con vencimiento por inactividad y límite de sesiones (LRU)"""
+
+    def __init__(
+        self,
+        ttl: float = SESIONES_TTL,
+        max_sesiones: int = SESIONES_MAX,
+        max_mensajes: int = MENSAJES_MAX_POR_SESION
+    ):
+        """
+        Args:
+            ttl: Segundos de inactividad tras los que se descarta una sesión
+            max_sesiones: Sesiones que se guardan como máximo
+            max_mensajes: Mensajes por sesión como máximo
+        """
+        self.ttl = ttl
+        self.max_sesiones = max_sesiones
+        self.max_mensajes = max_mensajes
+        self._sesiones = OrderedDict()  # session_id -> (historial, último uso)
+        self._lock = threading.Lock()
+        self.descartadas = 0
+
+    def _descartar_vencidas(self, ahora: float) -> None:
+        # Las sesiones están en orden de uso: las vencidas quedan al principio
+        while self._sesiones:
+            _, (_, ultimo_uso) = next(iter(self._sesiones.items()))
+            if ahora - ultimo_uso <= self.ttl:
+                break
+            self._sesiones.popitem(last=False)
+            self.descartadas += 1
+
+    def obtener(self, session_id: str) -> PersistentChatMessageHistory:
+        """Historial de la sesión (lo crea si no existe) y la marca como usada"""
+        ahora = time.time()
+        with self._lock:
+            self._descartar_vencidas(ahora)
+            entrada = self._sesiones.pop(session_id, None)
+            historial = entrada[0] if entrada else PersistentChatMessageHistory(max_mensajes=self.max_mensajes)
+            self._sesiones[session_id] = (historial, ahora)
+            while len(self._sesiones) > self.max_sesiones:
+                self._sesiones.popitem(last=False)
+                self.descartadas += 1
+            return historial
+
+    def existente(self, session_id: str) -> Optional[PersistentChatMessageHistory]:
+        """Historial de la sesión si existe y no ha vencido (sin crearlo ni marcarlo como usado)"""
+        with self._lock:
+            self._descartar_vencidas(time.time())
+            entrada = self._sesiones.get(session_id)
+            return entrada[0] if entrada else None
+
+    def eliminar(self, session_id: str) -> None:
+        """Descarta la sesión y su historial"""
+        with self._lock:
+            entrada = self._sesiones.pop(session_id, None)
+        if entrada is not None:
+            entrada[0].clear()
+
+    def metricas(self) -> dict:
+        """
+        Returns:
+            Sesiones vivas, mensajes, bytes de contenido guardados, tokens (aprox.)
+            que se mandan al modelo y sesiones descartadas
+        """
+        with self._lock:
+            self._descartar_vencidas(time.time())
+            historiales = [historial for historial, _ in self._sesiones.values()]
+            return {
+                'sesiones': len(historiales),
+                'mensajes': sum(len(h.turnos) for h in historiales),
+                'bytes': sum(_bytes_mensaje(m) for h in historiales for m in h.messages),
+                'tokens': sum(h.tokens() for h in historiales),
+                'descartadas': self.descartadas
+            }
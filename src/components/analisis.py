@@ -1,41 +1,154 @@
 """
 Funciones de análisis y recomendaciones para el chatbot
+Los cinco análisis se generan juntos desde un mismo ResumenAgregado y se
+guardan por versión de datos y filtros en una caché compartida por todas
+las sesiones del proceso.
 """
+import threading
+from collections import OrderedDict
+
 import pandas as pd
+import streamlit as st
+
+from ..config.coordenadas import normalizar_municipio, normalizar_municipios
+from ..config.settings import CACHE_RECOMENDACIONES_MAX
+from ..utils.agregaciones import ResumenAgregado
+from ..utils.asignacion import asignar_recursos
+from ..utils.espacial import puntaje_riesgo
+
+TIPOS_CONSULTA = ['prioridad', 'tendencia', 'apoyos', 'distribucion', 'riesgo']
 
 
-def generar_recomendaciones(df_data, tipo_consulta):
+def generar_recomendaciones(df_data, tipo_consulta, resumen=None):
     """
     Genera recomendaciones basadas en el tipo de consulta.
 
     Args:
         df_data (pd.DataFrame): DataFrame con los datos filtrados
         tipo_consulta (str): Tipo de análisis ('prioridad', 'tendencia', etc.)
+        resumen (ResumenAgregado): Agregados de `df_data` ya calculados (opcional)
 
     Returns:
         str: Texto en markdown con el análisis y recomendaciones
     """
-    municipios_top = df_data.groupby('Municipio_Yucatan')['Casos_Acumulados'].max().sort_values(ascending=False)
-    total_casos = int(df_data['Casos_Acumulados'].max())
+    # Los apoyos son texto fijo: no requieren agregar los datos
+    if tipo_consulta == "apoyos":
+        return _informacion_apoyos()
+
+    if resumen is None:
+        resumen = ResumenAgregado(df_data)
+
+    municipios_top = resumen.ranking_municipios()
+    total_casos = resumen.metricas_generales()['total_casos']
 
     if tipo_consulta == "prioridad":
         return _analisis_prioridad(municipios_top, total_casos)
 
     elif tipo_consulta == "tendencia":
-        return _analisis_tendencia(df_data)
-
-    elif tipo_consulta == "apoyos":
-        return _informacion_apoyos()
+        return _analisis_tendencia(resumen.por_fecha)
 
     elif tipo_consulta == "distribucion":
-        return _estrategia_distribucion(municipios_top, total_casos)
+        return _estrategia_distribucion(municipios_top, total_casos, asignar_recursos(resumen))
 
     elif tipo_consulta == "riesgo":
-        return _evaluacion_riesgo(df_data, municipios_top)
+        return _evaluacion_riesgo(puntaje_riesgo(resumen), municipios_top)
 
     return "Tipo de consulta no reconocido"
 
 
+def generar_todas_recomendaciones(resumen):
+    """
+    Genera los cinco análisis a partir de los mismos agregados.
+
+    Args:
+        resumen (ResumenAgregado): Agregados de los datos filtrados
+
+    Returns:
+        dict: tipo de consulta -> texto en markdown
+    """
+    municipios_top = resumen.ranking_municipios()
+    total_casos = resumen.metricas_generales()['total_casos']
+    return {
+        'prioridad': _analisis_prioridad(municipios_top, total_casos),
+        'tendencia': _analisis_tendencia(resumen.por_fecha),
+        'apoyos': _informacion_apoyos(),
+        'distribucion': _estrategia_distribucion(municipios_top, total_casos, asignar_recursos(resumen)),
+        'riesgo': _evaluacion_riesgo(puntaje_riesgo(resumen), municipios_top)
+    }
+
+
+class CacheRecomendaciones:
+    """Caché LRU de los análisis por versión de datos y filtros"""
+
+    def __init__(self, max_entradas=CACHE_RECOMENDACIONES_MAX):
+        """
+        Args:
+            max_entradas (int): Combinaciones (versión, filtros) que se guardan
+        """
+        self.max_entradas = max_entradas
+        self._entradas = OrderedDict()  # clave -> dict de análisis
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, resumen):
+        """
+        Retorna los cinco análisis guardados con `clave` o los genera y guarda.
+
+        Args:
+            clave (tuple): Versión de datos y filtros
+            resumen (ResumenAgregado): Agregados con que se generan si faltan
+
+        Returns:
+            dict: tipo de consulta -> texto en markdown
+        """
+        with self._lock:
+            analisis = self._entradas.get(clave)
+            if analisis is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return analisis
+            self.fallos += 1
+
+        analisis = generar_todas_recomendaciones(resumen)
+
+        with self._lock:
+            self._entradas[clave] = analisis
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+        return analisis
+
+
+@st.cache_resource
+def obtener_cache_recomendaciones():
+    """
+    Returns:
+        CacheRecomendaciones: Caché compartida por todas las sesiones del proceso
+    """
+    return CacheRecomendaciones()
+
+
+def recomendaciones_en_cache(datos, filtros, tipo_consulta, resumen):
+    """
+    Atajo para main.py: análisis de un tipo para una versión de datos y filtros.
+
+    Args:
+        datos (DatosVersionados): Versión de datos mostrada
+        filtros (tuple): Municipios seleccionados, fecha de inicio y fecha fin
+        tipo_consulta (str): Tipo de análisis ('prioridad', 'tendencia', etc.)
+        resumen (ResumenAgregado): Agregados de los datos filtrados
+
+    Returns:
+        str: Texto en markdown con el análisis y recomendaciones
+    """
+    municipios, fecha_inicio, fecha_fin = filtros
+    clave = (datos.version, tuple(municipios), fecha_inicio, fecha_fin)
+    return obtener_cache_recomendaciones().obtener(clave, resumen).get(
+        tipo_consulta, "Tipo de consulta no reconocido"
+    )
+
+
 def _analisis_prioridad(municipios_top, total_casos):
     """Genera análisis de municipios prioritarios"""
     top_5 = municipios_top.head(5)
@@ -60,13 +173,12 @@ Los siguientes municipios concentran el mayor número de casos:
     return respuesta
 
 
-def _analisis_tendencia(df_data):
-    """Genera análisis de tendencias"""
-    df_temporal = df_data.groupby('Fecha_Reporte')['Casos_Semanales'].sum().reset_index()
-    casos_semana = int(df_data.groupby('Fecha_Reporte')['Casos_Semanales'].sum().tail(1).values[0]) if len(df_data) > 0 else 0
+def _analisis_tendencia(casos_por_fecha):
+    """Genera análisis de tendencias a partir de los casos semanales por fecha"""
+    casos_semana = int(casos_por_fecha.iloc[-1]) if len(casos_por_fecha) > 0 else 0
 
-    if len(df_temporal) >= 4:
-        ultimas_4 = df_temporal.tail(4)['Casos_Semanales'].values
+    if len(casos_por_fecha) >= 4:
+        ultimas_4 = casos_por_fecha.tail(4).values
         tendencia = "aumentando" if ultimas_4[-1] > ultimas_4[0] else "disminuyendo"
         cambio = ((ultimas_4[-1] - ultimas_4[0]) / ultimas_4[0] * 100) if ultimas_4[0] > 0 else 0
     else:
@@ -127,11 +239,13 @@ Llamar inmediatamente al detectar gusaneras en heridas de animales. La atención
 """
 
 
-def _estrategia_distribucion(municipios_top, total_casos):
-    """Genera estrategia de distribución de recursos"""
+def _estrategia_distribucion(municipios_top, total_casos, asignacion):
+    """Genera estrategia de distribución de recursos a partir de la asignación optimizada"""
     top_10 = municipios_top.head(10)
     total_top10 = top_10.sum()
     porcentaje_top10 = (total_top10 / total_casos * 100)
+    tabla, info = asignacion
+    recursos = [c for c in tabla.columns if c not in ('Casos_Recientes', 'Presion_Vecinos', 'Demanda')]
 
     respuesta = f"""
 **ESTRATEGIA DE DISTRIBUCIÓN DE RECURSOS:**
@@ -140,47 +254,57 @@ Los 10 municipios más afectados concentran el **{porcentaje_top10:.1f}%** de lo
 
 **PROPUESTA DE ASIGNACIÓN:**
 
-**Nivel 1 - CRÍTICO (60% de recursos):**
-"""
-    for municipio, casos in top_10.head(3).items():
-        respuesta += f"- {municipio}: {int(casos)} casos\n"
-
-    respuesta += """
+Demanda por municipio = casos de las últimas 2 semanas + riesgo por casos recientes en municipios vecinos.
+Cada recurso se reparte en proporción a la demanda, sin pasar del máximo por municipio.
 
-**Nivel 2 - ALTO (30% de recursos):**
+| Municipio | Casos recientes | {' | '.join(recursos)} |
+|---|---|{'---|' * len(recursos)}
 """
-    for municipio, casos in top_10.iloc[3:7].items():
-        respuesta += f"- {municipio}: {int(casos)} casos\n"
-
-    respuesta += """
-
-**Nivel 3 - MODERADO (10% de recursos):**
-- Resto de municipios afectados
-- Enfoque en prevención y vigilancia
-
-**RECURSOS SUGERIDOS POR NIVEL:**
-- **Nivel 1:** Personal veterinario, medicamentos, moscas estériles, inspecciones diarias
-- **Nivel 2:** Visitas semanales, medicamentos básicos
-- **Nivel 3:** Vigilancia pasiva, capacitaciones mensuales
+    con_recursos = tabla[tabla[recursos].sum(axis=1) > 0]
+    for municipio, fila in con_recursos.head(10).iterrows():
+        unidades = ' | '.join(str(int(fila[r])) for r in recursos)
+        respuesta += f"| {municipio} | {int(fila['Casos_Recientes'])} | {unidades} |\n"
+
+    if len(con_recursos) > 10:
+        respuesta += f"\n*...y {len(con_recursos) - 10} municipios más con recursos asignados.*\n"
+
+    sobrantes = [f"{r}: {n}" for r, n in info['sobrantes'].items() if n > 0]
+    respuesta += f"""
+
+**RESUMEN:**
+- Municipios con recursos asignados: {len(con_recursos)}
+- Inventario sin asignar (todos los municipios con demanda llegaron a su máximo): {', '.join(sobrantes) if sobrantes else 'ninguno'}
+- Asignación calculada en {info['tiempo_s'] * 1000:.0f} ms
+
+**RECURSOS SUGERIDOS:**
+- **Veterinarios:** inspecciones y atención de casos en los municipios con más demanda
+- **Moscas estériles:** liberación en municipios con casos y en sus vecinos
+- **Medicamentos:** curación de heridas y prevención en hatos expuestos
 """
     return respuesta
 
 
-def _evaluacion_riesgo(df_data, municipios_top):
-    """Genera evaluación de zonas de riesgo"""
-    # Calcular municipios con mayor crecimiento
-    df_reciente = df_data[df_data['Fecha_Reporte'] >= df_data['Fecha_Reporte'].max() - pd.Timedelta(days=14)]
-    crecimiento = df_reciente.groupby('Municipio_Yucatan')['Casos_Semanales'].sum().sort_values(ascending=False)
+def _evaluacion_riesgo(riesgo, municipios_top):
+    """Genera evaluación de zonas de riesgo a partir del puntaje por proximidad"""
 
     respuesta = """
 **EVALUACIÓN DE ZONAS DE RIESGO:**
 
-**Municipios con Mayor Actividad (Últimas 2 semanas):**
+**Municipios con Mayor Riesgo (actividad propia y de municipios vecinos, últimas 2 semanas):**
 
 """
-    for i, (municipio, casos_recientes) in enumerate(crecimiento.head(5).items(), 1):
-        casos_totales = municipios_top[municipio]
-        respuesta += f"{i}. **{municipio}**: {int(casos_recientes)} casos nuevos (Total: {int(casos_totales)})\n"
+    # El riesgo usa los nombres normalizados; la hoja puede traerlos con acentos o espacios
+    casos_por_nombre = municipios_top.groupby(normalizar_municipios(municipios_top.index)).max()
+    for i, (municipio, fila) in enumerate(riesgo.head(5).iterrows(), 1):
+        casos_totales = casos_por_nombre.get(normalizar_municipio(municipio), 0)
+        respuesta += f"{i}. **{municipio}** (riesgo {fila['Riesgo']:.0f}/100): {int(fila['Casos_Recientes'])} casos nuevos (Total: {int(casos_totales)})"
+        if pd.notna(fila['Vecino_Afectado']):
+            respuesta += f", a {fila['Distancia_km']:.0f} km de {fila['Vecino_Afectado']}"
+        respuesta += "\n"
+
+    sin_casos = riesgo[riesgo['Casos_Recientes'] == 0]
+    if len(sin_casos):
+        respuesta += f"\n**Sin casos recientes pero junto a municipios afectados:** {', '.join(sin_casos.index[:5].astype(str))}\n"
 
     respuesta += """
 
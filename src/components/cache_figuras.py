@@ -0,0 +1,149 @@
+"""
+Caché de gráficas de Plotly
+Las figuras se guardan ya serializadas (su JSON, una sola vez) por versión
+de datos y filtros, así un rerun que no cambió nada (por ejemplo, al mover
+otro widget) no vuelve a construir, validar ni copiar la figura. El tamaño
+de cada figura se mide en bytes de ese JSON; al pasar el límite se descarta
+lo menos usado (LRU).
+"""
+import json
+import threading
+from collections import OrderedDict
+
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+
+from ..config.settings import CACHE_FIGURAS_MAX_BYTES
+
+
+class FiguraSerializada(go.Figure):
+    """
+    Figura guardada como su JSON. st.plotly_chart la recibe como cualquier
+    go.Figure, pero to_dict() entrega el diccionario ya serializado en lugar
+    de copiar y convertir todas las trazas en cada rerun. Solo conserva el
+    layout como objeto (p. ej. para leer layout.meta); no modificarla.
+    """
+
+    def __init__(self, figura):
+        """
+        Args:
+            figura (go.Figure): Figura construida
+        """
+        super().__init__(layout=figura.layout)
+        # go.Figure solo admite atributos nuevos con guion bajo
+        self._json = pio.to_json(figura, validate=False)
+        self._spec = json.loads(self._json)
+        total = len(self._json)
+        layout = len(pio.json.to_json_plotly(self._spec.get('layout', {})))
+        self._payload = {'total': total, 'datos': total - layout, 'layout': layout}
+
+    @property
+    def payload(self):
+        """Bytes que se envían al navegador: total, datos (trazas) y layout (ver graficas.tamano_payload)"""
+        return self._payload
+
+    def to_json(self, *args, **kwargs):
+        return self._json
+
+    def to_dict(self):
+        return self._spec
+
+    def to_plotly_json(self):
+        return self._spec
+
+
+class CacheFiguras:
+    """Caché LRU de figuras limitada por el tamaño de su JSON"""
+
+    def __init__(self, max_bytes=CACHE_FIGURAS_MAX_BYTES):
+        """
+        Args:
+            max_bytes (int): Suma máxima del tamaño en JSON de las figuras guardadas
+        """
+        self.max_bytes = max_bytes
+        self._entradas = OrderedDict()  # clave -> (figura, bytes)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    def obtener(self, clave, constructor):
+        """
+        Retorna la figura guardada con `clave` o la construye y la guarda.
+
+        Args:
+            clave (tuple): Identificador (gráfica, versión de datos, filtros...)
+            constructor (callable): Función sin argumentos que crea la figura
+
+        Returns:
+            FiguraSerializada: Figura (compartida entre sesiones; no modificarla)
+        """
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None:
+                self._entradas.move_to_end(clave)
+                self.aciertos += 1
+                return entrada[0]
+            self.fallos += 1
+
+        # Construir fuera del lock; si dos sesiones coinciden, la segunda reemplaza a la primera
+        figura = FiguraSerializada(constructor())
+        tamano = figura.payload['total']
+
+        with self._lock:
+            anterior = self._entradas.pop(clave, None)
+            if anterior is not None:
+                self._bytes -= anterior[1]
+            if tamano <= self.max_bytes:
+                self._entradas[clave] = (figura, tamano)
+                self._bytes += tamano
+            while self._bytes > self.max_bytes:
+                _, (_, liberados) = self._entradas.popitem(last=False)
+                self._bytes -= liberados
+        return figura
+
+    def estadisticas(self):
+        """
+        Returns:
+            dict: figuras, bytes, aciertos y fallos
+        """
+        with self._lock:
+            return {
+                'figuras': len(self._entradas),
+                'bytes': self._bytes,
+                'aciertos': self.aciertos,
+                'fallos': self.fallos
+            }
+
+
+@st.cache_resource
+def obtener_cache_figuras():
+    """
+    Returns:
+        CacheFiguras: Caché compartida por todas las sesiones del proceso
+    """
+    return CacheFiguras()
+
+
+def figura_en_cache(nombre, datos, filtros, constructor, parametros=()):
+    """
+    Atajo para main.py: busca la figura `nombre` de una versión de datos y filtros
+    y anota en la sesión los bytes que se le envían al navegador por ella.
+
+    Args:
+        nombre (str): Gráfica ('mapa', 'barras', ...)
+        datos (DatosVersionados): Versión de datos mostrada
+        filtros (tuple): Municipios seleccionados, fecha de inicio y fecha fin
+        constructor (callable): Función sin argumentos que crea la figura
+        parametros (tuple): Otros valores de los que depende la figura (p. ej. número de brigadas)
+
+    Returns:
+        FiguraSerializada: Figura
+    """
+    municipios, fecha_inicio, fecha_fin = filtros
+    clave = (nombre, datos.version, tuple(municipios), fecha_inicio, fecha_fin, *parametros)
+    figura = obtener_cache_figuras().obtener(clave, constructor)
+    # Por sesión: la caché es compartida y otra sesión puede tener otros filtros
+    st.session_state.setdefault('payload_figuras', {})[nombre] = figura.payload
+    return figura
@@ -6,11 +6,35 @@ Incluye el drawer (panel lateral) y la página completa de análisis
 import streamlit as st
 from datetime import datetime
 from typing import Optional
+import time
 import uuid
 import pandas as pd
 
 from src.agents.consejo_rapido_agent import ConsejoRapidoAgent
 from src.agents.analisis_completo_agent import AnalisisCompletoAgent
+from src.agents.cache_respuestas import CacheRespuestas
+
+
+@st.cache_resource
+def obtener_cache_respuestas():
+    """
+    Returns:
+        CacheRespuestas: Caché de respuestas compartida por todas las sesiones del proceso
+    """
+    return CacheRespuestas()
+
+
+@st.cache_resource
+def obtener_agente_completo(api_key):
+    """
+    Agente de análisis compartido por todas las sesiones del proceso: un solo
+    cliente de Anthropic (con sus conexiones abiertas) y una sola cadena de
+    prompts. Las conversaciones se separan por session_id.
+
+    Returns:
+        AnalisisCompletoAgent: Agente del proceso
+    """
+    return AnalisisCompletoAgent(api_key=api_key, cache=obtener_cache_respuestas())
 
 
 def inicializar_session_state():
@@ -23,12 +47,16 @@ def inicializar_session_state():
 
 
 def preparar_contexto_datos(df):
-    """Prepara un resumen de los datos actuales para el contexto del agente"""
+    """
+    Prepara un resumen de los datos actuales para el contexto del agente.
+    Solo depende de los datos (sin la hora actual), así el mismo contexto
+    produce la misma clave en la caché de respuestas.
+    """
     total_municipios = df['Municipio_Yucatan'].nunique()
     total_casos = df['Casos_Acumulados'].max()
 
     # Obtener top 5 municipios
-    top_municipios = df.groupby('Municipio_Yucatan')['Casos_Acumulados'].max().sort_values(ascending=False).head(5)
+    top_municipios = df.groupby('Municipio_Yucatan', observed=True)['Casos_Acumulados'].max().sort_values(ascending=False).head(5)
     top_list = "\n".join([f"- {mun}: {casos} casos" for mun, casos in top_municipios.items()])
 
     # Casos recientes
@@ -44,8 +72,6 @@ DATOS ACTUALES DE YUCATÁN (actualizado: {fecha_max.strftime('%d/%m/%Y')}):
 
 Top 5 municipios más afectados:
 {top_list}
-
-Última actualización: {datetime.now().strftime('%d/%m/%Y %H:%M')}
 """
     return contexto
 
@@ -70,16 +96,10 @@ def renderizar_pagina_completa(df):
     st.markdown('<div class="seccion-titulo">🤖 VetAI - Asistente Epidemiológico</div>', unsafe_allow_html=True)
     st.markdown('<p style="color: #6c757d; font-size: 13px; margin-top: -5px;">Análisis profundo con búsqueda web y contexto global del gusano barrenador</p>', unsafe_allow_html=True)
 
-    # Inicializar agente
-    api_key = st.secrets["anthropic"]["api_key"]
+    # Agente compartido; el contexto de datos de esta sesión se manda en cada pregunta
+    agente = obtener_agente_completo(st.secrets["anthropic"]["api_key"])
     contexto = preparar_contexto_datos(df)
 
-    if 'agente_completo' not in st.session_state:
-        st.session_state.agente_completo = AnalisisCompletoAgent(
-            api_key=api_key,
-            datos_contexto=contexto
-        )
-
     # Barra superior con controles
     col1, col2, col3, col4 = st.columns([2, 1, 1, 1])
 
@@ -100,6 +120,7 @@ def renderizar_pagina_completa(df):
     with col3:
         if st.button("🗑️ Limpiar historial", use_container_width=True):
             st.session_state.chat_history_full = []
+            agente.limpiar_historial(st.session_state.session_id)
             st.session_state.session_id = str(uuid.uuid4())
             st.rerun()
 
@@ -109,8 +130,6 @@ def renderizar_pagina_completa(df):
             for chat in st.session_state.chat_history_full:
                 export_text += f"## Pregunta ({chat['timestamp'].strftime('%H:%M')})\n{chat['pregunta']}\n\n"
                 export_text += f"## Respuesta\n{chat['respuesta']}\n\n"
-                if chat.get('fuentes'):
-                    export_text += f"**Fuentes:** {', '.join(chat['fuentes'])}\n\n"
                 export_text += "---\n\n"
 
             st.download_button(
@@ -121,6 +140,13 @@ def renderizar_pagina_completa(df):
                 use_container_width=True
             )
 
+    sesiones = agente.chat_histories.metricas()
+    st.caption(
+        f"🧠 {sesiones['sesiones']} conversaciones activas en el servidor · "
+        f"{sesiones['mensajes']} mensajes · {sesiones['bytes'] / 1024:.0f} KB · "
+        f"~{sesiones['tokens']:,} tokens de historial"
+    )
+
     st.markdown("<br>", unsafe_allow_html=True)
 
     # Preguntas sugeridas en línea horizontal
@@ -185,9 +211,10 @@ def renderizar_pagina_completa(df):
                 # Renderizar el markdown de la respuesta usando st.markdown nativo
                 st.markdown(chat['respuesta'])
 
-                # Fuentes si hay
-                if chat.get('fuentes'):
-                    st.markdown(f"**🔍 Fuentes:** {', '.join(chat['fuentes'])}")
+                if chat.get('desde_cache'):
+                    st.caption("⚡ Respuesta guardada: misma pregunta con los mismos datos")
+                elif chat.get('total_s') is not None:
+                    st.caption(f"⏱️ Primera palabra en {chat['primer_token_s']:.1f} s · respuesta completa en {chat['total_s']:.1f} s")
 
                 st.markdown("<br>", unsafe_allow_html=True)
     else:
@@ -224,25 +251,39 @@ def renderizar_pagina_completa(df):
         pregunta_a_enviar = pregunta if pregunta else pregunta_del_boton
 
         if pregunta_a_enviar:
-            # Mostrar status mientras procesa
-            with st.status("🤖 VetAI está analizando...", expanded=True) as status:
-                if usar_web:
-                    st.write("🌐 Buscando información en internet...")
-                st.write("📊 Analizando datos de Yucatán...")
-                st.write("💡 Generando recomendaciones...")
-
-                resultado = st.session_state.agente_completo.analizar(
+            # La respuesta se muestra conforme llega; se mide el tiempo a la primera palabra y el total
+            st.markdown("""
+            <div style="background: #e8f4f8; padding: 20px 20px 10px 20px; border-radius: 10px;
+                        margin-bottom: 10px; max-width: 85%; border-left: 4px solid #7D1F3A;">
+                <div style="font-size: 11px; color: #666; margin-bottom: 10px;">
+                    🤖 VetAI está analizando...
+                </div>
+            </div>
+            """, unsafe_allow_html=True)
+
+            metadatos = {}
+            inicio = time.perf_counter()
+
+            def respuesta_con_tiempos():
+                for chunk in agente.analizar_stream(
                     pregunta_a_enviar,
                     session_id=st.session_state.session_id,
-                    usar_busqueda_web=usar_web
-                )
+                    usar_busqueda_web=usar_web,
+                    datos_contexto=contexto,
+                    metadatos=metadatos
+                ):
+                    metadatos.setdefault('primer_token_s', time.perf_counter() - inicio)
+                    yield chunk
+                metadatos['total_s'] = time.perf_counter() - inicio
 
-                status.update(label="✅ VetAI completó el análisis!", state="complete", expanded=False)
+            respuesta = st.write_stream(respuesta_con_tiempos())
 
             st.session_state.chat_history_full.append({
                 "pregunta": pregunta_a_enviar,
-                "respuesta": resultado['respuesta'],
-                "fuentes": resultado.get('fuentes', []),
+                "respuesta": respuesta if isinstance(respuesta, str) else "".join(map(str, respuesta)),
+                "desde_cache": metadatos.get('desde_cache', False),
+                "primer_token_s": metadatos.get('primer_token_s'),
+                "total_s": metadatos.get('total_s'),
                 "timestamp": datetime.now()
             })
 
@@ -2,9 +2,71 @@
 Componentes de gráficas para el dashboard
 Cada función crea y retorna una figura de Plotly
 """
-import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
 import numpy as np
+import pandas as pd
+
+from ..config.coordenadas import normalizar_municipio
+from ..utils.muestreo import indices_lttb
+
+# st.plotly_chart aplica el tema de Streamlit en el navegador: la plantilla
+# por defecto de Plotly solo agregaría ~6 KB a cada gráfica enviada
+PLANTILLA = 'none'
+
+# Puntos con que se dibuja la línea de tendencia de la serie semanal
+PUNTOS_TENDENCIA = 60
+
+
+def _compacto(valores):
+    """
+    Convierte una columna numérica al tipo más chico que la representa, para
+    que Plotly la envíe como arreglo binario (base64) y no como lista JSON.
+
+    Args:
+        valores (array-like): Valores numéricos
+
+    Returns:
+        np.ndarray: Enteros en int8/int16/int32 o flotantes en float32
+    """
+    valores = np.asarray(valores)
+    if np.issubdtype(valores.dtype, np.integer):
+        if len(valores) == 0:
+            return valores.astype(np.int32)
+        for tipo in (np.int8, np.int16, np.int32):
+            limites = np.iinfo(tipo)
+            if valores.min() >= limites.min and valores.max() <= limites.max:
+                return valores.astype(tipo)
+        return valores
+    return valores.astype(np.float32)
+
+
+def _fechas_compactas(fechas):
+    """
+    Fechas como texto 'AAAA-MM-DD' (Plotly enviaría 'AAAA-MM-DDT00:00:00').
+
+    Args:
+        fechas (array-like): Fechas
+
+    Returns:
+        list: Fechas en texto
+    """
+    return pd.DatetimeIndex(fechas).strftime('%Y-%m-%d').tolist()
+
+
+def tamano_payload(fig):
+    """
+    Bytes que se envían al navegador por una figura (su JSON).
+
+    Args:
+        fig (go.Figure): Figura
+
+    Returns:
+        dict: total, datos (trazas) y layout, en bytes
+    """
+    total = len(pio.to_json(fig, validate=False))
+    layout = len(pio.json.to_json_plotly(fig.layout.to_plotly_json()))
+    return {'total': total, 'datos': total - layout, 'layout': layout}
 
 
 def crear_mapa_casos(df_mapa):
@@ -17,37 +79,200 @@ def crear_mapa_casos(df_mapa):
     Returns:
         go.Figure: Figura de Plotly con el mapa
     """
-    fig = px.scatter_mapbox(
-        df_mapa,
-        lat='lat',
-        lon='lon',
-        size='Casos_Acumulados',
-        color='Casos_Acumulados',
-        hover_name='Municipio_Yucatan',
-        hover_data={
-            'Casos_Acumulados': ':,',
-            'Casos_Semanales': ':,',
-            'lat': False,
-            'lon': False
-        },
-        color_continuous_scale=[
+    casos = _compacto(df_mapa['Casos_Acumulados'])
+    maximo = max(int(casos.max()), 1) if len(casos) else 1
+
+    # Sin hover_data duplicada: el hover lee los casos acumulados de marker.color
+    fig = go.Figure(go.Scattermap(
+        lat=_compacto(df_mapa['lat']),
+        lon=_compacto(df_mapa['lon']),
+        mode='markers',
+        marker=dict(
+            size=casos,
+            sizemode='area',
+            sizeref=2 * maximo / 45 ** 2,
+            color=casos,
+            coloraxis='coloraxis'
+        ),
+        hovertext=df_mapa['Municipio_Yucatan'].astype(str).tolist(),
+        customdata=_compacto(df_mapa['Casos_Semanales']),
+        hovertemplate='<b>%{hovertext}</b><br><br>Casos Acumulados=%{marker.color:,}<br>Casos Semanales=%{customdata:,}<extra></extra>'
+    ))
+
+    fig.update_layout(
+        template=PLANTILLA,
+        height=520,
+        map=dict(style='carto-positron', zoom=7.3, center={'lat': 20.7, 'lon': -89.0}),
+        coloraxis=dict(colorscale=[
             [0, '#FFE5E5'],
             [0.3, '#FF9999'],
             [0.6, '#CC5555'],
             [1, '#7D1F3A']
-        ],
-        size_max=45,
-        zoom=7.3,
-        center={'lat': 20.7, 'lon': -89.0},
-        mapbox_style='carto-positron',
-        height=520,
-        labels={
-            'Casos_Acumulados': 'Casos Acumulados',
-            'Casos_Semanales': 'Casos Semanales'
-        }
+        ])
+    )
+
+    fig.update_layout(
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        paper_bgcolor='white',
+        font={'size': 12, 'family': 'Montserrat'},
+        coloraxis_colorbar=dict(
+            title="Casos",
+            thickness=18,
+            len=0.6,
+            bgcolor='white',
+            tickfont=dict(size=11)
+        )
+    )
+
+    return fig
+
+
+# Colores de las rutas de brigadas (se repiten si hay más brigadas)
+COLORES_RUTAS = ['#1F4E79', '#2E8B57', '#D4A017', '#6A3D9A', '#008B8B', '#E07B39']
+
+
+def crear_mapa_rutas(df_mapa, rutas):
+    """
+    Crea el mapa de casos con las rutas de las brigadas encima.
+
+    Args:
+        df_mapa (pd.DataFrame): DataFrame con datos agregados por municipio
+        rutas (list): DataFrames de planear_rutas() (Municipio_Yucatan, lat, lon en orden de visita)
+
+    Returns:
+        go.Figure: Figura de Plotly con el mapa y una traza por ruta
+    """
+    fig = crear_mapa_casos(df_mapa)
+    for i, ruta in enumerate(rutas):
+        color = COLORES_RUTAS[i % len(COLORES_RUTAS)]
+        fig.add_trace(go.Scattermap(
+            lat=_compacto(ruta['lat']),
+            lon=_compacto(ruta['lon']),
+            mode='lines+markers',
+            line=dict(width=3, color=color),
+            marker=dict(size=7, color=color),
+            name=f"Brigada {i + 1} ({ruta.attrs['distancia_km']:,.0f} km)",
+            hovertext=[f"{j}. {m}" for j, m in enumerate(ruta['Municipio_Yucatan'])],
+            hovertemplate='<b>%{hovertext}</b><extra>%{fullData.name}</extra>'
+        ))
+    fig.data[0].showlegend = False
+    fig.update_layout(
+        showlegend=True,
+        legend=dict(x=0.01, y=0.99, bgcolor='rgba(255,255,255,0.85)', font=dict(size=11))
+    )
+    return fig
+
+
+def crear_animacion_propagacion(ubicacion, semanas, acumulados):
+    """
+    Crea el mapa animado de la propagación semana a semana.
+    Todos los cuadros se arman de una vez sobre una sola traza base (posición
+    y nombres); cada cuadro solo cambia el tamaño y el color de los marcadores.
+
+    Args:
+        ubicacion (pd.DataFrame): Municipio_Yucatan, lat y lon de cada fila de la matriz
+        semanas (pd.DatetimeIndex): Lunes de cada columna de la matriz
+        acumulados (np.ndarray): Casos acumulados municipio × semana
+
+    Returns:
+        go.Figure: Figura de Plotly con cuadros, botón de reproducir y deslizador
+    """
+    # Un solo tipo para todos los cuadros y escala fija para que sean comparables
+    acumulados = _compacto(acumulados)
+    maximo = max(int(acumulados.max()), 1) if acumulados.size else 1
+    etiquetas = _fechas_compactas(semanas)
+    marcador = lambda j: dict(size=acumulados[:, j], color=acumulados[:, j]) if acumulados.size else {}
+
+    fig = go.Figure(go.Scattermap(
+        lat=_compacto(ubicacion['lat']),
+        lon=_compacto(ubicacion['lon']),
+        mode='markers',
+        marker=dict(sizemode='area', sizeref=2 * maximo / 45 ** 2, coloraxis='coloraxis', **marcador(-1)),
+        hovertext=ubicacion['Municipio_Yucatan'].astype(str).tolist(),
+        hovertemplate='<b>%{hovertext}</b><br><br>Casos Acumulados=%{marker.color:,}<extra></extra>'
+    ))
+    fig.frames = [
+        go.Frame(name=etiqueta, traces=[0], data=[go.Scattermap(marker=marcador(j))])
+        for j, etiqueta in enumerate(etiquetas)
+    ]
+
+    reproducir = dict(frame=dict(duration=300, redraw=True), transition=dict(duration=0), fromcurrent=True)
+    fig.update_layout(
+        template=PLANTILLA,
+        height=560,
+        map=dict(style='carto-positron', zoom=7.3, center={'lat': 20.7, 'lon': -89.0}),
+        coloraxis=dict(cmin=0, cmax=maximo, colorscale=[
+            [0, '#FFE5E5'],
+            [0.3, '#FF9999'],
+            [0.6, '#CC5555'],
+            [1, '#7D1F3A']
+        ], colorbar=dict(title="Casos", thickness=18, len=0.6, tickfont=dict(size=11))),
+        margin={"r": 0, "t": 0, "l": 0, "b": 0},
+        paper_bgcolor='white',
+        font={'size': 12, 'family': 'Montserrat'},
+        updatemenus=[dict(
+            type='buttons',
+            direction='left',
+            x=0.01, y=0.02, xanchor='left', yanchor='bottom',
+            buttons=[
+                dict(label='▶', method='animate', args=[None, reproducir]),
+                dict(label='⏸', method='animate', args=[[None], dict(frame=dict(duration=0, redraw=False), mode='immediate')])
+            ]
+        )],
+        sliders=[dict(
+            active=len(etiquetas) - 1,
+            x=0.12, len=0.86, y=0.02, yanchor='bottom',
+            currentvalue=dict(prefix='Semana del ', font=dict(size=12)),
+            steps=[
+                dict(label=etiqueta, method='animate',
+                     args=[[etiqueta], dict(frame=dict(duration=0, redraw=True), mode='immediate')])
+                for etiqueta in etiquetas
+            ]
+        )]
     )
 
+    return fig
+
+
+def crear_mapa_coropletas(df_mapa, limites):
+    """
+    Crea el mapa de casos por municipio coloreando su polígono.
+    Solo se envían los polígonos de los municipios con datos, simplificados
+    según el zoom que encuadra esos municipios.
+
+    Args:
+        df_mapa (pd.DataFrame): DataFrame con datos agregados por municipio
+        limites (LimitesMunicipales): Polígonos municipales
+
+    Returns:
+        go.Figure: Figura de Plotly con el mapa
+    """
+    municipios = df_mapa['Municipio_Yucatan'].astype(str).tolist()
+    centro, zoom = limites.vista(municipios)
+    if centro is None:
+        centro, zoom = {'lat': 20.7, 'lon': -89.0}, 7.3
+
+    fig = go.Figure(go.Choroplethmap(
+        geojson=limites.geojson(municipios, zoom),
+        locations=[normalizar_municipio(m) for m in municipios],
+        z=_compacto(df_mapa['Casos_Acumulados']),
+        coloraxis='coloraxis',
+        marker=dict(opacity=0.85, line=dict(color='white', width=0.5)),
+        hovertext=municipios,
+        customdata=_compacto(df_mapa['Casos_Semanales']),
+        hovertemplate='<b>%{hovertext}</b><br><br>Casos Acumulados=%{z:,}<br>Casos Semanales=%{customdata:,}<extra></extra>'
+    ))
+
     fig.update_layout(
+        template=PLANTILLA,
+        height=520,
+        map=dict(style='carto-positron', zoom=zoom, center=centro),
+        coloraxis=dict(colorscale=[
+            [0, '#FFE5E5'],
+            [0.3, '#FF9999'],
+            [0.6, '#CC5555'],
+            [1, '#7D1F3A']
+        ]),
         margin={"r": 0, "t": 0, "l": 0, "b": 0},
         paper_bgcolor='white',
         font={'size': 12, 'family': 'Montserrat'},
@@ -76,21 +301,21 @@ def crear_grafica_barras_municipios(top_municipios):
     fig = go.Figure()
 
     fig.add_trace(go.Bar(
-        y=top_municipios.index,
-        x=top_municipios.values,
+        y=top_municipios.index.astype(str).tolist(),
+        x=_compacto(top_municipios.values),
         orientation='h',
         marker=dict(
             color='#7D1F3A',
             line=dict(color='white', width=1)
         ),
-        text=top_municipios.values,
-        texttemplate='%{text:,}',
+        texttemplate='%{x:,}',
         textposition='outside',
         textfont=dict(size=12, color='#2c3e50', family='Montserrat', weight=600),
         hovertemplate='<b>%{y}</b><br>Casos: %{x:,}<extra></extra>'
     ))
 
     fig.update_layout(
+        template=PLANTILLA,
         height=520,
         showlegend=False,
         paper_bgcolor='white',
@@ -114,22 +339,30 @@ def crear_grafica_barras_municipios(top_municipios):
     return fig
 
 
-def crear_grafica_casos_semanales(df_tiempo):
+def crear_grafica_casos_semanales(df_tiempo, max_puntos=None):
     """
     Crea gráfica de casos semanales con línea de tendencia.
 
     Args:
         df_tiempo (pd.DataFrame): DataFrame con casos por fecha
+        max_puntos (int): Barras como máximo; las series más largas se reducen
+            con LTTB (la tendencia se ajusta con la serie completa). None = todas
 
     Returns:
         go.Figure: Figura de Plotly con gráfica de línea
     """
     fig = go.Figure()
 
+    fechas = _fechas_compactas(df_tiempo['Fecha_Reporte'])
+    casos = df_tiempo['Casos_Semanales'].to_numpy()
+    visibles = indices_lttb(
+        df_tiempo['Fecha_Reporte'].to_numpy(dtype='datetime64[ns]').astype(np.int64), casos, max_puntos
+    )
+
     # Barras de casos semanales
     fig.add_trace(go.Bar(
-        x=df_tiempo['Fecha_Reporte'],
-        y=df_tiempo['Casos_Semanales'],
+        x=[fechas[i] for i in visibles],
+        y=_compacto(casos[visibles]),
         name='Casos Semanales',
         marker_color='#CC5555',
         opacity=0.8,
@@ -142,11 +375,13 @@ def crear_grafica_casos_semanales(df_tiempo):
         y_values = df_tiempo['Casos_Semanales'].values
         z = np.polyfit(x_numeric, y_values, min(2, len(df_tiempo)-1))
         p = np.poly1d(z)
-        tendencia = p(x_numeric)
+        # La tendencia es una parábola: basta con unos cuantos puntos de la curva
+        muestra = np.unique(np.linspace(0, len(df_tiempo) - 1, PUNTOS_TENDENCIA).round().astype(int))
+        tendencia = p(muestra)
 
         fig.add_trace(go.Scatter(
-            x=df_tiempo['Fecha_Reporte'],
-            y=tendencia,
+            x=[fechas[i] for i in muestra],
+            y=_compacto(tendencia),
             name='Línea de Tendencia',
             line=dict(color='#7D1F3A', width=3, dash='dash'),
             mode='lines',
@@ -154,6 +389,7 @@ def crear_grafica_casos_semanales(df_tiempo):
         ))
 
     fig.update_layout(
+        template=PLANTILLA,
         height=380,
         paper_bgcolor='white',
         plot_bgcolor='white',
@@ -185,6 +421,36 @@ def crear_grafica_casos_semanales(df_tiempo):
     return fig
 
 
+def rango_seleccionado(evento, fecha_min, fecha_max):
+    """
+    Rango de fechas de una selección de caja en una gráfica con eje de fechas
+    (el evento que retorna st.plotly_chart con on_select).
+
+    Args:
+        evento: Resultado de st.plotly_chart
+        fecha_min (date): Primera fecha permitida
+        fecha_max (date): Última fecha permitida
+
+    Returns:
+        tuple: (fecha_inicio, fecha_fin) dentro de los límites, o None si no hay selección
+    """
+    seleccion = evento['selection'] if evento else None
+    if not seleccion:
+        return None
+
+    cajas = seleccion.get('box') or []
+    valores = cajas[0].get('x') if cajas else None
+    if not valores:
+        valores = [punto['x'] for punto in seleccion.get('points', []) if 'x' in punto]
+    if not valores:
+        return None
+
+    fechas = pd.to_datetime(pd.Series(valores).astype(str), format='mixed')
+    inicio = min(max(fechas.min().date(), fecha_min), fecha_max)
+    fin = max(min(fechas.max().date(), fecha_max), fecha_min)
+    return inicio, fin
+
+
 def crear_cronologia_propagacion(primer_caso_municipio):
     """
     Crea gráfica de cronología de propagación por municipio.
@@ -195,43 +461,57 @@ def crear_cronologia_propagacion(primer_caso_municipio):
     Returns:
         go.Figure: Figura de Plotly con cronología
     """
-    # Agrupar por fecha para contar municipios por día
-    municipios_por_fecha = primer_caso_municipio.groupby('Fecha_Reporte').size().reset_index(name='Cantidad')
+    # Una sola pasada: ordenar por fecha y cortar donde cambia la fecha
+    ordenado = primer_caso_municipio.sort_values('Fecha_Reporte', kind='stable')
+    fechas_filas = ordenado['Fecha_Reporte'].to_numpy()
+    nombres = ordenado['Municipio_Yucatan'].astype(str).tolist()
+    cambia_fecha = np.r_[True, fechas_filas[1:] != fechas_filas[:-1]] if len(nombres) else np.zeros(0, dtype=bool)
+    inicios = np.flatnonzero(cambia_fecha)
+    limites = np.r_[inicios, len(nombres)]
+
+    fechas = _fechas_compactas(ordenado['Fecha_Reporte'].iloc[inicios])
+    cantidades = np.diff(limites)
+    municipios_nombres = [', '.join(nombres[i:j]) for i, j in zip(limites[:-1], limites[1:])]
+    n = len(fechas)
+
+    # Todas las líneas verticales en una traza: (fecha, 0), (fecha, cantidad), None
+    x_lineas = np.empty(n * 3, dtype=object)
+    y_lineas = np.full(n * 3, np.nan, dtype=np.float32)  # NaN corta la línea
+    x_lineas[0::3] = fechas
+    x_lineas[1::3] = fechas
+    x_lineas[2::3] = None
+    y_lineas[0::3] = 0
+    y_lineas[1::3] = cantidades
 
     fig = go.Figure()
 
-    # Añadir líneas verticales para cada fecha
-    for _, row in municipios_por_fecha.iterrows():
-        municipios_esa_fecha = primer_caso_municipio[primer_caso_municipio['Fecha_Reporte'] == row['Fecha_Reporte']]
-        municipios_nombres = ', '.join(municipios_esa_fecha['Municipio_Yucatan'].tolist())
-
-        fig.add_trace(go.Scatter(
-            x=[row['Fecha_Reporte'], row['Fecha_Reporte']],
-            y=[0, row['Cantidad']],
-            mode='lines',
-            line=dict(color='#CC5555', width=2),
-            showlegend=False,
-            hoverinfo='skip'
-        ))
+    fig.add_trace(go.Scatter(
+        x=x_lineas,
+        y=y_lineas,
+        mode='lines',
+        line=dict(color='#CC5555', width=2),
+        showlegend=False,
+        hoverinfo='skip'
+    ))
 
-        # Punto en la parte superior
-        fig.add_trace(go.Scatter(
-            x=[row['Fecha_Reporte']],
-            y=[row['Cantidad']],
-            mode='markers+text',
-            marker=dict(
-                size=12 + (row['Cantidad'] * 2),
-                color='#7D1F3A',
-                line=dict(color='white', width=2)
-            ),
-            text=[f"{row['Cantidad']}" if row['Cantidad'] > 1 else ""],
-            textposition='top center',
-            textfont=dict(color='#7D1F3A', size=10, family='Montserrat', weight=600),
-            name='',
-            showlegend=False,
-            customdata=[[municipios_nombres]],
-            hovertemplate='<b>%{x|%d/%m/%Y}</b><br>Municipios nuevos: ' + str(row['Cantidad']) + '<br><b>Municipios:</b> %{customdata[0]}<extra></extra>'
-        ))
+    # Todos los puntos en una traza; los datos del hover van en customdata
+    fig.add_trace(go.Scatter(
+        x=fechas,
+        y=_compacto(cantidades),
+        mode='markers+text',
+        marker=dict(
+            size=_compacto(12 + cantidades * 2),
+            color='#7D1F3A',
+            line=dict(color='white', width=2)
+        ),
+        text=np.where(cantidades > 1, cantidades.astype(str), ''),
+        textposition='top center',
+        textfont=dict(color='#7D1F3A', size=10, family='Montserrat', weight=600),
+        name='',
+        showlegend=False,
+        customdata=list(zip(municipios_nombres, cantidades.tolist())),
+        hovertemplate='<b>%{x|%d/%m/%Y}</b><br>Municipios nuevos: %{customdata[1]}<br><b>Municipios:</b> %{customdata[0]}<extra></extra>'
+    ))
 
     # Anotación para el primer municipio
     primer_municipio = primer_caso_municipio.iloc[0]
@@ -254,6 +534,7 @@ def crear_cronologia_propagacion(primer_caso_municipio):
     )
 
     fig.update_layout(
+        template=PLANTILLA,
         height=400,
         paper_bgcolor='white',
         plot_bgcolor='white',
@@ -2,6 +2,10 @@
 Coordenadas geográficas de los municipios de Yucatán
 Diccionario con latitud y longitud para el mapa
 """
+import unicodedata
+
+import numpy as np
+import pandas as pd
 
 COORDENADAS_MUNICIPIOS = {
     'MERIDA': (20.9674, -89.5926),
@@ -52,6 +56,42 @@ COORDENADAS_MUNICIPIOS = {
 }
 
 
+# Coordenadas por defecto (centro de Yucatán) para municipios sin registro
+COORDENADAS_DEFECTO = (20.7, -89.0)
+
+# Tabla indexada por nombre normalizado, para resolver muchos municipios a la vez
+_TABLA_COORDENADAS = pd.DataFrame(
+    list(COORDENADAS_MUNICIPIOS.values()),
+    index=pd.Index(list(COORDENADAS_MUNICIPIOS.keys())),
+    columns=['lat', 'lon']
+).astype('float32')
+
+
+def normalizar_municipio(nombre):
+    """
+    Nombre de municipio en mayúsculas, sin acentos ni espacios extra (como las
+    claves de COORDENADAS_MUNICIPIOS). Es la única normalización de nombres:
+    la usan el mapa de puntos, el de coropletas, el índice espacial y las rutas.
+    """
+    sin_acentos = unicodedata.normalize('NFKD', str(nombre)).encode('ascii', 'ignore').decode('ascii')
+    return ' '.join(sin_acentos.upper().split())
+
+
+def normalizar_municipios(nombres):
+    """
+    normalizar_municipio() para muchos nombres (normaliza cada nombre distinto una vez).
+
+    Args:
+        nombres (array-like): Nombres de municipio
+
+    Returns:
+        pd.Index: Nombres normalizados, en el mismo orden
+    """
+    nombres = pd.Index(nombres).astype(str)
+    unicos = nombres.unique()
+    return pd.Index(pd.Series([normalizar_municipio(n) for n in unicos], index=unicos).reindex(nombres).to_numpy())
+
+
 def obtener_coordenadas(municipio):
     """
     Obtiene las coordenadas (lat, lon) de un municipio.
@@ -64,6 +104,39 @@ def obtener_coordenadas(municipio):
         tuple: (latitud, longitud)
     """
     return COORDENADAS_MUNICIPIOS.get(
-        str(municipio).upper().strip(),
-        (20.7, -89.0)  # Coordenadas por defecto (centro de Yucatán)
+        normalizar_municipio(municipio),
+        COORDENADAS_DEFECTO
+    )
+
+
+def resolver_coordenadas(municipios):
+    """
+    Versión vectorizada de obtener_coordenadas(): normaliza y busca cada
+    nombre distinto una sola vez y reparte el resultado a todas las filas.
+
+    Args:
+        municipios (pd.Series): Nombres de municipio (categórica o texto)
+
+    Returns:
+        tuple: (lat, lon, sin_coordenadas) con lat/lon como arreglos float32 y
+        sin_coordenadas la lista de municipios presentes que usan COORDENADAS_DEFECTO
+    """
+    if not isinstance(municipios.dtype, pd.CategoricalDtype):
+        municipios = municipios.astype(str).astype('category')
+
+    categorias = municipios.cat.categories
+    codigos = municipios.cat.codes.to_numpy()
+    posiciones = _TABLA_COORDENADAS.index.get_indexer(
+        normalizar_municipios(categorias)
     )
+    encontrado = posiciones >= 0
+
+    # Una posición extra al final para los valores vacíos (código -1)
+    lat = np.full(len(categorias) + 1, COORDENADAS_DEFECTO[0], dtype=np.float32)
+    lon = np.full(len(categorias) + 1, COORDENADAS_DEFECTO[1], dtype=np.float32)
+    lat[:-1][encontrado] = _TABLA_COORDENADAS['lat'].to_numpy()[posiciones[encontrado]]
+    lon[:-1][encontrado] = _TABLA_COORDENADAS['lon'].to_numpy()[posiciones[encontrado]]
+
+    presentes = np.bincount(codigos[codigos >= 0], minlength=len(categorias)) > 0
+    sin_coordenadas = [str(c) for c in categorias[presentes & ~encontrado]]
+    return lat[codigos], lon[codigos], sin_coordenadas
@@ -11,11 +11,84 @@ PAGE_CONFIG = {
     "initial_sidebar_state": "expanded"  # Mostrar sidebar con navegación
 }
 
+# Origen de los datos: "sheets", "csv", "sqlite" o "parquet"
+FUENTE_DATOS = "sheets"
+
+# Archivo local para los orígenes csv/sqlite/parquet (réplica de la hoja)
+RUTA_FUENTE_DATOS = "data/casos.sqlite"
+SQLITE_TABLA = "casos"
+
+# Formato de 'Fecha_Reporte' en la hoja (se lee con formato fijo, sin inferencia)
+FORMATO_FECHA_REPORTE = "%Y-%m-%d"
+
 # Nombre del Google Sheet
 SHEET_NAME = "Dashboard_Gusano_Barrenador"
 
 # Tiempo de caché para los datos (en segundos)
 CACHE_TTL = 300  # 5 minutos
 
+# Cada cuántos segundos se recargan los datos en segundo plano (antes de que venza CACHE_TTL)
+REFRESCO_INTERVALO = 240
+
 # Total de municipios en Yucatán
 TOTAL_MUNICIPIOS_YUCATAN = 106
+
+# Sincronización incremental con Google Sheets
+SYNC_INCREMENTAL = True  # False = descargar toda la hoja en cada actualización
+SYNC_VENTANA_REVISION = 50  # Filas recientes que se vuelven a descargar por si se corrigieron
+SYNC_RECARGA_COMPLETA_CADA = 12  # Recarga completa cada N sincronizaciones (~1 hora)
+
+# Carpeta donde se guarda el último snapshot de datos (arranque rápido y respaldo sin conexión)
+DIRECTORIO_SNAPSHOT = ".cache/snapshot"
+
+# Memoria máxima (en bytes de JSON) de las gráficas guardadas en caché
+CACHE_FIGURAS_MAX_BYTES = 64 * 1024 * 1024
+
+# Combinaciones de versión de datos y filtros con sus análisis guardados en caché
+CACHE_RECOMENDACIONES_MAX = 256
+
+# Barras como máximo en la serie semanal (las series más largas se reducen con LTTB).
+# Streamlit no informa al servidor el ancho real de la gráfica: se parte del ancho
+# típico de su columna en el layout "wide" y de unos PIXELES_POR_BARRA por barra
+ANCHO_SERIE_PX = 900
+PIXELES_POR_BARRA = 3
+PUNTOS_MAX_SERIE = ANCHO_SERIE_PX // PIXELES_POR_BARRA
+
+# Inventario para la estrategia de distribución: unidades disponibles y máximo por municipio
+RECURSOS_DISPONIBLES = {
+    'Veterinarios': {'inventario': 25, 'maximo_por_municipio': 4},
+    'Lotes de moscas estériles': {'inventario': 120, 'maximo_por_municipio': 15},
+    'Kits de medicamentos': {'inventario': 800, 'maximo_por_municipio': 80}
+}
+
+# Riesgo y demanda de recursos: casos recientes + PESO_RIESGO_VECINOS × casos recientes de municipios a menos de RADIO_VECINOS_KM
+RADIO_VECINOS_KM = 30
+PESO_RIESGO_VECINOS = 0.5
+
+# Rutas de brigadas de inspección: municipio de salida, brigadas y tiempo máximo de optimización
+MUNICIPIO_BASE_BRIGADAS = "MERIDA"
+BRIGADAS_INSPECCION = 3
+TIEMPO_MAX_RUTAS_S = 0.5
+
+# Límites municipales (GeoJSON, p. ej. del Marco Geoestadístico de INEGI) para el mapa de coropletas
+RUTA_LIMITES_MUNICIPALES = "geo/municipios.geojson"
+PROPIEDAD_NOMBRE_MUNICIPIO = "NOMGEO"  # Propiedad de cada polígono con el nombre del municipio
+
+# Caché de respuestas del asistente AI (primera pregunta de cada conversación)
+RUTA_CACHE_RESPUESTAS = ".cache/respuestas_llm.sqlite"
+CACHE_RESPUESTAS_TTL = 6 * 3600  # en segundos (6 horas)
+CACHE_RESPUESTAS_MAX = 500  # respuestas en memoria
+CACHE_RESPUESTAS_MAX_DISCO = 5000  # respuestas en SQLite
+
+# Historiales de chat de los agentes (compartidos por todo el proceso)
+SESIONES_TTL = 2 * 3600  # se descarta una sesión inactiva por más de 2 horas
+SESIONES_MAX = 200  # sesiones guardadas como máximo (se descartan las menos usadas)
+MENSAJES_MAX_POR_SESION = 40
+
+# Memoria de conversación del asistente: al pasar de MEMORIA_TOKENS_MAX tokens el historial
+# se resume con MODELO_RESUMEN, salvo los últimos MEMORIA_TURNOS_LITERALES turnos
+MEMORIA_TOKENS_MAX = 6000
+MEMORIA_TURNOS_LITERALES = 2
+MODELO_RESUMEN = "claude-haiku-4-5-20251001"
+TOKENS_RESUMEN = 600  # largo máximo del resumen
+CARACTERES_POR_TOKEN = 4  # para estimar tokens sin llamar a la API
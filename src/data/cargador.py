@@ -0,0 +1,166 @@
+"""
+Carga de datos del dashboard
+Une la fuente de datos configurada, el refresco en segundo plano y el snapshot en disco
+"""
+import streamlit as st
+import pandas as pd
+
+from ..config.settings import CACHE_TTL
+from ..config.coordenadas import resolver_coordenadas
+from .esquema import reporte_memoria
+from .fuentes import crear_fuente
+from .geometrias import LimitesMunicipales
+from .refresco import RefrescadorDatos
+from .snapshot import guardar_snapshot, cargar_snapshot
+from ..utils.cubo import CuboMunicipioSemana
+
+# Máximo de segundos que una página espera la primera carga cuando no hay snapshot
+ESPERA_PRIMERA_CARGA = 120
+
+
+def _cargar_desde_fuente(fuente):
+    """
+    Carga desde la fuente y, si hubo cambios, guarda el snapshot en disco.
+
+    Returns:
+        tuple: (pd.DataFrame, bool hubo_cambios)
+    """
+    df = fuente.cargar()
+
+    if fuente.hubo_cambios:
+        guardar_snapshot(df, fuente.estado_sincronizacion())
+        fuente.reporte_memoria = reporte_memoria(df)
+        fuente.municipios_sin_coordenadas = resolver_coordenadas(df['Municipio_Yucatan'])[2]
+        fuente.filas_sin_fecha = int(df['Fecha_Reporte'].isna().sum())
+
+    return df, fuente.hubo_cambios
+
+
+def _precalcular_derivados(fuente, anterior, nuevo):
+    """
+    Construye el cubo municipio × semana de una versión nueva antes de publicarla.
+    Si la versión anterior ya tenía cubo, solo se recalculan las celdas de las
+    filas que cambiaron.
+    """
+    cubo_anterior = anterior.derivado_calculado('cubo') if anterior is not None else None
+    if cubo_anterior is not None and fuente.filas_sin_cambios > 0:
+        nuevo.derivado('cubo', lambda df: cubo_anterior.actualizar(df, fuente.filas_sin_cambios))
+    else:
+        nuevo.derivado('cubo', CuboMunicipioSemana)
+
+
+@st.cache_resource
+def _obtener_fuente():
+    """
+    Crea (una sola vez por proceso) la fuente configurada en FUENTE_DATOS.
+
+    Returns:
+        FuenteDatos: Fuente compartida por todas las sesiones
+    """
+    return crear_fuente()
+
+
+@st.cache_resource
+def _obtener_refrescador():
+    """
+    Crea (una sola vez por proceso) el hilo que mantiene actualizada la
+    fuente de datos. Si hay un snapshot en disco se sirve de inmediato
+    (memory-map) y la sincronización continúa desde él.
+
+    Returns:
+        RefrescadorDatos: Refrescador compartido por todas las sesiones
+    """
+    fuente = _obtener_fuente()
+
+    df_snapshot, meta = cargar_snapshot()
+    guardado = None
+    if df_snapshot is not None:
+        guardado = pd.Timestamp(meta['guardado']).to_pydatetime()
+        if meta.get('estado_sincronizacion'):
+            fuente.reanudar_desde(df_snapshot, meta['estado_sincronizacion'])
+
+    refrescador = RefrescadorDatos(
+        lambda: _cargar_desde_fuente(fuente),
+        df_inicial=df_snapshot,
+        cargado_en_inicial=guardado,
+        al_publicar=lambda anterior, nuevo: _precalcular_derivados(fuente, anterior, nuevo)
+    )
+    return refrescador.iniciar()
+
+
+@st.cache_resource
+def obtener_limites_municipales():
+    """
+    Lee (una sola vez por proceso) los límites municipales y precalcula sus
+    niveles de simplificación.
+
+    Returns:
+        LimitesMunicipales: Límites, o None si no existe RUTA_LIMITES_MUNICIPALES
+    """
+    limites = LimitesMunicipales.desde_archivo()
+    return limites.precalcular() if limites is not None else None
+
+
+def obtener_datos():
+    """
+    Retorna la versión vigente de los datos sin esperar a la red.
+    Solo el primer arranque sin snapshot en disco espera la primera carga.
+
+    Returns:
+        DatosVersionados: Datos con su versión, o None si no se pudieron cargar
+    """
+    refrescador = _obtener_refrescador()
+    datos = refrescador.actual()
+    if datos is None:
+        datos = refrescador.esperar_datos(timeout=ESPERA_PRIMERA_CARGA)
+
+    estado = refrescador.estado()
+    if datos is None:
+        st.error(f"❌ Error al cargar los datos: {estado['ultimo_error']}")
+        return None
+
+    sin_exito_reciente = estado['antiguedad_segundos'] is None or estado['antiguedad_segundos'] > 2 * CACHE_TTL
+    if estado['ultimo_error'] and sin_exito_reciente:
+        if datos.cargado_en is not None:
+            st.warning(f"⚠️ No se pudo cargar la fuente de datos. Mostrando los últimos datos guardados ({datos.cargado_en.strftime('%d/%m/%Y %H:%M')}).")
+        else:
+            st.warning("⚠️ No se pudo cargar la fuente de datos. Mostrando los últimos datos guardados.")
+
+    return datos
+
+
+def cargar_datos():
+    """
+    Carga los datos desde la fuente configurada (FUENTE_DATOS en settings).
+    Un hilo en segundo plano los recarga cada REFRESCO_INTERVALO segundos;
+    con Google Sheets solo se descargan las filas nuevas o recientes.
+    Si la fuente no responde, se siguen mostrando los últimos datos buenos.
+
+    Returns:
+        pd.DataFrame: DataFrame con los datos del gusano barrenador
+    """
+    datos = obtener_datos()
+    return datos.df if datos is not None else pd.DataFrame()
+
+
+def refrescar_datos():
+    """Fuerza una recarga inmediata y espera a que termine"""
+    _obtener_refrescador().refrescar_ahora(esperar=True)
+
+
+def estado_refresco():
+    """
+    Métricas de frescura de los datos (ver RefrescadorDatos.estado).
+
+    Returns:
+        dict: Versión, último éxito, antigüedad, duración del último refresco, etc.,
+        más 'memoria' con el ahorro del esquema de ingesta (ver esquema.reporte_memoria)
+        'sin_coordenadas' con los municipios que no están en COORDENADAS_MUNICIPIOS
+        y 'filas_sin_fecha' con las filas cuya fecha está vacía o no se pudo leer
+    """
+    fuente = _obtener_fuente()
+    estado = _obtener_refrescador().estado()
+    estado['memoria'] = fuente.reporte_memoria
+    estado['sin_coordenadas'] = fuente.municipios_sin_coordenadas
+    estado['filas_sin_fecha'] = fuente.filas_sin_fecha
+    return estado
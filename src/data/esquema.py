@@ -0,0 +1,142 @@
+"""
+Esquema de ingesta del DataFrame de casos
+Todas las fuentes de datos pasan por aquí para entregar el mismo DataFrame,
+con tipos compactos: municipios como categorías, casos como int32 y la
+fecha leída con un formato fijo (sin inferencia). Las coordenadas de
+cada municipio se resuelven aquí, una sola vez por carga.
+"""
+import logging
+
+import pandas as pd
+
+from ..config.coordenadas import resolver_coordenadas
+from ..config.settings import FORMATO_FECHA_REPORTE
+
+logger = logging.getLogger(__name__)
+
+# Tipo de cada columna conocida
+ESQUEMA_CASOS = {
+    'Fecha_Reporte': 'datetime64[ns]',
+    'Municipio_Yucatan': 'category',
+    'Casos_Acumulados': 'int32',
+    'Casos_Semanales': 'int32',
+    'lat': 'float32',
+    'lon': 'float32'
+}
+
+# Tipos que produce get_all_records() sin esquema (para medir el ahorro)
+_TIPOS_SIN_ESQUEMA = {
+    'Fecha_Reporte': 'datetime64[ns]',
+    'Municipio_Yucatan': object,
+    'Casos_Acumulados': 'int64',
+    'Casos_Semanales': 'int64'
+}
+
+
+def _parsear_fechas(serie):
+    """
+    Convierte la columna de fechas usando FORMATO_FECHA_REPORTE.
+    Solo las fechas que no cumplen el formato se interpretan por inferencia;
+    las que tampoco así se entienden quedan como NaT (una celda mal escrita no
+    detiene la carga) y se registran en el log.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.astype('datetime64[ns]')
+
+    fechas = pd.to_datetime(serie, format=FORMATO_FECHA_REPORTE, errors='coerce')
+    fuera_de_formato = fechas.isna() & serie.notna() & (serie.astype(str) != '')
+    if fuera_de_formato.any():
+        inferidas = pd.to_datetime(serie[fuera_de_formato], errors='coerce')
+        fechas[fuera_de_formato] = inferidas
+        invalidas = serie[fuera_de_formato][inferidas.isna()]
+        if len(invalidas):
+            logger.warning(
+                "%d fechas no se pudieron interpretar y quedan vacías (p. ej. %r)",
+                len(invalidas), invalidas.astype(str).iloc[:3].tolist()
+            )
+
+    return fechas.astype('datetime64[ns]')
+
+
+def aplicar_esquema(df):
+    """
+    Deja el DataFrame con los tipos de ESQUEMA_CASOS sin importar de dónde vino.
+
+    Args:
+        df (pd.DataFrame): Datos tal como los entregó la fuente
+
+    Returns:
+        pd.DataFrame: DataFrame tipado con las columnas 'lat' y 'lon' (float32)
+        calculadas del municipio; las columnas fuera del esquema no cambian
+    """
+    df = df.copy()
+
+    if 'Fecha_Reporte' in df.columns:
+        df['Fecha_Reporte'] = _parsear_fechas(df['Fecha_Reporte'])
+
+    if 'Municipio_Yucatan' in df.columns and not isinstance(df['Municipio_Yucatan'].dtype, pd.CategoricalDtype):
+        df['Municipio_Yucatan'] = df['Municipio_Yucatan'].astype(str).astype('category')
+
+    if 'Municipio_Yucatan' in df.columns:
+        df['lat'], df['lon'], _ = resolver_coordenadas(df['Municipio_Yucatan'])
+
+    for columna in ['Casos_Acumulados', 'Casos_Semanales']:
+        if columna in df.columns:
+            df[columna] = pd.to_numeric(df[columna], errors='coerce').fillna(0).astype('int32')
+
+    return df
+
+
+def concatenar(partes):
+    """
+    Une DataFrames con el esquema aplicado sin perder las categorías
+    (pd.concat convierte a object si las categorías no coinciden).
+
+    Args:
+        partes (list): DataFrames a unir
+
+    Returns:
+        pd.DataFrame: DataFrame unido con índice nuevo
+    """
+    partes = [parte for parte in partes if len(parte.columns) > 0]
+    columnas_categoricas = [
+        columna for columna in partes[0].columns
+        if isinstance(partes[0][columna].dtype, pd.CategoricalDtype)
+    ]
+
+    for columna in columnas_categoricas:
+        categorias = pd.api.types.union_categoricals(
+            [parte[columna] for parte in partes if columna in parte.columns],
+            ignore_order=True
+        ).categories
+        partes = [
+            parte.assign(**{columna: parte[columna].cat.set_categories(categorias)})
+            for parte in partes
+        ]
+
+    return pd.concat(partes, ignore_index=True)
+
+
+def reporte_memoria(df):
+    """
+    Compara la memoria del DataFrame tipado contra la que ocuparía con los
+    tipos que entrega get_all_records() (texto como objetos Python, int64).
+
+    Args:
+        df (pd.DataFrame): DataFrame con el esquema aplicado
+
+    Returns:
+        dict: bytes_sin_esquema, bytes_con_esquema, bytes_ahorrados y porcentaje_ahorro
+    """
+    tipos = {columna: tipo for columna, tipo in _TIPOS_SIN_ESQUEMA.items() if columna in df.columns}
+
+    con_esquema = int(df.memory_usage(deep=True, index=False).sum())
+    sin_esquema = int(df.astype(tipos).memory_usage(deep=True, index=False).sum())
+    ahorro = sin_esquema - con_esquema
+
+    return {
+        'bytes_sin_esquema': sin_esquema,
+        'bytes_con_esquema': con_esquema,
+        'bytes_ahorrados': ahorro,
+        'porcentaje_ahorro': (ahorro / sin_esquema * 100) if sin_esquema else 0.0
+    }
@@ -0,0 +1,247 @@
+"""
+Fuentes de datos intercambiables (Google Sheets, CSV, SQLite, Parquet)
+Todas devuelven el mismo DataFrame tipado, así el dashboard puede leer de
+una réplica local más rápida o correr sin conexión.
+"""
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+from ..config.settings import (
+    FORMATO_FECHA_REPORTE,
+    FUENTE_DATOS,
+    RUTA_FUENTE_DATOS,
+    SQLITE_TABLA,
+    SYNC_INCREMENTAL
+)
+from .esquema import aplicar_esquema
+from .sincronizacion import SincronizadorIncremental, EstadoSincronizacion, HojaGoogleSheets
+
+
+class FuenteDatos:
+    """
+    Interfaz común de las fuentes de datos.
+    Cada fuente implementa `cargar()`; después de cada carga `hubo_cambios`
+    indica si los datos son distintos a los de la carga anterior y
+    `filas_sin_cambios` cuántas filas iniciales quedaron idénticas (para
+    actualizar de forma incremental las estructuras derivadas).
+    """
+
+    nombre = "base"
+
+    def __init__(self):
+        self.hubo_cambios = True
+        self.filas_sin_cambios = 0
+        self.reporte_memoria = None  # Ver esquema.reporte_memoria(); lo actualiza el cargador
+        self.municipios_sin_coordenadas = []  # Municipios ubicados en COORDENADAS_DEFECTO
+        self.filas_sin_fecha = 0  # Filas con Fecha_Reporte vacía o ilegible (NaT)
+
+    def cargar(self):
+        """
+        Returns:
+            pd.DataFrame: Datos con los tipos de ESQUEMA_CASOS
+        """
+        raise NotImplementedError
+
+    def estado_sincronizacion(self):
+        """Estado para reanudar la sincronización desde un snapshot (None si no aplica)"""
+        return None
+
+    def reanudar_desde(self, df, estado):
+        """Continúa desde datos ya ingeridos (solo aplica a fuentes incrementales)"""
+
+
+class FuenteGoogleSheets(FuenteDatos):
+    """Hoja de Google Sheets con sincronización incremental"""
+
+    nombre = "sheets"
+
+    def __init__(self, hoja=None):
+        """
+        Args:
+            hoja: Adaptador de hoja (HojaGoogleSheets o HojaLocal). Si no se da,
+                se conecta a la hoja configurada en settings al primer uso
+        """
+        super().__init__()
+        self._hoja = hoja
+        self._pendiente = None
+        self.sincronizador = None
+
+    def _obtener_sincronizador(self):
+        if self.sincronizador is None:
+            if self._hoja is None:
+                # Importación diferida: credenciales de Streamlit solo si se usa Sheets
+                from .google_sheets import conectar_hoja
+                self._hoja = HojaGoogleSheets(conectar_hoja())
+
+            self.sincronizador = SincronizadorIncremental(self._hoja)
+            if self._pendiente is not None:
+                self.sincronizador.cargar_estado(*self._pendiente)
+        return self.sincronizador
+
+    def cargar(self):
+        sincronizador = self._obtener_sincronizador()
+        df = sincronizador.sincronizar(forzar_completa=not SYNC_INCREMENTAL)
+        self.hubo_cambios = sincronizador.ultima_sincronizacion.get('modo') != 'sin_cambios'
+        self.filas_sin_cambios = sincronizador.ultima_sincronizacion.get('filas_sin_cambios', 0)
+        return df
+
+    def estado_sincronizacion(self):
+        if self.sincronizador is None:
+            return None
+        return self.sincronizador.estado
+
+    def reanudar_desde(self, df, estado):
+        estado = EstadoSincronizacion.desde_dict(estado)
+        if self.sincronizador is None:
+            self._pendiente = (df, estado)
+        else:
+            self.sincronizador.cargar_estado(df, estado)
+
+
+class _FuenteArchivo(FuenteDatos):
+    """Base para fuentes en un archivo local; solo relee si el archivo cambió"""
+
+    def __init__(self, ruta):
+        """
+        Args:
+            ruta (str): Ruta del archivo
+        """
+        super().__init__()
+        self.ruta = ruta
+        self._df = None
+        self._marca = None
+
+    def _marca_archivo(self):
+        return os.path.getmtime(self.ruta), os.path.getsize(self.ruta)
+
+    def _leer(self):
+        raise NotImplementedError
+
+    def cargar(self):
+        marca = self._marca_archivo()
+        if self._df is not None and marca == self._marca:
+            self.hubo_cambios = False
+            self.filas_sin_cambios = len(self._df)
+            return self._df
+
+        self._df = aplicar_esquema(self._leer())
+        self._marca = marca
+        self.hubo_cambios = True
+        self.filas_sin_cambios = 0
+        return self._df
+
+
+class FuenteCSV(_FuenteArchivo):
+    """Archivo CSV con las mismas columnas que la hoja"""
+
+    nombre = "csv"
+
+    def _leer(self):
+        return pd.read_csv(self.ruta)
+
+
+class FuenteSQLite(_FuenteArchivo):
+    """Tabla de una base SQLite con las mismas columnas que la hoja"""
+
+    nombre = "sqlite"
+
+    def __init__(self, ruta, tabla=SQLITE_TABLA):
+        """
+        Args:
+            ruta (str): Ruta de la base de datos
+            tabla (str): Tabla con los casos
+        """
+        super().__init__(ruta)
+        self.tabla = tabla
+
+    def _marca_archivo(self):
+        # En modo WAL las escrituras recientes están en el archivo -wal
+        marca = super()._marca_archivo()
+        ruta_wal = self.ruta + "-wal"
+        if os.path.exists(ruta_wal):
+            marca += (os.path.getmtime(ruta_wal), os.path.getsize(ruta_wal))
+        return marca
+
+    def _leer(self):
+        with closing(sqlite3.connect(f"file:{self.ruta}?mode=ro", uri=True)) as conexion:
+            return pd.read_sql_query(f'SELECT * FROM "{self.tabla}"', conexion)
+
+
+class FuenteParquet(_FuenteArchivo):
+    """Archivo Parquet con las mismas columnas que la hoja (requiere pyarrow)"""
+
+    nombre = "parquet"
+
+    def _leer(self):
+        return pd.read_parquet(self.ruta)
+
+
+FUENTES = {
+    FuenteGoogleSheets.nombre: FuenteGoogleSheets,
+    FuenteCSV.nombre: FuenteCSV,
+    FuenteSQLite.nombre: FuenteSQLite,
+    FuenteParquet.nombre: FuenteParquet
+}
+
+
+def crear_fuente(tipo=FUENTE_DATOS, ruta=RUTA_FUENTE_DATOS):
+    """
+    Crea la fuente de datos configurada.
+
+    Args:
+        tipo (str): 'sheets', 'csv', 'sqlite' o 'parquet'
+        ruta (str): Archivo para las fuentes locales
+
+    Returns:
+        FuenteDatos: Fuente lista para usar
+    """
+    if tipo not in FUENTES:
+        raise ValueError(f"Fuente de datos no reconocida: {tipo!r}. Opciones: {', '.join(FUENTES)}")
+
+    if tipo == FuenteGoogleSheets.nombre:
+        return FuenteGoogleSheets()
+    return FUENTES[tipo](ruta)
+
+
+def escribir_replica(df, ruta, tipo=None):
+    """
+    Escribe una réplica local de los datos (para un job de sincronización).
+    Se escribe a un archivo temporal y luego se reemplaza, para que los
+    lectores nunca vean un archivo a medias.
+
+    Args:
+        df (pd.DataFrame): Datos a escribir
+        ruta (str): Archivo destino
+        tipo (str): 'csv', 'sqlite' o 'parquet' (por defecto, según la extensión)
+    """
+    if tipo is None:
+        extension = os.path.splitext(ruta)[1].lower()
+        tipo = {'.csv': 'csv', '.parquet': 'parquet'}.get(extension, 'sqlite')
+
+    df = aplicar_esquema(df)
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    ruta_tmp = ruta + ".tmp"
+
+    if tipo in ('csv', 'sqlite') and 'Fecha_Reporte' in df.columns:
+        # Fechas en el mismo formato que se parsea al leer (sin hora), así la
+        # lectura no cae en la inferencia lenta fecha por fecha
+        df = df.assign(Fecha_Reporte=df['Fecha_Reporte'].dt.strftime(FORMATO_FECHA_REPORTE))
+
+    if tipo == 'csv':
+        df.to_csv(ruta_tmp, index=False)
+    elif tipo == 'parquet':
+        df.to_parquet(ruta_tmp, index=False)
+    elif tipo == 'sqlite':
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+        with closing(sqlite3.connect(ruta_tmp)) as conexion:
+            df.to_sql(SQLITE_TABLA, conexion, index=False)
+    else:
+        raise ValueError(f"Tipo de réplica no reconocido: {tipo!r}")
+
+    os.replace(ruta_tmp, ruta)
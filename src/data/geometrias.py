@@ -0,0 +1,193 @@
+"""
+Límites municipales para el mapa de coropletas
+El archivo GeoJSON local se lee una sola vez; cada polígono se simplifica
+(Douglas-Peucker) en varios niveles de tolerancia que se calculan una vez
+y se guardan. El mapa pide el nivel según el zoom con que se va a mostrar,
+así el GeoJSON enviado al navegador es chico aunque el mapa cubra más estados.
+"""
+import json
+import math
+import os
+import threading
+
+import numpy as np
+
+from ..config.coordenadas import normalizar_municipio
+from ..config.settings import PROPIEDAD_NOMBRE_MUNICIPIO, RUTA_LIMITES_MUNICIPALES
+
+# Tolerancia de simplificación (grados) por zoom mínimo del mapa: a más zoom, más detalle
+NIVELES_SIMPLIFICACION = [
+    (0, 0.02),    # Región (varios estados)
+    (6.5, 0.005), # Un estado
+    (9, 0.001)    # Acercamiento a unos cuantos municipios
+]
+
+# Decimales de las coordenadas enviadas (4 decimales ≈ 11 m)
+DECIMALES_COORDENADAS = 4
+
+
+def _simplificar_linea(puntos, tolerancia):
+    """
+    Douglas-Peucker sobre una línea (arreglo n×2), sin recursión.
+
+    Returns:
+        np.ndarray: Puntos conservados
+    """
+    n = len(puntos)
+    if n < 3:
+        return puntos
+
+    conservar = np.zeros(n, dtype=bool)
+    conservar[0] = conservar[-1] = True
+    pendientes = [(0, n - 1)]
+    while pendientes:
+        inicio, fin = pendientes.pop()
+        if fin - inicio < 2:
+            continue
+        a, b = puntos[inicio], puntos[fin]
+        tramo = puntos[inicio + 1:fin]
+        dx, dy = b - a
+        largo = math.hypot(dx, dy)
+        if largo == 0:
+            distancias = np.hypot(tramo[:, 0] - a[0], tramo[:, 1] - a[1])
+        else:
+            distancias = np.abs(dx * (a[1] - tramo[:, 1]) - dy * (a[0] - tramo[:, 0])) / largo
+        k = int(np.argmax(distancias))
+        if distancias[k] > tolerancia:
+            medio = inicio + 1 + k
+            conservar[medio] = True
+            pendientes.append((inicio, medio))
+            pendientes.append((medio, fin))
+    return puntos[conservar]
+
+
+def _simplificar_anillo(anillo, tolerancia):
+    """Simplifica un anillo cerrado; si colapsa, conserva el original"""
+    puntos = np.asarray(anillo, dtype=np.float64)[:, :2]
+    simplificado = _simplificar_linea(puntos, tolerancia)
+    if len(simplificado) < 4:
+        simplificado = puntos
+    return np.round(simplificado, DECIMALES_COORDENADAS).tolist()
+
+
+def _simplificar_geometria(geometria, tolerancia):
+    if geometria['type'] == 'Polygon':
+        poligonos = [geometria['coordinates']]
+    elif geometria['type'] == 'MultiPolygon':
+        poligonos = geometria['coordinates']
+    else:
+        return geometria
+
+    simplificados = [
+        [_simplificar_anillo(anillo, tolerancia) for anillo in poligono]
+        for poligono in poligonos
+    ]
+    if geometria['type'] == 'Polygon':
+        return {'type': 'Polygon', 'coordinates': simplificados[0]}
+    return {'type': 'MultiPolygon', 'coordinates': simplificados}
+
+
+def _limites_geometria(geometria):
+    """(lon_min, lat_min, lon_max, lat_max) de un Polygon o MultiPolygon"""
+    poligonos = [geometria['coordinates']] if geometria['type'] == 'Polygon' else geometria['coordinates']
+    puntos = np.concatenate([np.asarray(poligono[0], dtype=np.float64)[:, :2] for poligono in poligonos])
+    return (*puntos.min(axis=0), *puntos.max(axis=0))
+
+
+class LimitesMunicipales:
+    """Polígonos municipales con versiones simplificadas por nivel de zoom"""
+
+    def __init__(self, geojson, propiedad_nombre=PROPIEDAD_NOMBRE_MUNICIPIO):
+        """
+        Args:
+            geojson (dict): FeatureCollection con un polígono por municipio
+            propiedad_nombre (str): Propiedad de cada feature con el nombre del municipio
+        """
+        self.geometrias = {}
+        self.limites = {}
+        for feature in geojson.get('features', []):
+            geometria = feature.get('geometry')
+            if not geometria or geometria.get('type') not in ('Polygon', 'MultiPolygon'):
+                continue
+            nombre = normalizar_municipio(feature.get('properties', {}).get(propiedad_nombre, ''))
+            self.geometrias[nombre] = geometria
+            self.limites[nombre] = _limites_geometria(geometria)
+
+        self._simplificadas = {}  # tolerancia -> {nombre: geometría}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def desde_archivo(cls, ruta=RUTA_LIMITES_MUNICIPALES, propiedad_nombre=PROPIEDAD_NOMBRE_MUNICIPIO):
+        """
+        Lee el archivo GeoJSON de límites municipales.
+
+        Returns:
+            LimitesMunicipales: Límites, o None si el archivo no existe
+        """
+        if not os.path.exists(ruta):
+            return None
+        with open(ruta, encoding='utf-8') as f:
+            return cls(json.load(f), propiedad_nombre)
+
+    def _nivel(self, tolerancia):
+        """Geometrías simplificadas con una tolerancia (se calculan una sola vez)"""
+        with self._lock:
+            if tolerancia not in self._simplificadas:
+                self._simplificadas[tolerancia] = {
+                    nombre: _simplificar_geometria(geometria, tolerancia)
+                    for nombre, geometria in self.geometrias.items()
+                }
+            return self._simplificadas[tolerancia]
+
+    def precalcular(self):
+        """Calcula todos los niveles de simplificación (p. ej. al arrancar)"""
+        for _, tolerancia in NIVELES_SIMPLIFICACION:
+            self._nivel(tolerancia)
+        return self
+
+    def vista(self, municipios):
+        """
+        Centro y zoom que encuadran los municipios dados.
+
+        Args:
+            municipios (list): Nombres (se normalizan)
+
+        Returns:
+            tuple: ({'lat', 'lon'} centro, zoom), o (None, None) si ninguno tiene polígono
+        """
+        cajas = [self.limites[n] for n in map(normalizar_municipio, municipios) if n in self.limites]
+        if not cajas:
+            return None, None
+        cajas = np.array(cajas)
+        lon_min, lat_min = cajas[:, 0].min(), cajas[:, 1].min()
+        lon_max, lat_max = cajas[:, 2].max(), cajas[:, 3].max()
+
+        extension = max(lon_max - lon_min, lat_max - lat_min, 0.05)
+        zoom = float(np.clip(math.log2(360 / extension) - 0.8, 3, 12))
+        return {'lat': float(lat_min + lat_max) / 2, 'lon': float(lon_min + lon_max) / 2}, zoom
+
+    def sin_poligono(self, municipios):
+        """Municipios de la lista que no tienen polígono en el archivo"""
+        return [m for m in municipios if normalizar_municipio(m) not in self.geometrias]
+
+    def geojson(self, municipios, zoom):
+        """
+        FeatureCollection solo con los municipios dados, simplificada según el zoom.
+
+        Args:
+            municipios (list): Nombres (se normalizan)
+            zoom (float): Zoom con que se mostrará el mapa
+
+        Returns:
+            dict: FeatureCollection; el 'id' de cada feature es el nombre normalizado
+        """
+        tolerancia = [t for zoom_minimo, t in NIVELES_SIMPLIFICACION if zoom >= zoom_minimo][-1]
+        nivel = self._nivel(tolerancia)
+        return {
+            'type': 'FeatureCollection',
+            'features': [
+                {'type': 'Feature', 'id': nombre, 'properties': {}, 'geometry': nivel[nombre]}
+                for nombre in dict.fromkeys(map(normalizar_municipio, municipios))
+                if nombre in nivel
+            ]
+        }
@@ -0,0 +1,99 @@
+"""
+Índice para filtrar los datos sin recorrer todas las filas
+Se construye una sola vez por versión de datos: las filas se ordenan por
+fecha (un rango de fechas es un corte con searchsorted) y se guardan las
+posiciones de cada municipio.
+"""
+import numpy as np
+import pandas as pd
+
+
+def limites_fechas(fecha_inicio, fecha_fin):
+    """
+    Convierte un rango de fechas inclusivo en [inicio, fin) como datetime64.
+
+    Args:
+        fecha_inicio (date): Primer día incluido
+        fecha_fin (date): Último día incluido
+
+    Returns:
+        tuple: (np.datetime64 inicio, np.datetime64 día siguiente a fecha_fin)
+    """
+    inicio = pd.Timestamp(fecha_inicio).normalize()
+    fin = pd.Timestamp(fecha_fin).normalize() + pd.Timedelta(days=1)
+    return inicio.to_datetime64().astype('datetime64[ns]'), fin.to_datetime64().astype('datetime64[ns]')
+
+
+class IndiceFiltros:
+    """Índice por fecha y municipio sobre un DataFrame de casos"""
+
+    def __init__(self, df):
+        """
+        Args:
+            df (pd.DataFrame): Datos con 'Fecha_Reporte' y 'Municipio_Yucatan'
+        """
+        fechas = df['Fecha_Reporte'].to_numpy(dtype='datetime64[ns]')
+        orden = np.argsort(fechas, kind='stable')
+
+        self.df = df.take(orden)
+        self.fechas = fechas[orden]
+
+        municipios = self.df['Municipio_Yucatan']
+        if isinstance(municipios.dtype, pd.CategoricalDtype):
+            codigos = municipios.cat.codes.to_numpy()
+            nombres = municipios.cat.categories
+        else:
+            codigos, nombres = pd.factorize(municipios)
+
+        # Posiciones (en el orden por fecha) agrupadas por municipio
+        orden_municipio = np.argsort(codigos, kind='stable')
+        limites = np.searchsorted(codigos[orden_municipio], np.arange(len(nombres) + 1))
+        self.posiciones = {
+            str(nombres[k]): orden_municipio[limites[k]:limites[k + 1]]
+            for k in range(len(nombres))
+            if limites[k + 1] > limites[k]
+        }
+
+    def rango(self, fecha_inicio, fecha_fin):
+        """
+        Posiciones [i, j) de las filas entre dos fechas (inclusivas).
+
+        Returns:
+            tuple: (i, j)
+        """
+        inicio, fin = limites_fechas(fecha_inicio, fecha_fin)
+        return (
+            int(np.searchsorted(self.fechas, inicio, side='left')),
+            int(np.searchsorted(self.fechas, fin, side='left'))
+        )
+
+    def filtrar(self, municipios, fecha_inicio, fecha_fin):
+        """
+        Filtra por municipio y rango de fechas.
+
+        Args:
+            municipios (list): Municipios seleccionados ('Todos' o vacío = sin filtro)
+            fecha_inicio (date): Fecha de inicio (inclusiva)
+            fecha_fin (date): Fecha fin (inclusiva)
+
+        Returns:
+            pd.DataFrame: Filas que cumplen el filtro, ordenadas por fecha
+            (un corte del DataFrame indexado, sin copia completa)
+        """
+        i, j = self.rango(fecha_inicio, fecha_fin)
+
+        if not municipios or 'Todos' in municipios:
+            return self.df.iloc[i:j]
+
+        partes = []
+        for municipio in dict.fromkeys(municipios):
+            posiciones = self.posiciones.get(municipio)
+            if posiciones is None:
+                continue
+            a, b = np.searchsorted(posiciones, [i, j])
+            partes.append(posiciones[a:b])
+
+        if not partes:
+            return self.df.iloc[0:0]
+
+        return self.df.take(np.sort(np.concatenate(partes)))
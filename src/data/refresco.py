@@ -0,0 +1,205 @@
+"""
+Refresco de datos en segundo plano (stale-while-revalidate)
+Un hilo recarga los datos antes de que venzan y los reemplaza de forma
+atómica con un número de versión; las recargas de la página siempre leen
+la versión actual sin esperar a la red.
+"""
+import threading
+import time
+from datetime import datetime
+
+from ..config.settings import REFRESCO_INTERVALO
+
+
+class DatosVersionados:
+    """
+    Datos cargados junto con su número de versión (no se modifica después de crearse).
+    Las estructuras derivadas (índices, agregados) se guardan aquí mismo, así se
+    calculan una sola vez por versión y se descartan junto con ella.
+    """
+
+    def __init__(self, df, version, cargado_en):
+        """
+        Args:
+            df (pd.DataFrame): Datos
+            version (int): Versión; cambia cada vez que los datos cambian
+            cargado_en (datetime): Momento en que se obtuvieron los datos
+        """
+        self.df = df
+        self.version = version
+        self.cargado_en = cargado_en
+        self._derivados = {}
+        self._lock = threading.Lock()
+
+    def derivado(self, nombre, constructor):
+        """
+        Retorna una estructura derivada de los datos, calculándola la primera vez.
+
+        Args:
+            nombre (str): Identificador de la estructura
+            constructor (callable): Función que recibe el DataFrame y construye la estructura
+
+        Returns:
+            Lo que retorne `constructor(self.df)`
+        """
+        with self._lock:
+            if nombre not in self._derivados:
+                self._derivados[nombre] = constructor(self.df)
+            return self._derivados[nombre]
+
+    def derivado_calculado(self, nombre):
+        """Retorna la estructura derivada si ya se calculó, o None (sin calcularla)"""
+        with self._lock:
+            return self._derivados.get(nombre)
+
+
+class RefrescadorDatos:
+    """Hilo que mantiene los datos actualizados"""
+
+    def __init__(self, cargar, intervalo=REFRESCO_INTERVALO, df_inicial=None, cargado_en_inicial=None,
+                 al_publicar=None):
+        """
+        Args:
+            cargar (callable): Función sin argumentos que retorna (df, hubo_cambios)
+            intervalo (float): Segundos entre recargas
+            df_inicial (pd.DataFrame): Datos para servir mientras termina la primera
+                carga (por ejemplo, el snapshot en disco)
+            cargado_en_inicial (datetime): Momento en que se obtuvieron los datos iniciales
+            al_publicar (callable): Función (anterior, nuevo) que se llama en el hilo de
+                refresco antes de publicar una versión, para precalcular sus derivados
+                (`anterior` es None en la primera versión)
+        """
+        self.cargar = cargar
+        self.intervalo = intervalo
+        self.al_publicar = al_publicar
+
+        self._actual = None
+        if df_inicial is not None:
+            self._actual = DatosVersionados(df_inicial, 0, cargado_en_inicial)
+
+        self._version = 0
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._carga_terminada = threading.Condition()
+        self._cargas_completadas = 0
+        self._cargando = False
+        self._hilo = None
+
+        # Métricas de refresco
+        self.ultimo_exito = None
+        self.ultima_duracion = None
+        self.ultimo_error = None
+        self.ultimo_intento = None
+
+    def iniciar(self):
+        """Arranca el hilo de refresco (la primera carga es inmediata)"""
+        if self._hilo is None:
+            self._hilo = threading.Thread(target=self._ciclo, name="refresco-datos", daemon=True)
+            self._hilo.start()
+        return self
+
+    def detener(self):
+        """Detiene el hilo de refresco"""
+        self._detener.set()
+        self._despertar.set()
+
+    def actual(self):
+        """
+        Retorna la versión vigente de los datos sin bloquear.
+
+        Returns:
+            DatosVersionados: Datos actuales, o None si aún no hay ninguna carga
+        """
+        return self._actual
+
+    def esperar_datos(self, timeout=None):
+        """
+        Espera a que haya datos disponibles (solo bloquea en un arranque sin snapshot).
+
+        Returns:
+            DatosVersionados: Datos actuales, o None si no llegaron a tiempo
+        """
+        with self._carga_terminada:
+            self._carga_terminada.wait_for(
+                lambda: self._actual is not None or self._cargas_completadas > 0,
+                timeout=timeout
+            )
+        return self._actual
+
+    def refrescar_ahora(self, esperar=True, timeout=60):
+        """
+        Pide una recarga inmediata.
+
+        Args:
+            esperar (bool): Esperar a que termine la recarga
+            timeout (float): Máximo de segundos a esperar
+        """
+        with self._carga_terminada:
+            # Si hay una carga en curso, empezó antes de la petición: esperar la siguiente
+            objetivo = self._cargas_completadas + (2 if self._cargando else 1)
+        self._despertar.set()
+        if esperar:
+            with self._carga_terminada:
+                self._carga_terminada.wait_for(
+                    lambda: self._cargas_completadas >= objetivo,
+                    timeout=timeout
+                )
+
+    def estado(self):
+        """
+        Métricas de frescura de los datos.
+
+        Returns:
+            dict: version, ultimo_exito, antiguedad_segundos, ultima_duracion_segundos,
+            ultimo_intento, ultimo_error y proximo_refresco_segundos
+        """
+        actual = self._actual
+        antiguedad = None
+        if self.ultimo_exito is not None:
+            antiguedad = (datetime.now() - self.ultimo_exito).total_seconds()
+
+        proximo = None
+        if self.ultimo_intento is not None:
+            proximo = max(0.0, self.intervalo - (datetime.now() - self.ultimo_intento).total_seconds())
+
+        return {
+            'version': actual.version if actual is not None else None,
+            'ultimo_exito': self.ultimo_exito,
+            'antiguedad_segundos': antiguedad,
+            'ultima_duracion_segundos': self.ultima_duracion,
+            'ultimo_intento': self.ultimo_intento,
+            'ultimo_error': self.ultimo_error,
+            'proximo_refresco_segundos': proximo
+        }
+
+    def _ciclo(self):
+        while not self._detener.is_set():
+            self._recargar()
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+
+    def _recargar(self):
+        """Una recarga: si los datos cambiaron, publica una versión nueva"""
+        inicio = time.perf_counter()
+        self.ultimo_intento = datetime.now()
+        with self._carga_terminada:
+            self._cargando = True
+        try:
+            df, hubo_cambios = self.cargar()
+            if hubo_cambios or self._actual is None:
+                self._version += 1
+                nuevo = DatosVersionados(df, self._version, datetime.now())
+                if self.al_publicar is not None:
+                    self.al_publicar(self._actual, nuevo)
+                # Una sola asignación: los lectores ven la versión anterior o la nueva
+                self._actual = nuevo
+            self.ultimo_exito = datetime.now()
+            self.ultimo_error = None
+        except Exception as e:
+            self.ultimo_error = str(e)
+        finally:
+            self.ultima_duracion = time.perf_counter() - inicio
+            with self._carga_terminada:
+                self._cargando = False
+                self._cargas_completadas += 1
+                self._carga_terminada.notify_all()
@@ -0,0 +1,262 @@
+"""
+Sincronización incremental de la hoja de casos
+En lugar de descargar toda la hoja en cada actualización, recuerda la última
+fila y revisión que se ingirieron y solo descarga las filas nuevas (más una
+ventana de filas recientes por si fueron corregidas).
+"""
+import threading
+
+import pandas as pd
+from gspread.utils import numericise_all, rowcol_to_a1
+
+from ..config.settings import SYNC_VENTANA_REVISION, SYNC_RECARGA_COMPLETA_CADA
+from .esquema import aplicar_esquema, concatenar
+
+
+class EstadoSincronizacion:
+    """Lo que se recuerda entre sincronizaciones"""
+
+    def __init__(self, ultima_fila=0, revision=None, encabezados=None):
+        """
+        Args:
+            ultima_fila (int): Número de filas de datos ya ingeridas (sin contar encabezados)
+            revision (str): Revisión de la hoja en la última sincronización
+            encabezados (list): Encabezados de la hoja en la última sincronización
+        """
+        self.ultima_fila = ultima_fila
+        self.revision = revision
+        self.encabezados = list(encabezados) if encabezados else []
+
+    def como_dict(self):
+        """Representación serializable del estado"""
+        return {
+            'ultima_fila': self.ultima_fila,
+            'revision': self.revision,
+            'encabezados': self.encabezados
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        """Reconstruye el estado a partir de como_dict()"""
+        return cls(
+            ultima_fila=datos.get('ultima_fila', 0),
+            revision=datos.get('revision'),
+            encabezados=datos.get('encabezados')
+        )
+
+
+class HojaGoogleSheets:
+    """Adaptador de una hoja de gspread para el sincronizador"""
+
+    def __init__(self, worksheet):
+        """
+        Args:
+            worksheet (gspread.Worksheet): Hoja de cálculo ya abierta
+        """
+        self.worksheet = worksheet
+        self._ultima_columna = None
+
+    def obtener_encabezados(self):
+        """Retorna la fila de encabezados"""
+        encabezados = self.worksheet.row_values(1)
+        self._ultima_columna = rowcol_to_a1(1, max(len(encabezados), 1)).rstrip('0123456789')
+        return encabezados
+
+    def obtener_filas(self, desde):
+        """
+        Descarga las filas de datos a partir de `desde` hasta el final de la hoja.
+
+        Args:
+            desde (int): Primera fila de datos a descargar (1 = primera fila bajo los encabezados)
+
+        Returns:
+            list: Lista de filas (listas de valores)
+        """
+        if self._ultima_columna is None:
+            self.obtener_encabezados()
+
+        # Rango abierto: la API solo devuelve filas con datos
+        filas = self.worksheet.get(f"A{desde + 1}:{self._ultima_columna}")
+        return [numericise_all(list(fila)) for fila in filas]
+
+    def obtener_revision(self):
+        """
+        Retorna la fecha de última modificación del archivo, o None si
+        no se puede consultar (en ese caso siempre se descarga el delta).
+        """
+        spreadsheet = self.worksheet.spreadsheet
+        try:
+            if hasattr(spreadsheet, 'get_lastUpdateTime'):
+                return spreadsheet.get_lastUpdateTime()
+            return spreadsheet.lastUpdateTime
+        except Exception:
+            return None
+
+
+class HojaLocal:
+    """
+    Hoja en memoria con la misma interfaz que HojaGoogleSheets.
+    Sirve para probar la lógica de sincronización sin conexión.
+    """
+
+    def __init__(self, encabezados, filas=None):
+        """
+        Args:
+            encabezados (list): Nombres de las columnas
+            filas (list): Filas iniciales (listas de valores)
+        """
+        self.encabezados = list(encabezados)
+        self.filas = [list(fila) for fila in (filas or [])]
+        self.revision = 0
+        self.lecturas = []  # Filas solicitadas en cada descarga: (desde, cantidad)
+
+    @classmethod
+    def desde_dataframe(cls, df):
+        """Crea una hoja local con el contenido de un DataFrame"""
+        return cls(df.columns.tolist(), df.astype(object).values.tolist())
+
+    def agregar_filas(self, filas):
+        """Agrega filas al final (como un nuevo reporte semanal)"""
+        self.filas.extend(list(fila) for fila in filas)
+        self.revision += 1
+
+    def actualizar_fila(self, numero, valores):
+        """
+        Reemplaza una fila existente.
+
+        Args:
+            numero (int): Fila de datos a reemplazar (1 = primera fila bajo los encabezados)
+            valores (list): Nuevos valores
+        """
+        self.filas[numero - 1] = list(valores)
+        self.revision += 1
+
+    def obtener_encabezados(self):
+        return list(self.encabezados)
+
+    def obtener_filas(self, desde):
+        filas = [list(fila) for fila in self.filas[desde - 1:]]
+        self.lecturas.append((desde, len(filas)))
+        return filas
+
+    def obtener_revision(self):
+        return str(self.revision)
+
+
+def construir_dataframe(encabezados, filas):
+    """
+    Convierte filas crudas de la hoja en un DataFrame con los tipos del dashboard.
+
+    Args:
+        encabezados (list): Nombres de las columnas
+        filas (list): Filas de valores
+
+    Returns:
+        pd.DataFrame: DataFrame con los tipos de ESQUEMA_CASOS
+    """
+    ancho = len(encabezados)
+    # La API recorta las celdas vacías al final de cada fila
+    filas = [list(fila[:ancho]) + [''] * (ancho - len(fila)) for fila in filas]
+    return aplicar_esquema(pd.DataFrame(filas, columns=encabezados))
+
+
+class SincronizadorIncremental:
+    """
+    Mantiene en memoria el DataFrame de la hoja y lo actualiza
+    descargando solo las filas que cambiaron.
+    """
+
+    def __init__(
+        self,
+        hoja,
+        ventana_revision=SYNC_VENTANA_REVISION,
+        recarga_completa_cada=SYNC_RECARGA_COMPLETA_CADA
+    ):
+        """
+        Args:
+            hoja: HojaGoogleSheets, HojaLocal o cualquier objeto con la misma interfaz
+            ventana_revision (int): Filas ya ingeridas que se vuelven a descargar en cada
+                delta, para detectar correcciones recientes
+            recarga_completa_cada (int): Cada cuántas sincronizaciones incrementales se hace
+                una recarga completa (para detectar ediciones antiguas). 0 = nunca
+        """
+        self.hoja = hoja
+        self.ventana_revision = ventana_revision
+        self.recarga_completa_cada = recarga_completa_cada
+
+        self.df = None
+        self.estado = EstadoSincronizacion()
+        self.ultima_sincronizacion = {}
+        self._incrementales_seguidas = 0
+        self._lock = threading.Lock()
+
+    def cargar_estado(self, df, estado):
+        """
+        Inicializa el sincronizador con datos ya ingeridos (por ejemplo, de disco).
+
+        Args:
+            df (pd.DataFrame): DataFrame correspondiente al estado
+            estado (EstadoSincronizacion): Estado con el que se obtuvo el DataFrame
+        """
+        with self._lock:
+            self.df = df
+            self.estado = estado
+
+    def sincronizar(self, forzar_completa=False):
+        """
+        Trae los cambios de la hoja y los integra al DataFrame en memoria.
+
+        Args:
+            forzar_completa (bool): Ignorar el estado y descargar toda la hoja
+
+        Returns:
+            pd.DataFrame: DataFrame actualizado
+        """
+        with self._lock:
+            revision = self.hoja.obtener_revision()
+
+            if (not forzar_completa and self.df is not None
+                    and revision is not None and revision == self.estado.revision):
+                self.ultima_sincronizacion = {
+                    'modo': 'sin_cambios', 'filas_descargadas': 0, 'filas_sin_cambios': len(self.df)
+                }
+                return self.df
+
+            encabezados = self.hoja.obtener_encabezados()
+
+            toca_recarga = (
+                self.recarga_completa_cada > 0
+                and self._incrementales_seguidas >= self.recarga_completa_cada
+            )
+            if (forzar_completa or toca_recarga or self.df is None
+                    or encabezados != self.estado.encabezados):
+                return self._recarga_completa(encabezados, revision)
+
+            return self._sincronizacion_incremental(encabezados, revision)
+
+    def _recarga_completa(self, encabezados, revision):
+        """Descarga toda la hoja"""
+        filas = self.hoja.obtener_filas(1)
+        self.df = construir_dataframe(encabezados, filas)
+        self.estado = EstadoSincronizacion(len(filas), revision, encabezados)
+        self._incrementales_seguidas = 0
+        self.ultima_sincronizacion = {'modo': 'completa', 'filas_descargadas': len(filas), 'filas_sin_cambios': 0}
+        return self.df
+
+    def _sincronizacion_incremental(self, encabezados, revision):
+        """Descarga las filas nuevas más la ventana de filas recientes"""
+        desde = max(1, self.estado.ultima_fila - self.ventana_revision + 1)
+        filas = self.hoja.obtener_filas(desde)
+
+        # Si la hoja tiene menos filas que antes, se borraron datos: recargar todo
+        if desde - 1 + len(filas) < self.estado.ultima_fila:
+            return self._recarga_completa(encabezados, revision)
+
+        df_delta = construir_dataframe(encabezados, filas)
+        self.df = concatenar([self.df.iloc[:desde - 1], df_delta])
+        self.estado = EstadoSincronizacion(desde - 1 + len(filas), revision, encabezados)
+        self._incrementales_seguidas += 1
+        self.ultima_sincronizacion = {
+            'modo': 'incremental', 'filas_descargadas': len(filas), 'filas_sin_cambios': desde - 1
+        }
+        return self.df
@@ -0,0 +1,151 @@
+"""
+Generador de datos sintéticos de brotes
+Produce DataFrames con las mismas columnas que la hoja de Google Sheets
+para medir el dashboard con más filas, más municipios y más años de los
+que hay hoy. Con la misma semilla siempre genera los mismos datos.
+"""
+import numpy as np
+import pandas as pd
+
+from ..config.coordenadas import COORDENADAS_MUNICIPIOS
+from ..config.settings import FORMATO_FECHA_REPORTE, PROPIEDAD_NOMBRE_MUNICIPIO, TOTAL_MUNICIPIOS_YUCATAN
+from .esquema import aplicar_esquema
+
+# Municipios de todo México (escenario nacional)
+TOTAL_MUNICIPIOS_MEXICO = 2469
+
+FECHA_INICIO_SINTETICA = '2023-01-02'  # Lunes
+
+# Recuadro (lat, lon) de México donde se reparten los municipios sintéticos
+LATITUD_MEXICO = (14.5, 32.7)
+LONGITUD_MEXICO = (-117.1, -86.7)
+
+
+def nombres_municipios(cantidad):
+    """
+    Nombres de municipio: primero los que tienen coordenadas en
+    COORDENADAS_MUNICIPIOS y después nombres sintéticos numerados.
+
+    Args:
+        cantidad (int): Número de municipios
+
+    Returns:
+        list: Nombres de municipio
+    """
+    reales = list(COORDENADAS_MUNICIPIOS.keys())[:cantidad]
+    return reales + [f'MUNICIPIO_{i:04d}' for i in range(len(reales), cantidad)]
+
+
+def coordenadas_sinteticas(cantidad, semilla=0):
+    """
+    Coordenadas de los municipios de nombres_municipios(cantidad): los reales
+    con las de COORDENADAS_MUNICIPIOS y los sintéticos repartidos al azar en
+    el recuadro de México. Sin ellas, todos los sintéticos caerían en
+    COORDENADAS_DEFECTO y cada uno sería vecino de todos los demás.
+
+    Args:
+        cantidad (int): Número de municipios
+        semilla (int): Semilla del generador aleatorio
+
+    Returns:
+        dict: Nombre -> (lat, lon), en el orden de nombres_municipios()
+    """
+    rng = np.random.default_rng(semilla)
+    nombres = nombres_municipios(cantidad)
+    lat = rng.uniform(*LATITUD_MEXICO, cantidad)
+    lon = rng.uniform(*LONGITUD_MEXICO, cantidad)
+    return {
+        nombre: COORDENADAS_MUNICIPIOS.get(nombre, (float(lat[i]), float(lon[i])))
+        for i, nombre in enumerate(nombres)
+    }
+
+
+def limites_sinteticos(cantidad, vertices=200, semilla=0):
+    """
+    Límites municipales sintéticos (GeoJSON) para medir el mapa de coropletas:
+    un polígono irregular de `vertices` puntos alrededor de cada coordenada de
+    coordenadas_sinteticas(), con tantos vértices como un límite real detallado.
+
+    Args:
+        cantidad (int): Número de municipios
+        vertices (int): Vértices por polígono
+        semilla (int): Semilla del generador aleatorio
+
+    Returns:
+        dict: FeatureCollection con el nombre en PROPIEDAD_NOMBRE_MUNICIPIO
+    """
+    rng = np.random.default_rng(semilla)
+    angulo = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    features = []
+    for nombre, (lat, lon) in coordenadas_sinteticas(cantidad, semilla).items():
+        radio = rng.uniform(0.05, 0.15) * (1 + 0.15 * rng.standard_normal(vertices)).clip(0.5, 1.5)
+        anillo = np.column_stack([lon + radio * np.cos(angulo), lat + radio * np.sin(angulo)])
+        features.append({
+            'type': 'Feature',
+            'properties': {PROPIEDAD_NOMBRE_MUNICIPIO: nombre},
+            'geometry': {'type': 'Polygon', 'coordinates': [np.vstack([anillo, anillo[:1]]).tolist()]}
+        })
+    return {'type': 'FeatureCollection', 'features': features}
+
+
+def generar_casos(filas=10_000, municipios=TOTAL_MUNICIPIOS_YUCATAN, anios=2, semilla=0, tipado=False):
+    """
+    Genera reportes semanales sintéticos de un brote.
+
+    Cada municipio tiene un peso (pocos municipios concentran la mayoría de
+    los reportes), una semana de llegada del brote y una curva epidémica;
+    cada fila es un reporte en alguna fecha posterior a la llegada. Los
+    casos acumulados son la suma de los semanales del municipio hasta esa
+    fecha. Las filas salen ordenadas por fecha, como se agregan a la hoja.
+
+    Args:
+        filas (int): Número de filas (reportes)
+        municipios (int): Número de municipios (TOTAL_MUNICIPIOS_YUCATAN,
+            TOTAL_MUNICIPIOS_MEXICO o cualquier otro)
+        anios (int): Años de reportes semanales
+        semilla (int): Semilla del generador aleatorio
+        tipado (bool): Aplicar el esquema de ingesta (como lo entrega cargar_datos);
+            si es False, las fechas son texto como en la hoja
+
+    Returns:
+        pd.DataFrame: Fecha_Reporte, Municipio_Yucatan, Casos_Acumulados y Casos_Semanales
+    """
+    rng = np.random.default_rng(semilla)
+    nombres = np.array(nombres_municipios(municipios), dtype=object)
+    total_semanas = max(1, int(anios * 52))
+
+    # Peso de cada municipio (tipo Zipf) y semana en que llega el brote
+    peso = 1.0 / np.arange(1, municipios + 1) ** 1.1
+    peso = rng.permutation(peso)
+    llegada = np.minimum(rng.exponential(total_semanas / 4, municipios).astype(np.int64), total_semanas - 1)
+
+    municipio = rng.choice(municipios, size=filas, p=peso / peso.sum())
+    semanas_activas = total_semanas - llegada[municipio]
+    semana = llegada[municipio] + (rng.random(filas) * semanas_activas).astype(np.int64)
+    dia = rng.integers(0, 7, filas)
+
+    # Curva epidémica: crece hasta un pico y decae, con ruido de Poisson
+    pico = rng.uniform(8, 40, municipios)
+    intensidad = rng.gamma(2.0, 3.0, municipios)
+    t = (semana - llegada[municipio]) / pico[municipio]
+    casos_semanales = rng.poisson(intensidad[municipio] * t * np.exp(1 - t) + 0.2)
+
+    fechas = np.datetime64(FECHA_INICIO_SINTETICA, 'D') + (semana * 7 + dia).astype('timedelta64[D]')
+
+    # Acumulado por municipio en orden de fecha (suma acumulada por grupo)
+    orden = np.lexsort((fechas, municipio))
+    suma = np.cumsum(casos_semanales[orden])
+    inicio_grupo = np.r_[True, municipio[orden][1:] != municipio[orden][:-1]]
+    base = np.maximum.accumulate(np.where(inicio_grupo, suma - casos_semanales[orden], 0))
+    casos_acumulados = np.empty(filas, dtype=np.int64)
+    casos_acumulados[orden] = suma - base
+
+    por_fecha = np.argsort(fechas, kind='stable')
+    df = pd.DataFrame({
+        'Fecha_Reporte': pd.to_datetime(fechas[por_fecha]).strftime(FORMATO_FECHA_REPORTE),
+        'Municipio_Yucatan': nombres[municipio[por_fecha]],
+        'Casos_Acumulados': casos_acumulados[por_fecha],
+        'Casos_Semanales': casos_semanales[por_fecha].astype(np.int64)
+    })
+
+    return aplicar_esquema(df) if tipado else df
@@ -0,0 +1,145 @@
+"""
+Snapshot local de los datos en formato columnar (.npy por columna)
+Cada carga exitosa se guarda en disco para que un proceso nuevo pueda
+arrancar al instante (memory-map) y para seguir mostrando los últimos
+datos buenos si Google Sheets no responde.
+"""
+import json
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from ..config.settings import DIRECTORIO_SNAPSHOT
+
+ARCHIVO_ACTUAL = "actual.json"
+
+_lock_escritura = threading.Lock()
+
+
+def _columna_a_arreglo(serie):
+    """
+    Convierte una columna en (arreglo numpy, descripción para los metadatos).
+    Fechas y números se guardan tal cual; el texto y las categorías se
+    guardan como códigos más la lista de valores distintos.
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        categorias = serie.cat.categories
+        return serie.cat.codes.to_numpy(), {
+            'tipo': 'categoria',
+            'categorias': [str(c) for c in categorias]
+        }
+
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.to_numpy(dtype='datetime64[ns]'), {'tipo': 'fecha'}
+
+    if pd.api.types.is_numeric_dtype(serie):
+        return serie.to_numpy(), {'tipo': 'numerico'}
+
+    categorica = pd.Categorical(serie.astype(str))
+    return categorica.codes, {
+        'tipo': 'texto',
+        'categorias': categorica.categories.tolist()
+    }
+
+
+def guardar_snapshot(df, estado=None, directorio=DIRECTORIO_SNAPSHOT):
+    """
+    Guarda el DataFrame en disco como un conjunto de archivos .npy.
+    La escritura es atómica: primero se escribe una versión nueva completa
+    y después se actualiza el apuntador 'actual.json'.
+
+    Args:
+        df (pd.DataFrame): Datos a guardar
+        estado (EstadoSincronizacion): Estado del sincronizador (opcional), para
+            poder continuar la sincronización incremental desde el snapshot
+        directorio (str): Carpeta de snapshots
+
+    Returns:
+        str: Ruta de la versión guardada
+    """
+    with _lock_escritura:
+        os.makedirs(directorio, exist_ok=True)
+        version = f"v{time.time_ns()}"
+        ruta_version = os.path.join(directorio, version)
+        os.makedirs(ruta_version)
+
+        columnas = []
+        for i, nombre in enumerate(df.columns):
+            arreglo, descripcion = _columna_a_arreglo(df[nombre])
+            archivo = f"col_{i:03d}.npy"
+            np.save(os.path.join(ruta_version, archivo), arreglo, allow_pickle=False)
+            columnas.append({'nombre': str(nombre), 'archivo': archivo, **descripcion})
+
+        meta = {
+            'version': version,
+            'filas': len(df),
+            'columnas': columnas,
+            'guardado': pd.Timestamp.now().isoformat(),
+            'estado_sincronizacion': estado.como_dict() if estado is not None else None
+        }
+
+        ruta_tmp = os.path.join(directorio, ARCHIVO_ACTUAL + ".tmp")
+        with open(ruta_tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(ruta_tmp, os.path.join(directorio, ARCHIVO_ACTUAL))
+
+        _eliminar_versiones_viejas(directorio, version)
+        return ruta_version
+
+
+def _eliminar_versiones_viejas(directorio, version_actual, conservar=2):
+    """
+    Borra las versiones viejas; conserva la actual y la anterior, porque otro
+    proceso puede haber leído 'actual.json' justo antes del cambio y estar por
+    abrir los archivos de la versión anterior.
+    """
+    versiones = sorted(
+        (nombre for nombre in os.listdir(directorio)
+         if nombre.startswith("v") and nombre != version_actual
+         and os.path.isdir(os.path.join(directorio, nombre))),
+        key=lambda nombre: int(nombre[1:]) if nombre[1:].isdigit() else 0
+    )
+    for nombre in versiones[:max(len(versiones) - (conservar - 1), 0)]:
+        # Un lector puede tener abierto un mmap de una versión vieja;
+        # en Linux/Mac el archivo sigue accesible hasta que se cierra
+        shutil.rmtree(os.path.join(directorio, nombre), ignore_errors=True)
+
+
+def cargar_snapshot(directorio=DIRECTORIO_SNAPSHOT):
+    """
+    Carga el último snapshot usando memory-map (no lee las columnas
+    completas hasta que se usan).
+
+    Args:
+        directorio (str): Carpeta de snapshots
+
+    Returns:
+        tuple: (pd.DataFrame, dict con metadatos) o (None, None) si no hay snapshot válido
+    """
+    try:
+        with open(os.path.join(directorio, ARCHIVO_ACTUAL), encoding="utf-8") as f:
+            meta = json.load(f)
+
+        ruta_version = os.path.join(directorio, meta['version'])
+        datos = {}
+        for columna in meta['columnas']:
+            arreglo = np.load(os.path.join(ruta_version, columna['archivo']), mmap_mode='r')
+
+            if columna['tipo'] == 'categoria':
+                datos[columna['nombre']] = pd.Categorical.from_codes(
+                    arreglo, categories=columna['categorias']
+                )
+            elif columna['tipo'] == 'texto':
+                valores = np.array(columna['categorias'], dtype=object)
+                datos[columna['nombre']] = valores[arreglo]
+            else:
+                datos[columna['nombre']] = arreglo
+
+        return pd.DataFrame(datos, copy=False), meta
+
+    except (OSError, ValueError, KeyError):
+        return None, None
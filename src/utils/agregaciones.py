@@ -0,0 +1,177 @@
+"""
+Motor de agregación del dashboard
+Calcula en una sola pasada el resumen por municipio y la serie por fecha;
+todos los paneles (métricas, mapa, top 10, tabla, serie semanal, cronología
+y recomendaciones) leen de este resultado en lugar de agrupar cada uno.
+"""
+import numpy as np
+import pandas as pd
+
+from ..config.coordenadas import resolver_coordenadas
+from .cubo import CuboMunicipioSemana
+
+
+class ResumenAgregado:
+    """Agregados de un DataFrame (ya filtrado) de casos"""
+
+    def __init__(self, df):
+        """
+        Args:
+            df (pd.DataFrame): DataFrame filtrado
+        """
+        self.df = df
+
+        # Con el índice de filtros los datos ya vienen ordenados por fecha
+        if not df['Fecha_Reporte'].is_monotonic_increasing:
+            df = df.sort_values('Fecha_Reporte', kind='stable')
+        self._ordenado = df
+
+        por_municipio = df.groupby('Municipio_Yucatan', observed=True).agg(
+            Casos_Acumulados=('Casos_Acumulados', 'max'),
+            Casos_Semanales=('Casos_Semanales', 'sum'),
+            Fecha_Primer_Caso=('Fecha_Reporte', 'first'),
+            Casos_Primer_Reporte=('Casos_Semanales', 'first')
+        )
+        self.por_municipio = self._con_coordenadas(por_municipio)
+        self.por_fecha = df.groupby('Fecha_Reporte')['Casos_Semanales'].sum()
+        self.serie_por_semana = False  # por_fecha está por fecha de reporte
+        self.ultima_fecha = self.por_fecha.index.max()
+        self._corte = None
+
+    @classmethod
+    def desde_cubo(cls, cubo, municipios, fecha_inicio, fecha_fin):
+        """
+        Calcula los agregados desde el cubo municipio × semana; el costo
+        depende del número de celdas del filtro y no del número de filas.
+        Dos resultados tienen resolución semanal en lugar de por reporte:
+        por_fecha queda agrupada por semana (lunes de cada semana, con
+        serie_por_semana = True) y Casos_Primer_Reporte es el total de la
+        primera semana con reportes de cada municipio, no los casos de su
+        primer reporte. Fecha_Primer_Caso sí es la fecha exacta.
+
+        Args:
+            cubo (CuboMunicipioSemana): Cubo de la versión de datos vigente
+            municipios (list): Municipios seleccionados ('Todos' = todos)
+            fecha_inicio (date): Fecha de inicio (inclusiva)
+            fecha_fin (date): Fecha fin (inclusiva)
+
+        Returns:
+            ResumenAgregado: Resumen del filtro
+        """
+        corte = cubo.recortar(municipios, fecha_inicio, fecha_fin)
+
+        resumen = cls.__new__(cls)
+        resumen.df = None
+        resumen._ordenado = None
+        resumen._corte = corte
+        resumen._filtro = (cubo, municipios, fecha_inicio)
+        resumen.por_municipio = cls._con_coordenadas(corte.por_municipio())
+        resumen.por_fecha = corte.por_semana()
+        resumen.serie_por_semana = True
+        resumen.ultima_fecha = corte.ultima_fecha_reporte()
+        return resumen
+
+    @staticmethod
+    def _con_coordenadas(por_municipio):
+        # Una búsqueda por municipio del resumen (no por fila)
+        por_municipio['lat'], por_municipio['lon'], _ = resolver_coordenadas(por_municipio.index.to_series())
+        return por_municipio
+
+    def metricas_generales(self):
+        """
+        Mismo resultado que preparacion_datos.calcular_metricas_generales().
+
+        Returns:
+            dict: total_municipios, total_casos, casos_semana y ultima_fecha
+        """
+        return {
+            'total_municipios': len(self.por_municipio),
+            'total_casos': int(self.por_municipio['Casos_Acumulados'].max()),
+            'casos_semana': int(self.por_municipio['Casos_Semanales'].sum()),
+            'ultima_fecha': self.ultima_fecha.strftime('%d-%m-%Y')
+        }
+
+    def ranking_municipios(self):
+        """
+        Returns:
+            pd.Series: Casos acumulados por municipio, de mayor a menor
+        """
+        return self.por_municipio['Casos_Acumulados'].sort_values(ascending=False)
+
+    def top_municipios(self, n=10):
+        """Mismo resultado que preparacion_datos.obtener_top_municipios()"""
+        return self.ranking_municipios().head(n)
+
+    def datos_mapa(self):
+        """Mismo resultado que preparacion_datos.preparar_datos_mapa()"""
+        return self.por_municipio[['Casos_Acumulados', 'Casos_Semanales', 'lat', 'lon']].reset_index()
+
+    def tabla_municipios(self):
+        """
+        Returns:
+            pd.DataFrame: Columnas 'Municipio' y 'Casos Totales', de mayor a menor
+        """
+        tabla = self.ranking_municipios().reset_index()
+        tabla.columns = ['Municipio', 'Casos Totales']
+        return tabla
+
+    def datos_temporales(self):
+        """
+        Mismo resultado que preparacion_datos.preparar_datos_temporales() si el
+        resumen viene del DataFrame; desde el cubo, una fila por semana (lunes).
+        """
+        return self.por_fecha.reset_index()
+
+    def cronologia_primer_caso(self):
+        """
+        Mismo resultado que preparacion_datos.preparar_cronologia_primer_caso()
+        si el resumen viene del DataFrame. Desde el cubo, Casos_Semanales es el
+        total de la primera semana con reportes del municipio (la fecha sí es la
+        del primer reporte).
+        """
+        primer_caso = self.por_municipio[['Fecha_Primer_Caso', 'Casos_Primer_Reporte']].reset_index()
+        primer_caso.columns = ['Municipio_Yucatan', 'Fecha_Reporte', 'Casos_Semanales']
+        return primer_caso.sort_values('Fecha_Reporte', kind='stable')
+
+    def datos_propagacion(self):
+        """
+        Casos acumulados por municipio al cierre de cada semana, para animar el mapa.
+
+        Returns:
+            tuple: (DataFrame con Municipio_Yucatan, lat y lon; semanas (lunes);
+            matriz municipios × semanas)
+        """
+        corte = self._corte
+        if corte is None:
+            corte = CuboMunicipioSemana(self.df).recortar(
+                ['Todos'], self.df['Fecha_Reporte'].min(), self.df['Fecha_Reporte'].max()
+            )
+        municipios, semanas, matriz = corte.acumulados_por_semana()
+        ubicacion = self.por_municipio.loc[municipios, ['lat', 'lon']].reset_index()
+        return ubicacion, semanas, matriz
+
+    def actividad_reciente(self, dias=14):
+        """
+        Casos semanales por municipio en los últimos `dias` días.
+
+        Args:
+            dias (int): Ventana en días contada desde la última fecha
+
+        Returns:
+            pd.Series: Casos recientes por municipio, de mayor a menor
+        """
+        if self._corte is not None:
+            if self.por_municipio.empty:
+                return pd.Series(dtype='int64')
+            cubo, municipios, fecha_inicio = self._filtro
+            desde = max(pd.Timestamp(fecha_inicio), self.ultima_fecha - pd.Timedelta(days=dias))
+            recientes = cubo.recortar(municipios, desde, self.ultima_fecha).por_municipio()
+            return recientes['Casos_Semanales'].sort_values(ascending=False)
+
+        fechas = self._ordenado['Fecha_Reporte'].to_numpy(dtype='datetime64[ns]')
+        if len(fechas) == 0:
+            return pd.Series(dtype='int64')
+
+        desde = fechas[-1] - np.timedelta64(dias, 'D')
+        recientes = self._ordenado.iloc[np.searchsorted(fechas, desde, side='left'):]
+        return recientes.groupby('Municipio_Yucatan', observed=True)['Casos_Semanales'].sum().sort_values(ascending=False)
@@ -0,0 +1,112 @@
+"""
+Asignación de recursos entre municipios
+La demanda de cada municipio sale de sus casos recientes más la presión de
+sus vecinos (casos recientes de los municipios cercanos, ponderados por
+cercanía, igual que en el puntaje de riesgo). Cada recurso del
+inventario se reparte en proporción a la demanda sin pasar del máximo por
+municipio (llenado por niveles, "water-filling"): es el óptimo de
+min Σ x²/demanda con Σ x = inventario y 0 ≤ x ≤ máximo, se resuelve con
+un ordenamiento (O(n log n)) y no necesita un solver de programación lineal.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from ..config.settings import PESO_RIESGO_VECINOS, RADIO_VECINOS_KM, RECURSOS_DISPONIBLES
+from .espacial import actividad_vecinos
+
+
+def demanda_municipios(resumen, indice=None, radio_km=RADIO_VECINOS_KM, peso_vecinos=PESO_RIESGO_VECINOS):
+    """
+    Demanda de recursos por municipio: casos de las últimas 2 semanas más
+    `peso_vecinos` veces los casos recientes de sus vecinos, con la misma
+    definición de vecino que puntaje_riesgo() (espacial.actividad_vecinos).
+    Los municipios sin coordenadas registradas no tienen vecinos ni cuentan
+    como vecinos: solo cuenta su propia demanda.
+
+    Args:
+        resumen (ResumenAgregado): Agregados de los datos filtrados
+        indice (IndiceEspacial): Índice de municipios (por defecto, el de COORDENADAS_MUNICIPIOS)
+        radio_km (float): Radio de vecindad en kilómetros
+        peso_vecinos (float): Peso de la presión de los vecinos
+
+    Returns:
+        pd.DataFrame: Casos_Recientes, Presion_Vecinos y Demanda por municipio
+    """
+    por_municipio = resumen.por_municipio
+    recientes = resumen.actividad_reciente(dias=14).reindex(por_municipio.index, fill_value=0).astype(np.float64)
+    _, vecinos, posiciones = actividad_vecinos(recientes, indice, radio_km)
+    presion = np.where(posiciones >= 0, vecinos[posiciones], 0.0)
+    return pd.DataFrame({
+        'Casos_Recientes': recientes.to_numpy(),
+        'Presion_Vecinos': presion,
+        'Demanda': recientes.to_numpy() + peso_vecinos * presion
+    }, index=por_municipio.index)
+
+
+def repartir(demanda, inventario, maximo):
+    """
+    Reparte `inventario` unidades en proporción a la demanda, con tope por municipio.
+
+    Busca el nivel λ tal que Σ min(maximo, λ·demanda) = inventario; los
+    municipios que llegan a su tope quedan fijos y el resto recibe λ·demanda.
+    Después redondea a unidades enteras (residuo mayor).
+
+    Args:
+        demanda (np.ndarray): Demanda de cada municipio (≥ 0)
+        inventario (int): Unidades disponibles
+        maximo (int): Unidades máximas por municipio
+
+    Returns:
+        np.ndarray: Unidades enteras asignadas a cada municipio
+    """
+    demanda = np.asarray(demanda, dtype=np.float64)
+    tope = np.where(demanda > 0, float(maximo), 0.0)
+    if tope.sum() <= inventario:
+        return tope.astype(np.int64)
+
+    # Nivel en que se satura cada municipio, en orden creciente
+    activos = np.flatnonzero(demanda > 0)
+    saturacion = tope[activos] / demanda[activos]
+    orden = np.argsort(saturacion, kind='stable')
+    saturacion, d, c = saturacion[orden], demanda[activos][orden], tope[activos][orden]
+
+    # Con k municipios saturados: λ_k = (inventario − Σ topes de los k) / Σ demanda del resto
+    topes_saturados = np.r_[0.0, np.cumsum(c)[:-1]]
+    demanda_resto = d[::-1].cumsum()[::-1]
+    niveles = (inventario - topes_saturados) / demanda_resto
+    k = int(np.argmax(niveles <= saturacion))
+    continuo = np.zeros_like(demanda)
+    continuo[activos] = np.minimum(tope[activos], niveles[k] * demanda[activos])
+
+    # Unidades enteras: piso y las unidades que faltan a los residuos mayores
+    asignado = np.floor(continuo + 1e-9).astype(np.int64)
+    faltan = int(inventario - asignado.sum())
+    if faltan > 0:
+        residuo = np.where(asignado < tope, continuo - asignado, -1.0)
+        asignado[np.argsort(-residuo, kind='stable')[:faltan]] += 1
+    return asignado
+
+
+def asignar_recursos(resumen, recursos=RECURSOS_DISPONIBLES, indice=None):
+    """
+    Asigna cada recurso del inventario entre los municipios del resumen.
+
+    Args:
+        resumen (ResumenAgregado): Agregados de los datos filtrados
+        recursos (dict): Recurso -> {'inventario': unidades, 'maximo_por_municipio': unidades}
+        indice (IndiceEspacial): Índice de municipios (por defecto, el de COORDENADAS_MUNICIPIOS)
+
+    Returns:
+        tuple: (pd.DataFrame con la demanda y las unidades de cada recurso por
+        municipio, de mayor a menor demanda; dict con tiempo_s y sobrantes por recurso)
+    """
+    inicio = time.perf_counter()
+    tabla = demanda_municipios(resumen, indice)
+    sobrantes = {}
+    for nombre, recurso in recursos.items():
+        tabla[nombre] = repartir(tabla['Demanda'].to_numpy(), recurso['inventario'], recurso['maximo_por_municipio'])
+        sobrantes[nombre] = int(recurso['inventario'] - tabla[nombre].sum())
+    tabla = tabla.sort_values('Demanda', ascending=False, kind='stable')
+    return tabla, {'tiempo_s': time.perf_counter() - inicio, 'sobrantes': sobrantes}
@@ -0,0 +1,370 @@
+"""
+Cubo materializado municipio × semana ISO
+Matrices densas de NumPy con los casos acumulados (máximo), los casos
+semanales (suma), el número de reportes y la primera/última fecha de cada
+celda, más las filas del DataFrame que caen en cada celda. Se construye al
+cargar los datos y se actualiza de forma incremental cuando llegan filas
+nuevas; las consultas cuestan según el número de celdas, no de filas.
+"""
+import numpy as np
+import pandas as pd
+
+from ..data.indice import limites_fechas
+
+# Un lunes: las semanas ISO empiezan en lunes
+_LUNES_BASE = np.datetime64('1970-01-05', 'D')
+_SIN_FECHA = np.iinfo(np.int64).max
+_NS_POR_SEMANA = 7 * 24 * 3600 * 10**9
+
+
+def _numero_semana(fechas):
+    """Número de semana ISO (lunes a domingo) contado desde _LUNES_BASE"""
+    dias = fechas.astype('datetime64[D]')
+    return (dias - _LUNES_BASE).astype(np.int64) // 7
+
+
+def _semanas_con_fecha(fechas):
+    """
+    Retorna (número de semana, máscara de filas con fecha). Las filas sin
+    fecha (NaT, p. ej. una celda vacía en la hoja) no tienen semana: su
+    número queda en 0 y no deben entrar al cubo.
+    """
+    con_fecha = ~np.isnat(fechas)
+    return np.where(con_fecha, _numero_semana(fechas), 0), con_fecha
+
+
+def _codigos_municipio(serie):
+    """Retorna (códigos por fila, nombres) de la columna de municipios"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.cat.codes.to_numpy().astype(np.int64), [str(c) for c in serie.cat.categories]
+    codigos, nombres = pd.factorize(serie)
+    return codigos.astype(np.int64), [str(n) for n in nombres]
+
+
+class CuboMunicipioSemana:
+    """Cubo municipio × semana construido sobre un DataFrame de casos"""
+
+    def __init__(self, df):
+        """
+        Args:
+            df (pd.DataFrame): Datos con el esquema de ingesta aplicado
+        """
+        self.df = df
+        self.fechas = df['Fecha_Reporte'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+        self.fila_municipio, nombres = _codigos_municipio(df['Municipio_Yucatan'])
+        self.municipios = pd.Index(nombres, name='Municipio_Yucatan')
+
+        # Las filas sin fecha se tratan como las de municipio vacío (código -1)
+        semanas, con_fecha = _semanas_con_fecha(df['Fecha_Reporte'].to_numpy(dtype='datetime64[ns]'))
+        self.fila_municipio[~con_fecha] = -1
+        validas = semanas[con_fecha]
+        self.semana_base = int(validas.min()) if len(validas) else 0
+        n_semanas = int(validas.max()) - self.semana_base + 1 if len(validas) else 0
+        self.columna_semana = np.where(con_fecha, semanas - self.semana_base, 0)
+
+        self._crear_matrices(len(self.municipios), n_semanas)
+        self._acumular(np.flatnonzero(self.fila_municipio >= 0))
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+    def _crear_matrices(self, n_municipios, n_semanas):
+        forma = (n_municipios, n_semanas)
+        self.acumulados = np.zeros(forma, dtype=np.int64)
+        self.semanales = np.zeros(forma, dtype=np.int64)
+        self.reportes = np.zeros(forma, dtype=np.int32)
+        self.primera_fecha = np.full(forma, _SIN_FECHA, dtype=np.int64)
+        self.ultima_fecha = np.full(forma, np.iinfo(np.int64).min, dtype=np.int64)
+        self._csr = None
+
+    @property
+    def forma(self):
+        return self.acumulados.shape
+
+    def _celdas(self, posiciones):
+        """Identificador lineal de la celda de cada fila"""
+        return self.fila_municipio[posiciones] * self.forma[1] + self.columna_semana[posiciones]
+
+    def _acumular(self, posiciones):
+        """Suma la contribución de las filas dadas a sus celdas"""
+        if len(posiciones) == 0:
+            return
+        filas = self.fila_municipio[posiciones]
+        columnas = self.columna_semana[posiciones]
+        celdas = filas * self.forma[1] + columnas
+        n_celdas = self.acumulados.size
+
+        self.semanales += np.bincount(
+            celdas, weights=self.df['Casos_Semanales'].to_numpy()[posiciones], minlength=n_celdas
+        ).astype(np.int64).reshape(self.forma)
+        self.reportes += np.bincount(celdas, minlength=n_celdas).astype(np.int32).reshape(self.forma)
+        np.maximum.at(self.acumulados, (filas, columnas), self.df['Casos_Acumulados'].to_numpy()[posiciones])
+        np.minimum.at(self.primera_fecha, (filas, columnas), self.fechas[posiciones])
+        np.maximum.at(self.ultima_fecha, (filas, columnas), self.fechas[posiciones])
+
+    def _filas_por_celda(self):
+        """Índice CSR: filas ordenadas por celda y el inicio de cada celda (se calcula al pedirlo)"""
+        if self._csr is None:
+            validas = np.flatnonzero(self.fila_municipio >= 0)
+            celdas = self._celdas(validas)
+            orden = np.argsort(celdas, kind='stable')
+            inicios = np.searchsorted(celdas[orden], np.arange(self.acumulados.size + 1))
+            self._csr = (validas[orden], inicios)
+        return self._csr
+
+    def filas_celda(self, i_municipio, j_semana):
+        """
+        Posiciones (en self.df) de las filas de una celda.
+
+        Args:
+            i_municipio (int): Fila del cubo
+            j_semana (int): Columna del cubo
+
+        Returns:
+            np.ndarray: Posiciones de las filas
+        """
+        filas, inicios = self._filas_por_celda()
+        celda = i_municipio * self.forma[1] + j_semana
+        return filas[inicios[celda]:inicios[celda + 1]]
+
+    # ------------------------------------------------------------------
+    # Actualización incremental
+    # ------------------------------------------------------------------
+    def actualizar(self, df, filas_sin_cambios):
+        """
+        Crea el cubo de una versión nueva de los datos reutilizando este.
+        Las primeras `filas_sin_cambios` filas deben ser idénticas a las de
+        self.df; el resto (nuevas o corregidas) se integra recalculando solo
+        las celdas afectadas. El cubo actual no se modifica.
+
+        Args:
+            df (pd.DataFrame): Datos de la versión nueva
+            filas_sin_cambios (int): Filas iniciales que no cambiaron
+
+        Returns:
+            CuboMunicipioSemana: Cubo de la versión nueva
+        """
+        k = filas_sin_cambios
+        codigos_nuevos, nombres = _codigos_municipio(df['Municipio_Yucatan'].iloc[k:])
+        semanas_nuevas, con_fecha = _semanas_con_fecha(df['Fecha_Reporte'].iloc[k:].to_numpy(dtype='datetime64[ns]'))
+        validas = semanas_nuevas[con_fecha]
+
+        # El cubo solo crece hacia municipios nuevos y semanas posteriores; si no, se reconstruye
+        if k <= 0 or k > len(self.df) or (len(validas) and validas.min() < self.semana_base):
+            return CuboMunicipioSemana(df)
+
+        # Traducir los códigos de las filas nuevas a los índices del cubo
+        indice_municipio = {nombre: i for i, nombre in enumerate(self.municipios)}
+        for nombre in nombres:
+            indice_municipio.setdefault(nombre, len(indice_municipio))
+        traduccion = np.array([indice_municipio[n] for n in nombres] + [-1], dtype=np.int64)
+        filas_nuevas = traduccion[codigos_nuevos]  # código -1 (vacío) -> -1
+        filas_nuevas[~con_fecha] = -1
+
+        n_semanas = max(self.forma[1], int(validas.max()) - self.semana_base + 1 if len(validas) else 0)
+        n_municipios = len(indice_municipio)
+
+        nuevo = CuboMunicipioSemana.__new__(CuboMunicipioSemana)
+        nuevo.df = df
+        nuevo.fechas = np.concatenate([self.fechas[:k], df['Fecha_Reporte'].iloc[k:].to_numpy(dtype='datetime64[ns]').astype(np.int64)])
+        nuevo.fila_municipio = np.concatenate([self.fila_municipio[:k], filas_nuevas])
+        nuevo.columna_semana = np.concatenate([
+            self.columna_semana[:k], np.where(con_fecha, semanas_nuevas - self.semana_base, 0)
+        ])
+        nuevo.municipios = pd.Index(list(indice_municipio), name='Municipio_Yucatan')
+        nuevo.semana_base = self.semana_base
+        nuevo._crear_matrices(n_municipios, n_semanas)
+
+        # Copiar las celdas actuales a la geometría nueva
+        m, s = self.forma
+        for nombre in ['acumulados', 'semanales', 'reportes', 'primera_fecha', 'ultima_fecha']:
+            getattr(nuevo, nombre)[:m, :s] = getattr(self, nombre)
+
+        # Celdas afectadas: las de las filas que se van y las de las filas que llegan
+        salientes = np.arange(k, len(self.df))
+        salientes = salientes[self.fila_municipio[salientes] >= 0]
+        entrantes = np.arange(k, len(df))
+        entrantes = entrantes[nuevo.fila_municipio[entrantes] >= 0]
+        afectadas = np.unique(np.concatenate([
+            self.fila_municipio[salientes] * n_semanas + self.columna_semana[salientes],
+            nuevo._celdas(entrantes)
+        ]))
+        nuevo._recalcular_celdas(afectadas)
+        return nuevo
+
+    def _recalcular_celdas(self, celdas):
+        """Recalcula desde las filas las celdas indicadas (identificadores lineales)"""
+        if len(celdas) == 0:
+            return
+        filas, columnas = np.divmod(celdas, self.forma[1])
+        self.acumulados[filas, columnas] = 0
+        self.semanales[filas, columnas] = 0
+        self.reportes[filas, columnas] = 0
+        self.primera_fecha[filas, columnas] = _SIN_FECHA
+        self.ultima_fecha[filas, columnas] = np.iinfo(np.int64).min
+
+        validas = np.flatnonzero(self.fila_municipio >= 0)
+        self._acumular(validas[np.isin(self._celdas(validas), celdas)])
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+    def inicio_semana(self, j_semana):
+        """Fecha (lunes) en que empieza la columna j del cubo"""
+        return (_LUNES_BASE + np.timedelta64(7 * (self.semana_base + j_semana), 'D')).astype('datetime64[ns]')
+
+    def recortar(self, municipios, fecha_inicio, fecha_fin):
+        """
+        Corte exacto del cubo para un filtro de municipios y fechas.
+        Las semanas completas salen del cubo; las semanas del borde que el
+        rango cubre solo en parte se recalculan con sus filas.
+
+        Args:
+            municipios (list): Municipios seleccionados ('Todos' o vacío = todos)
+            fecha_inicio (date): Fecha de inicio (inclusiva)
+            fecha_fin (date): Fecha fin (inclusiva)
+
+        Returns:
+            CorteCubo: Submatrices del filtro
+        """
+        if not municipios or 'Todos' in municipios:
+            filas = np.arange(self.forma[0])
+        else:
+            posicion = {nombre: i for i, nombre in enumerate(self.municipios)}
+            filas = np.array(
+                [posicion[m] for m in dict.fromkeys(municipios) if m in posicion],
+                dtype=np.int64
+            )
+
+        inicio, fin = limites_fechas(fecha_inicio, fecha_fin)
+        inicio, fin = inicio.astype(np.int64), fin.astype(np.int64)
+        s0 = max(int(_numero_semana(np.array([inicio], dtype='datetime64[ns]'))[0]) - self.semana_base, 0)
+        s1 = min(int(_numero_semana(np.array([fin - 1], dtype='datetime64[ns]'))[0]) - self.semana_base, self.forma[1] - 1)
+        if s1 < s0 or len(filas) == 0:
+            return CorteCubo(self, filas[:0], 0, -1, inicio, fin)
+
+        corte = CorteCubo(self, filas, s0, s1, inicio, fin)
+        for j in sorted({s0, s1}):
+            inicio_semana = self.inicio_semana(j).astype(np.int64)
+            if inicio_semana < inicio or inicio_semana + _NS_POR_SEMANA > fin:
+                corte._recalcular_columna(j - s0)
+        return corte
+
+
+class CorteCubo:
+    """Submatrices del cubo para un filtro; las matrices son copias pequeñas (celdas, no filas)"""
+
+    def __init__(self, cubo, filas, s0, s1, inicio, fin):
+        self.cubo = cubo
+        self.filas = filas
+        self.s0, self.s1 = s0, s1
+        self.inicio, self.fin = inicio, fin
+        self.municipios = cubo.municipios[filas]
+        self.semanas = pd.DatetimeIndex(
+            [cubo.inicio_semana(j) for j in range(s0, s1 + 1)], name='Fecha_Reporte'
+        )
+
+        columnas = slice(s0, s1 + 1)
+        self.acumulados = cubo.acumulados[filas, columnas]
+        self.semanales = cubo.semanales[filas, columnas]
+        self.reportes = cubo.reportes[filas, columnas]
+        self.primera_fecha = cubo.primera_fecha[filas, columnas]
+        self.ultima_fecha = cubo.ultima_fecha[filas, columnas]
+        self._posiciones_borde = {}
+
+    def _recalcular_columna(self, j):
+        """Recalcula una columna del corte solo con las filas dentro del rango de fechas"""
+        j_cubo = self.s0 + j
+        posiciones = np.concatenate(
+            [self.cubo.filas_celda(i, j_cubo) for i in self.filas] or [np.array([], dtype=np.int64)]
+        )
+        fechas = self.cubo.fechas[posiciones]
+        posiciones = posiciones[(fechas >= self.inicio) & (fechas < self.fin)]
+        self._posiciones_borde[j] = posiciones
+
+        local = np.full(len(self.cubo.municipios), -1, dtype=np.int64)
+        local[self.filas] = np.arange(len(self.filas))
+        filas_locales = local[self.cubo.fila_municipio[posiciones]]
+        n = len(self.filas)
+
+        df = self.cubo.df
+        self.semanales[:, j] = np.bincount(
+            filas_locales, weights=df['Casos_Semanales'].to_numpy()[posiciones], minlength=n
+        ).astype(np.int64)
+        self.reportes[:, j] = np.bincount(filas_locales, minlength=n)
+        self.acumulados[:, j] = 0
+        np.maximum.at(self.acumulados[:, j], filas_locales, df['Casos_Acumulados'].to_numpy()[posiciones])
+        self.primera_fecha[:, j] = _SIN_FECHA
+        np.minimum.at(self.primera_fecha[:, j], filas_locales, self.cubo.fechas[posiciones])
+        self.ultima_fecha[:, j] = np.iinfo(np.int64).min
+        np.maximum.at(self.ultima_fecha[:, j], filas_locales, self.cubo.fechas[posiciones])
+
+    @property
+    def vacio(self):
+        return self.reportes.sum() == 0
+
+    def por_municipio(self):
+        """
+        Agregados por municipio (solo municipios con reportes en el corte).
+
+        Returns:
+            pd.DataFrame: Casos_Acumulados (máximo), Casos_Semanales (suma),
+            Fecha_Primer_Caso y Casos_Primer_Reporte (casos semanales de la
+            primera semana con reportes), indexado por municipio
+        """
+        con_datos = self.reportes.sum(axis=1) > 0
+        primera = self.primera_fecha[con_datos]
+        columna_primera = np.argmin(primera, axis=1) if primera.shape[1] else np.zeros(0, dtype=np.int64)
+
+        resultado = pd.DataFrame({
+            'Casos_Acumulados': self.acumulados[con_datos].max(axis=1, initial=0),
+            'Casos_Semanales': self.semanales[con_datos].sum(axis=1),
+            'Fecha_Primer_Caso': pd.to_datetime(primera.min(axis=1, initial=_SIN_FECHA)),
+            'Casos_Primer_Reporte': self.semanales[con_datos][np.arange(len(primera)), columna_primera]
+        }, index=self.municipios[con_datos])
+        return resultado
+
+    def por_semana(self):
+        """
+        Returns:
+            pd.Series: Casos semanales por semana (lunes), solo semanas con reportes
+        """
+        con_datos = self.reportes.sum(axis=0) > 0
+        return pd.Series(
+            self.semanales.sum(axis=0)[con_datos],
+            index=self.semanas[con_datos],
+            name='Casos_Semanales'
+        )
+
+    def acumulados_por_semana(self):
+        """
+        Casos acumulados de cada municipio al cierre de cada semana: una semana
+        sin reportes conserva el último valor conocido del municipio.
+
+        Returns:
+            tuple: (municipios con reportes, semanas (lunes), matriz municipios × semanas)
+        """
+        con_datos = self.reportes.sum(axis=1) > 0
+        matriz = np.maximum.accumulate(self.acumulados[con_datos], axis=1) if con_datos.any() else self.acumulados[con_datos]
+        return self.municipios[con_datos], self.semanas, matriz
+
+    def ultima_fecha_reporte(self):
+        """Fecha del último reporte dentro del corte"""
+        return pd.Timestamp(self.ultima_fecha.max(initial=np.iinfo(np.int64).min))
+
+    def posiciones(self):
+        """
+        Posiciones (en cubo.df) de las filas del corte, en orden.
+
+        Returns:
+            np.ndarray: Posiciones ordenadas
+        """
+        partes = []
+        for j in range(self.s1 - self.s0 + 1):
+            if j in self._posiciones_borde:
+                partes.append(self._posiciones_borde[j])
+            else:
+                partes.extend(self.cubo.filas_celda(i, self.s0 + j) for i in self.filas)
+        if not partes:
+            return np.array([], dtype=np.int64)
+        return np.sort(np.concatenate(partes))
@@ -0,0 +1,248 @@
+"""
+Índice espacial de municipios y puntaje de riesgo por proximidad
+Los puntos se ordenan una vez por latitud; una consulta por radio solo mide
+(haversine) los pares que caen en la franja de latitud del radio, todos a
+la vez con NumPy. Sobre ese índice se calcula el riesgo de cada municipio:
+su actividad reciente más la de los municipios que lo rodean.
+
+Construir el índice cuesta O(n log n) y cada consulta O(log n + puntos en la
+franja). Con municipios repartidos en el mapa la franja tiene pocos puntos;
+en el peor caso (todos en la misma latitud) una consulta es O(n) y consultar
+todos los puntos es O(n²), como sin índice.
+"""
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from ..config.coordenadas import COORDENADAS_MUNICIPIOS, normalizar_municipios
+from ..config.settings import PESO_RIESGO_VECINOS, RADIO_VECINOS_KM
+
+RADIO_TIERRA_KM = 6371.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Distancia en km entre pares de puntos (en radianes); admite broadcasting"""
+    h = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * RADIO_TIERRA_KM * np.arcsin(np.sqrt(np.clip(h, 0, 1)))
+
+
+class IndiceEspacial:
+    """Índice de puntos (lat, lon) para consultas por radio y k vecinos más cercanos"""
+
+    def __init__(self, lat, lon, nombres=None):
+        """
+        Args:
+            lat (array-like): Latitudes en grados
+            lon (array-like): Longitudes en grados
+            nombres (list): Nombre de cada punto (opcional, para buscar por nombre)
+        """
+        self.lat = np.radians(np.asarray(lat, dtype=np.float64))
+        self.lon = np.radians(np.asarray(lon, dtype=np.float64))
+        self.nombres = pd.Index(nombres if nombres is not None else range(len(self.lat)))
+        self._orden = np.argsort(self.lat, kind='stable')
+        self._lat_ordenada = self.lat[self._orden]
+        self._por_radio = {}  # radio_km -> vecinos de los propios puntos
+
+    def __len__(self):
+        return len(self.lat)
+
+    def posiciones(self, nombres):
+        """
+        Returns:
+            np.ndarray: Posición de cada nombre en el índice (-1 si no está)
+        """
+        return self.nombres.get_indexer(pd.Index(nombres))
+
+    def en_radio(self, radio_km, lat=None, lon=None):
+        """
+        Puntos del índice a menos de `radio_km` de cada consulta.
+
+        Args:
+            radio_km (float): Radio en kilómetros
+            lat, lon (array-like): Puntos de consulta en grados; si se omiten,
+                se consulta cada punto del índice (sin contarse a sí mismo)
+
+        Returns:
+            tuple: (inicios, vecinos, distancias) en formato CSR: los vecinos de
+            la consulta i son vecinos[inicios[i]:inicios[i + 1]], del más cercano al más lejano
+        """
+        propios = lat is None
+        if propios and radio_km in self._por_radio:
+            return self._por_radio[radio_km]
+
+        q_lat = self.lat if propios else np.radians(np.asarray(lat, dtype=np.float64))
+        q_lon = self.lon if propios else np.radians(np.asarray(lon, dtype=np.float64))
+
+        # Candidatos: puntos en la franja [lat − radio, lat + radio]
+        franja = radio_km / RADIO_TIERRA_KM
+        desde = np.searchsorted(self._lat_ordenada, q_lat - franja, side='left')
+        hasta = np.searchsorted(self._lat_ordenada, q_lat + franja, side='right')
+        cuantos = hasta - desde
+        consulta = np.repeat(np.arange(len(q_lat)), cuantos)
+        desplazamiento = np.arange(cuantos.sum()) - np.repeat(np.cumsum(cuantos) - cuantos, cuantos)
+        candidato = self._orden[desde[consulta] + desplazamiento]
+
+        distancia = haversine_km(q_lat[consulta], q_lon[consulta], self.lat[candidato], self.lon[candidato])
+        dentro = distancia <= radio_km
+        if propios:
+            dentro &= candidato != consulta
+        consulta, candidato, distancia = consulta[dentro], candidato[dentro], distancia[dentro]
+
+        orden = np.lexsort((distancia, consulta))
+        inicios = np.r_[0, np.cumsum(np.bincount(consulta, minlength=len(q_lat)))]
+        resultado = (inicios, candidato[orden], distancia[orden])
+        if propios:
+            self._por_radio[radio_km] = resultado
+        return resultado
+
+    def k_vecinos(self, k, lat=None, lon=None):
+        """
+        Los k puntos del índice más cercanos a cada consulta.
+
+        Args:
+            k (int): Vecinos por consulta
+            lat, lon (array-like): Puntos de consulta en grados; si se omiten,
+                se consulta cada punto del índice (sin contarse a sí mismo)
+
+        Returns:
+            tuple: (vecinos, distancias), matrices consultas × k; si hay menos
+            de k puntos, las posiciones sobrantes son -1 y distancia inf
+        """
+        n_consultas = len(self.lat) if lat is None else len(lat)
+        disponibles = min(k, len(self.lat) - (lat is None))
+        vecinos = np.full((n_consultas, k), -1, dtype=np.int64)
+        distancias = np.full((n_consultas, k), np.inf)
+        if n_consultas == 0 or disponibles <= 0:
+            return vecinos, distancias
+
+        # Se agranda el radio hasta que todas las consultas tengan k candidatos
+        radio = 10.0
+        while True:
+            inicios, candidatos, dist = self.en_radio(radio, lat, lon)
+            if (np.diff(inicios) >= disponibles).all() or radio > np.pi * RADIO_TIERRA_KM:
+                break
+            radio *= 2
+
+        columna = np.arange(len(candidatos)) - np.repeat(inicios[:-1], np.diff(inicios))
+        primeros = columna < disponibles
+        fila = np.repeat(np.arange(n_consultas), np.diff(inicios))[primeros]
+        vecinos[fila, columna[primeros]] = candidatos[primeros]
+        distancias[fila, columna[primeros]] = dist[primeros]
+        return vecinos, distancias
+
+    def suma_en_radio(self, valores, radio_km, ponderar=False):
+        """
+        Suma de `valores` de los vecinos de cada punto del índice.
+
+        Args:
+            valores (array-like): Valor de cada punto del índice
+            radio_km (float): Radio de vecindad en kilómetros
+            ponderar (bool): Ponderar cada vecino por 1 − distancia/radio (los más cercanos pesan más)
+
+        Returns:
+            np.ndarray: Suma por punto
+        """
+        inicios, vecinos, distancias = self.en_radio(radio_km)
+        peso = np.asarray(valores, dtype=np.float64)[vecinos]
+        if ponderar:
+            peso = peso * (1 - distancias / radio_km)
+        fila = np.repeat(np.arange(len(self.lat)), np.diff(inicios))
+        return np.bincount(fila, weights=peso, minlength=len(self.lat))
+
+
+@lru_cache(maxsize=1)
+def indice_municipios():
+    """
+    Returns:
+        IndiceEspacial: Índice de COORDENADAS_MUNICIPIOS (se construye una vez por proceso)
+    """
+    nombres = list(COORDENADAS_MUNICIPIOS.keys())
+    coordenadas = np.array(list(COORDENADAS_MUNICIPIOS.values()), dtype=np.float64).reshape(-1, 2)
+    return IndiceEspacial(coordenadas[:, 0], coordenadas[:, 1], nombres)
+
+
+def actividad_vecinos(valores, indice=None, radio_km=RADIO_VECINOS_KM):
+    """
+    Actividad de cada municipio y de sus vecinos sobre el índice de municipios.
+    Es la definición de "vecino" del riesgo y de la asignación de recursos:
+    puntos del índice a menos de `radio_km`, ponderados por 1 − distancia/radio.
+    Los municipios sin coordenadas no tienen vecinos ni cuentan como vecinos.
+
+    Args:
+        valores (pd.Series): Valor por municipio (p. ej. casos recientes), indexado por nombre
+        indice (IndiceEspacial): Índice de municipios (por defecto, el de COORDENADAS_MUNICIPIOS)
+        radio_km (float): Radio de vecindad en kilómetros
+
+    Returns:
+        tuple: (actividad por punto del índice, actividad de los vecinos por
+        punto del índice, posición en el índice de cada municipio de `valores` (-1 = sin coordenadas))
+    """
+    indice = indice if indice is not None else indice_municipios()
+    posiciones = indice.posiciones(normalizar_municipios(valores.index))
+    ubicados = posiciones >= 0
+
+    actividad = np.zeros(len(indice))
+    np.add.at(actividad, posiciones[ubicados], valores.to_numpy(dtype=np.float64)[ubicados])
+    return actividad, indice.suma_en_radio(actividad, radio_km, ponderar=True), posiciones
+
+
+def puntaje_riesgo(resumen, indice=None, radio_km=RADIO_VECINOS_KM, peso_vecinos=PESO_RIESGO_VECINOS):
+    """
+    Riesgo de cada municipio del índice: casos de las últimas 2 semanas más
+    `peso_vecinos` veces los casos recientes de los vecinos a menos de
+    `radio_km` (ponderados por cercanía). Incluye municipios sin casos que
+    están junto a municipios afectados.
+
+    Args:
+        resumen (ResumenAgregado): Agregados de los datos filtrados
+        indice (IndiceEspacial): Índice de municipios (por defecto, el de COORDENADAS_MUNICIPIOS)
+        radio_km (float): Radio de vecindad en kilómetros
+        peso_vecinos (float): Peso de la actividad de los vecinos
+
+    Returns:
+        pd.DataFrame: Casos_Recientes, Actividad_Vecinos, Riesgo (0–100),
+        Vecino_Afectado y Distancia_km (vecino con casos recientes más
+        cercano dentro del radio), de mayor a menor riesgo; solo municipios con riesgo > 0
+    """
+    indice = indice if indice is not None else indice_municipios()
+    recientes = resumen.actividad_reciente(dias=14)
+    actividad, vecinos, posiciones = actividad_vecinos(recientes, indice, radio_km)
+    ubicados = posiciones >= 0
+
+    # Vecino afectado más cercano: primer vecino (ya ordenados por distancia) con actividad
+    inicios, candidatos, distancias = indice.en_radio(radio_km)
+    fila = np.repeat(np.arange(len(indice)), np.diff(inicios))
+    primero = np.full(len(indice), -1, dtype=np.int64)
+    afectados = np.flatnonzero(actividad[candidatos] > 0)[::-1]  # al revés: la última escritura es la más cercana
+    primero[fila[afectados]] = afectados
+    tiene_vecino = primero >= 0
+
+    vecino_afectado = np.full(len(indice), None, dtype=object)
+    vecino_afectado[tiene_vecino] = indice.nombres.to_numpy()[candidatos[primero[tiene_vecino]]]
+    distancia_vecino = np.full(len(indice), np.nan)
+    distancia_vecino[tiene_vecino] = distancias[primero[tiene_vecino]]
+
+    tabla = pd.DataFrame({
+        'Casos_Recientes': actividad.astype(np.int64),
+        'Actividad_Vecinos': vecinos,
+        'Riesgo': actividad + peso_vecinos * vecinos,
+        'Vecino_Afectado': vecino_afectado,
+        'Distancia_km': distancia_vecino
+    }, index=pd.Index(indice.nombres, name='Municipio_Yucatan'))
+
+    # Municipios con casos pero sin coordenadas: solo cuenta su propia actividad
+    sin_ubicar = recientes[~ubicados]
+    if len(sin_ubicar):
+        tabla = pd.concat([tabla, pd.DataFrame({
+            'Casos_Recientes': sin_ubicar.to_numpy(dtype=np.int64),
+            'Actividad_Vecinos': 0.0,
+            'Riesgo': sin_ubicar.to_numpy(dtype=np.float64),
+            'Vecino_Afectado': None,
+            'Distancia_km': np.nan
+        }, index=pd.Index(sin_ubicar.index.astype(str), name='Municipio_Yucatan'))])
+
+    maximo = tabla['Riesgo'].max()
+    tabla = tabla.loc[tabla['Riesgo'] > 0]
+    tabla = tabla.assign(Riesgo=100 * tabla['Riesgo'] / maximo)
+    return tabla.sort_values('Riesgo', ascending=False, kind='stable')
@@ -0,0 +1,51 @@
+"""
+Reducción de series largas antes de graficarlas
+Largest-Triangle-Three-Buckets (LTTB): conserva la forma de la serie
+(picos y valles) con solo los puntos que la gráfica alcanza a mostrar.
+"""
+import numpy as np
+
+
+def indices_lttb(x, y, max_puntos):
+    """
+    Elige los puntos que se conservan con LTTB.
+
+    Args:
+        x (array-like): Posiciones (numéricas y crecientes)
+        y (array-like): Valores
+        max_puntos (int): Puntos que se quieren como máximo
+
+    Returns:
+        np.ndarray: Índices (ordenados) de los puntos conservados; todos si
+        la serie ya cabe en max_puntos
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if max_puntos is None or max_puntos >= n or max_puntos < 3:
+        return np.arange(n)
+
+    # El primer y el último punto siempre se conservan; el resto se reparte en cubetas
+    cada = (n - 2) / (max_puntos - 2)
+    limites = (np.arange(max_puntos - 1) * cada).astype(np.int64) + 1
+    limites[-1] = n - 1
+
+    indices = np.empty(max_puntos, dtype=np.int64)
+    indices[0], indices[-1] = 0, n - 1
+    anterior = 0
+    for i in range(max_puntos - 2):
+        inicio, fin = limites[i], limites[i + 1]
+        # Promedio de la cubeta siguiente (la última "cubeta" es el punto final)
+        sig_inicio, sig_fin = fin, limites[i + 2] if i + 2 < len(limites) else n
+        promedio_x = x[sig_inicio:sig_fin].mean()
+        promedio_y = y[sig_inicio:sig_fin].mean()
+
+        # Punto de la cubeta que forma el triángulo de mayor área
+        area = np.abs(
+            (x[anterior] - promedio_x) * (y[inicio:fin] - y[anterior])
+            - (x[anterior] - x[inicio:fin]) * (promedio_y - y[anterior])
+        )
+        anterior = inicio + int(np.argmax(area))
+        indices[i + 1] = anterior
+
+    return indices
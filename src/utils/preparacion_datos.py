@@ -2,7 +2,7 @@
 Funciones para preparar y transformar datos para las visualizaciones
 """
 import pandas as pd
-from ..config.coordenadas import obtener_coordenadas
+from ..config.coordenadas import resolver_coordenadas
 
 
 def agregar_coordenadas(df):
@@ -16,13 +16,12 @@ def agregar_coordenadas(df):
     Returns:
         pd.DataFrame: DataFrame con columnas 'lat' y 'lon' agregadas
     """
+    # Los datos ingeridos ya traen las coordenadas (ver esquema.aplicar_esquema)
+    if 'lat' in df.columns and 'lon' in df.columns:
+        return df
+
     df_con_coords = df.copy()
-    df_con_coords['lat'] = df_con_coords['Municipio_Yucatan'].apply(
-        lambda x: obtener_coordenadas(x)[0]
-    )
-    df_con_coords['lon'] = df_con_coords['Municipio_Yucatan'].apply(
-        lambda x: obtener_coordenadas(x)[1]
-    )
+    df_con_coords['lat'], df_con_coords['lon'], _ = resolver_coordenadas(df_con_coords['Municipio_Yucatan'])
     return df_con_coords
 
 
@@ -36,7 +35,7 @@ def preparar_datos_mapa(df):
     Returns:
         pd.DataFrame: DataFrame agrupado listo para el mapa
     """
-    df_mapa = df.groupby('Municipio_Yucatan').agg({
+    df_mapa = df.groupby('Municipio_Yucatan', observed=True).agg({
         'Casos_Acumulados': 'max',
         'Casos_Semanales': 'sum',
         'lat': 'first',
@@ -75,7 +74,7 @@ def obtener_top_municipios(df, n=10):
     Returns:
         pd.Series: Serie con los top municipios y sus casos
     """
-    return df.groupby('Municipio_Yucatan')['Casos_Acumulados'].max().sort_values(ascending=False).head(n)
+    return df.groupby('Municipio_Yucatan', observed=True)['Casos_Acumulados'].max().sort_values(ascending=False).head(n)
 
 
 def preparar_datos_temporales(df):
@@ -101,6 +100,6 @@ def preparar_cronologia_primer_caso(df):
     Returns:
         pd.DataFrame: DataFrame con primer caso por municipio
     """
-    primer_caso = df.sort_values('Fecha_Reporte').groupby('Municipio_Yucatan').first().reset_index()
+    primer_caso = df.sort_values('Fecha_Reporte').groupby('Municipio_Yucatan', observed=True).first().reset_index()
     primer_caso = primer_caso[['Municipio_Yucatan', 'Fecha_Reporte', 'Casos_Semanales']].copy()
     return primer_caso.sort_values('Fecha_Reporte')
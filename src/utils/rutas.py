@@ -0,0 +1,153 @@
+"""
+Planeación de rutas de brigadas de inspección
+Las paradas (municipios prioritarios) se reparten entre las brigadas por
+barrido angular alrededor de la base; cada ruta se arma con vecino más
+cercano y se mejora con 2-opt hasta agotar su parte del tiempo disponible,
+así la respuesta sigue siendo interactiva aun con cientos de paradas.
+"""
+import time
+
+import numpy as np
+import pandas as pd
+
+from ..config.coordenadas import COORDENADAS_MUNICIPIOS, normalizar_municipio
+from ..config.settings import BRIGADAS_INSPECCION, MUNICIPIO_BASE_BRIGADAS, TIEMPO_MAX_RUTAS_S
+from .espacial import haversine_km
+
+
+def matriz_distancias(lat, lon):
+    """
+    Distancias en línea recta (haversine) entre todos los puntos.
+
+    Args:
+        lat (array-like): Latitudes en grados
+        lon (array-like): Longitudes en grados
+
+    Returns:
+        np.ndarray: Matriz n×n en kilómetros
+    """
+    lat = np.radians(np.asarray(lat, dtype=np.float64))
+    lon = np.radians(np.asarray(lon, dtype=np.float64))
+    return haversine_km(lat[:, None], lon[:, None], lat[None, :], lon[None, :])
+
+
+def _vecino_mas_cercano(distancias, nodos):
+    """Recorrido que sale de nodos[0] y siempre va a la parada pendiente más cercana"""
+    recorrido = [nodos[0]]
+    pendientes = list(nodos[1:])
+    while pendientes:
+        fila = distancias[recorrido[-1], pendientes]
+        recorrido.append(pendientes.pop(int(np.argmin(fila))))
+    return np.array(recorrido, dtype=np.int64)
+
+
+def _dos_opt(distancias, recorrido, limite):
+    """
+    Mejora un recorrido cerrado invirtiendo tramos mientras acorten la ruta.
+    El primer nodo (la base) no se mueve.
+
+    Returns:
+        tuple: (recorrido, mejoras aplicadas, True si terminó antes del límite de tiempo)
+    """
+    m = len(recorrido)
+    mejoras = 0
+    if m < 4:
+        return recorrido, mejoras, True
+
+    hubo_mejora = True
+    while hubo_mejora:
+        hubo_mejora = False
+        for i in range(m - 2):
+            if time.perf_counter() > limite:
+                return recorrido, mejoras, False
+            # Aristas (i, i+1) y (j, j+1) para todos los j no adyacentes a la vez
+            j = np.arange(i + 2, m if i > 0 else m - 1)
+            if len(j) == 0:
+                continue
+            a, b = recorrido[i], recorrido[i + 1]
+            c, d = recorrido[j], recorrido[(j + 1) % m]
+            delta = distancias[a, c] + distancias[b, d] - distancias[a, b] - distancias[c, d]
+            k = int(np.argmin(delta))
+            if delta[k] < -1e-9:
+                recorrido[i + 1:j[k] + 1] = recorrido[i + 1:j[k] + 1][::-1]
+                mejoras += 1
+                hubo_mejora = True
+    return recorrido, mejoras, True
+
+
+def _repartir_por_angulo(lat, lon, base, paradas, brigadas):
+    """Divide las paradas en grupos contiguos (por ángulo alrededor de la base) de tamaño parejo"""
+    angulo = np.arctan2(lat[paradas] - lat[base], lon[paradas] - lon[base])
+    ordenadas = paradas[np.argsort(angulo, kind='stable')]
+    return [grupo for grupo in np.array_split(ordenadas, brigadas) if len(grupo)]
+
+
+def planear_rutas(municipios, coordenadas_extra=None, base=MUNICIPIO_BASE_BRIGADAS,
+                  brigadas=BRIGADAS_INSPECCION, tiempo_max_s=TIEMPO_MAX_RUTAS_S):
+    """
+    Rutas cerradas (salen y regresan a la base) que cubren los municipios dados.
+
+    Args:
+        municipios (list): Municipios a visitar, p. ej. los prioritarios
+        coordenadas_extra (dict): Nombre -> (lat, lon) además de COORDENADAS_MUNICIPIOS
+        base (str): Municipio de donde salen las brigadas
+        brigadas (int): Número de brigadas (rutas)
+        tiempo_max_s (float): Tiempo máximo para mejorar las rutas con 2-opt; se
+            reparte entre las brigadas (el que no usa una pasa a las siguientes)
+
+    Returns:
+        tuple: (lista de rutas, cada una un pd.DataFrame con Municipio_Yucatan,
+        lat y lon en orden de visita (empieza y termina en la base) y
+        attrs['distancia_km']; dict con tiempo_s, distancia_km, mejoras,
+        completo (False si se agotó el tiempo) y sin_coordenadas)
+    """
+    inicio = time.perf_counter()
+    # Búsqueda por nombre normalizado, como en el mapa; las rutas muestran el nombre recibido
+    coordenadas = {
+        normalizar_municipio(nombre): valor
+        for nombre, valor in {**COORDENADAS_MUNICIPIOS, **(coordenadas_extra or {})}.items()
+    }
+    clave_base = normalizar_municipio(base)
+    if clave_base not in coordenadas:
+        raise ValueError(f"La base de las brigadas ({base}) no tiene coordenadas registradas")
+
+    nombres, claves, sin_coordenadas = [str(base)], [clave_base], []
+    for municipio in dict.fromkeys(map(str, municipios)):
+        clave = normalizar_municipio(municipio)
+        if clave not in coordenadas:
+            sin_coordenadas.append(municipio)
+        elif clave not in claves:
+            nombres.append(municipio)
+            claves.append(clave)
+    lat = np.array([coordenadas[c][0] for c in claves], dtype=np.float64)
+    lon = np.array([coordenadas[c][1] for c in claves], dtype=np.float64)
+    distancias = matriz_distancias(lat, lon)
+
+    grupos = _repartir_por_angulo(lat, lon, 0, np.arange(1, len(nombres)), max(1, int(brigadas)))
+    limite = inicio + tiempo_max_s
+    rutas, mejoras, completo = [], 0, True
+    for i, grupo in enumerate(grupos):
+        recorrido = _vecino_mas_cercano(distancias, np.r_[0, grupo])
+        # Cada brigada tiene su parte del tiempo que queda, así las últimas también se mejoran
+        ahora = time.perf_counter()
+        limite_brigada = ahora + max(limite - ahora, 0) / (len(grupos) - i)
+        recorrido, n_mejoras, terminado = _dos_opt(distancias, recorrido, limite_brigada)
+        mejoras += n_mejoras
+        completo &= terminado
+
+        cerrado = np.r_[recorrido, 0]
+        ruta = pd.DataFrame({
+            'Municipio_Yucatan': [nombres[i] for i in cerrado],
+            'lat': lat[cerrado],
+            'lon': lon[cerrado]
+        })
+        ruta.attrs['distancia_km'] = float(distancias[cerrado[:-1], cerrado[1:]].sum())
+        rutas.append(ruta)
+
+    return rutas, {
+        'tiempo_s': time.perf_counter() - inicio,
+        'distancia_km': sum(r.attrs['distancia_km'] for r in rutas),
+        'mejoras': mejoras,
+        'completo': completo,
+        'sin_coordenadas': sin_coordenadas
+    }